@@ -0,0 +1,92 @@
+''' Benchmark the speed of CFR training and of step/step_back
+
+Run it on two checkouts to compare them, e.g.,
+
+    python examples/benchmark_cfr.py --env leduc-holdem --num_iterations 100
+    python examples/benchmark_cfr.py --env limit-holdem --num_iterations 1
+
+`--vectorized` benchmarks `VectorizedCFRAgent` instead, whose iterations
+go over the whole tree of leduc-holdem rather than one sampled deal.
+'''
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+import rlcard
+from rlcard.agents import CFRAgent, VectorizedCFRAgent
+
+def benchmark_cfr(env_id, num_iterations, seed, vectorized=False):
+    env = rlcard.make(env_id, config={'seed': seed, 'allow_step_back': True})
+    if vectorized:
+        agent = VectorizedCFRAgent(env, tempfile.mkdtemp())
+    else:
+        agent = CFRAgent(env, tempfile.mkdtemp())
+    start = time.perf_counter()
+    for _ in range(num_iterations):
+        agent.train()
+    return num_iterations / (time.perf_counter() - start)
+
+def benchmark_step_back(env_id, num_games, seed):
+    ''' Play random games to the end and step back to the root
+
+    Returns:
+        (float): The number of steps plus step backs per second
+    '''
+    env = rlcard.make(env_id, config={'seed': seed, 'allow_step_back': True})
+    np_random = np.random.RandomState(seed)
+    num_moves = 0
+    start = time.perf_counter()
+    for _ in range(num_games):
+        state, _ = env.reset()
+        depth = 0
+        while not env.is_over():
+            state, _ = env.step(np_random.choice(list(state['legal_actions'])))
+            depth += 1
+        while env.step_back():
+            pass
+        num_moves += 2 * depth
+    return num_moves / (time.perf_counter() - start)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("CFR benchmark in RLCard")
+    parser.add_argument(
+        '--env',
+        type=str,
+        default='leduc-holdem',
+        choices=[
+            'blackjack',
+            'leduc-holdem',
+            'limit-holdem',
+            'no-limit-holdem',
+        ],
+    )
+    parser.add_argument(
+        '--num_iterations',
+        type=int,
+        default=100,
+        help='CFR iterations. 0 to skip, one iteration of limit-holdem takes minutes with deepcopy',
+    )
+    parser.add_argument(
+        '--num_games',
+        type=int,
+        default=2000,
+        help='Random games played and stepped back',
+    )
+    parser.add_argument(
+        '--vectorized',
+        action='store_true',
+        help='Benchmark VectorizedCFRAgent, leduc-holdem only',
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+    )
+
+    args = parser.parse_args()
+
+    print('{} step/step_back: {:.0f} moves/s'.format(args.env, benchmark_step_back(args.env, args.num_games, args.seed)))
+    if args.num_iterations > 0:
+        print('{} CFR: {:.3f} iterations/s'.format(args.env, benchmark_cfr(args.env, args.num_iterations, args.seed, args.vectorized)))
@@ -0,0 +1,111 @@
+''' Benchmark the inference backends of the DQN, NFSP and DMC networks
+
+Prints the latency of one forward pass on the CPU with torch and with
+every backend of `export_model`, e.g.,
+
+    python examples/benchmark_inference.py --env leduc-holdem
+    python examples/benchmark_inference.py --env doudizhu --batch_sizes 1 32
+
+The networks are untrained, their speed does not depend on the weights.
+'''
+import time
+import argparse
+
+import numpy as np
+import torch
+
+import rlcard
+from rlcard.agents import DQNAgent, NFSPAgent
+from rlcard.agents.dmc_agent.model import DMCNet
+from rlcard.agents.inference import BACKENDS, TorchInference, export_model
+
+def build_networks(env, mlp_layers):
+    ''' Build the networks of the agents for the environment
+
+    Returns:
+        (dict): Name -> (network, function batch size -> NumPy inputs)
+    '''
+    state_shape = env.state_shape[0]
+    np_random = np.random.RandomState(0)
+    networks = {}
+    if env.name != 'doudizhu':
+        dqn = DQNAgent(num_actions=env.num_actions,
+                       state_shape=state_shape,
+                       mlp_layers=mlp_layers,
+                       device=torch.device('cpu'))
+        nfsp = NFSPAgent(num_actions=env.num_actions,
+                         state_shape=state_shape,
+                         hidden_layers_sizes=mlp_layers,
+                         q_mlp_layers=mlp_layers,
+                         device=torch.device('cpu'))
+        obs = lambda batch_size: (np_random.rand(batch_size, *state_shape).astype(np.float32),)
+        networks['dqn'] = (dqn.q_estimator.qnet, obs)
+        networks['nfsp'] = (nfsp.policy_network, obs)
+    action_shape = env.action_shape[0] or [env.num_actions]
+    networks['dmc'] = (DMCNet(state_shape, action_shape, mlp_layers),
+                       lambda batch_size: (np_random.rand(batch_size, *state_shape).astype(np.float32),
+                                           np_random.rand(batch_size, *action_shape).astype(np.float32)))
+    return networks
+
+def benchmark(function, inputs, min_seconds):
+    ''' Call a function repeatedly
+
+    Returns:
+        (float): The mean time of a call in microseconds
+    '''
+    function(*inputs)
+    num_calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        function(*inputs)
+        num_calls += 1
+    return (time.perf_counter() - start) / num_calls * 1e6
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Inference backend benchmark in RLCard")
+    parser.add_argument(
+        '--env',
+        type=str,
+        default='leduc-holdem',
+        choices=[
+            'blackjack',
+            'leduc-holdem',
+            'limit-holdem',
+            'doudizhu',
+            'mahjong',
+            'no-limit-holdem',
+            'uno',
+            'gin-rummy',
+        ],
+    )
+    parser.add_argument(
+        '--mlp_layers',
+        type=int,
+        nargs='+',
+        default=[64, 64],
+    )
+    parser.add_argument(
+        '--batch_sizes',
+        type=int,
+        nargs='+',
+        default=[1, 32, 1024],
+    )
+    parser.add_argument(
+        '--min_seconds',
+        type=float,
+        default=0.5,
+        help='Time spent on every measurement',
+    )
+
+    args = parser.parse_args()
+
+    torch.set_num_threads(1)
+    env = rlcard.make(args.env)
+    print('{:6} {:>6} {:>12}'.format('net', 'batch', 'torch') + ''.join('{:>12}'.format(backend) for backend in BACKENDS))
+    for name, (network, make_inputs) in build_networks(env, args.mlp_layers).items():
+        network.eval()
+        functions = [TorchInference(network)] + [export_model(network, backend) for backend in BACKENDS]
+        for batch_size in args.batch_sizes:
+            inputs = make_inputs(batch_size)
+            times = [benchmark(function, inputs, args.min_seconds) for function in functions]
+            print('{:6} {:>6} '.format(name, batch_size) + ''.join('{:>10.1f}us'.format(t) for t in times))
@@ -14,6 +14,7 @@ from rlcard.utils import (
     Logger,
     plot_curve,
 )
+from rlcard.utils.exploitability import Exploitability
 
 def train(args):
     # Make environments, CFR only supports Leduc Holdem
@@ -50,6 +51,9 @@ def train(args):
         RandomAgent(num_actions=env.num_actions),
     ])
 
+    # The exact distance to an equilibrium, without the noise of the tournament
+    exploitability = Exploitability(env)
+
     # Start training
     with Logger(args.log_dir) as logger:
         for episode in range(args.num_episodes):
@@ -58,6 +62,7 @@ def train(args):
             # Evaluate the performance. Play with Random agents.
             if episode % args.evaluate_every == 0:
                 agent.save() # Save model
+                agent.save_table() # And a memory-mappable checkpoint of the tables
                 logger.log_performance(
                     episode,
                     tournament(
@@ -65,6 +70,7 @@ def train(args):
                         args.num_eval_games
                     )[0]
                 )
+                logger.log('exploitability: {:.5f}'.format(exploitability(agent)))
 
         # Get the paths
         csv_path, fig_path = logger.csv_path, logger.fig_path
@@ -8,6 +8,14 @@ import torch
 import rlcard
 from rlcard.agents.dmc_agent import DMCTrainer
 
+def parse_address(address):
+    if address == '':
+        return None
+    if ':' in address:
+        host, port = address.rsplit(':', 1)
+        return (host, int(port))
+    return address
+
 def train(args):
 
     # Make the environment
@@ -24,6 +32,11 @@ def train(args):
         num_actor_devices=args.num_actor_devices,
         num_actors=args.num_actors,
         training_device=args.training_device,
+        rollout_address=parse_address(args.rollout_address),
+        rollout_authkey=args.rollout_authkey.encode() if args.rollout_authkey else None,
+        num_rollout_workers=args.num_rollout_workers,
+        shared_trunk=args.shared_trunk,
+        inference_server=args.inference_server,
     )
 
     # Train DMC Agents
@@ -90,6 +103,34 @@ if __name__ == '__main__':
         type=str,
         help='The index of the GPU used for training models',
     )
+    parser.add_argument(
+        '--rollout_address',
+        default='',
+        type=str,
+        help='host:port or Unix socket path to accept rollout workers on (default: disabled)',
+    )
+    parser.add_argument(
+        '--rollout_authkey',
+        default='',
+        type=str,
+        help='The secret key of the rollout workers, required for a TCP address that other machines can reach',
+    )
+    parser.add_argument(
+        '--num_rollout_workers',
+        default=0,
+        type=int,
+        help='The number of rollout workers to start on this machine',
+    )
+    parser.add_argument(
+        '--shared_trunk',
+        action='store_true',
+        help='Encode the observation once per decision instead of once per legal action',
+    )
+    parser.add_argument(
+        '--inference_server',
+        action='store_true',
+        help='Score the legal actions of all the actors in one process',
+    )
 
     args = parser.parse_args()
 
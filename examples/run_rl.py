@@ -11,10 +11,12 @@ from rlcard.utils import (
     get_device,
     set_seed,
     tournament,
+    tournament_parallel,
     reorganize,
     Logger,
     plot_curve,
 )
+from rlcard.utils.checkpoint import read_checkpoint
 
 def train(args):
 
@@ -36,7 +38,7 @@ def train(args):
     if args.algorithm == 'dqn':
         from rlcard.agents import DQNAgent
         if args.load_checkpoint_path != "":
-            agent = DQNAgent.from_checkpoint(checkpoint=torch.load(args.load_checkpoint_path))
+            agent = DQNAgent.from_checkpoint(checkpoint=read_checkpoint(args.load_checkpoint_path))
         else:
             agent = DQNAgent(
                 num_actions=env.num_actions,
@@ -50,7 +52,7 @@ def train(args):
     elif args.algorithm == 'nfsp':
         from rlcard.agents import NFSPAgent
         if args.load_checkpoint_path != "":
-            agent = NFSPAgent.from_checkpoint(checkpoint=torch.load(args.load_checkpoint_path))
+            agent = NFSPAgent.from_checkpoint(checkpoint=read_checkpoint(args.load_checkpoint_path))
         else:
             agent = NFSPAgent(
                 num_actions=env.num_actions,
@@ -87,12 +89,21 @@ def train(args):
 
             # Evaluate the performance. Play with random agents.
             if episode % args.evaluate_every == 0:
-                logger.log_performance(
-                    episode,
-                    tournament(
+                if args.num_eval_workers > 1:
+                    payoffs = tournament_parallel(
                         env,
                         args.num_eval_games,
-                    )[0]
+                        num_workers=args.num_eval_workers,
+                        seed=args.seed + episode,
+                    )
+                else:
+                    payoffs = tournament(
+                        env,
+                        args.num_eval_games,
+                    )
+                logger.log_performance(
+                    episode,
+                    payoffs[0]
                 )
 
         # Get the paths
@@ -153,6 +164,11 @@ if __name__ == '__main__':
         type=int,
         default=2000,
     )
+    parser.add_argument(
+        '--num_eval_workers',
+        type=int,
+        default=1,
+    )
     parser.add_argument(
         '--evaluate_every',
         type=int,
@@ -5,6 +5,7 @@ import os
 import pickle
 
 from rlcard.utils.utils import *
+from rlcard.utils.policy_table import TABLE_FILE, PolicyTable, write_policy_tables, load_policy_tables
 
 class CFRAgent():
     ''' Implement CFR (chance sampling) algorithm
@@ -219,3 +220,35 @@ class CFRAgent():
         self.iteration = pickle.load(iteration_file)
         iteration_file.close()
 
+    def save_table(self):
+        ''' Save the tables to one memory-mappable file. It is written
+            atomically, so it can checkpoint a long run at any iteration.
+        '''
+        if not os.path.exists(self.model_path):
+            os.makedirs(self.model_path)
+        tables = {
+            'policy': self.policy,
+            'average_policy': self.average_policy,
+            'regrets': self.regrets,
+        }
+        write_policy_tables(os.path.join(self.model_path, TABLE_FILE), tables,
+                            self.env.num_actions, meta={'iteration': self.iteration})
+
+    def load_table(self, resume=False):
+        ''' Load the tables saved by `save_table`
+
+        Args:
+            resume (boolean): Load copies of all the tables to continue training.
+                Otherwise the average policy is mapped read-only for evaluation,
+                and shared by the processes that load the same file.
+        '''
+        path = os.path.join(self.model_path, TABLE_FILE)
+        if resume:
+            tables, meta = load_policy_tables(path)
+            self.policy = collections.defaultdict(list, tables['policy'])
+            self.average_policy = collections.defaultdict(np.array, tables['average_policy'])
+            self.regrets = collections.defaultdict(np.array, tables['regrets'])
+        else:
+            self.average_policy = PolicyTable(path, 'average_policy')
+            meta = self.average_policy.meta
+        self.iteration = meta['iteration']
@@ -0,0 +1,205 @@
+import copy
+import time
+import timeit
+
+import numpy as np
+import torch
+
+from .model import DMCAgent
+
+
+class InferenceServer:
+    """One process that scores the legal actions of all the DMC actors
+
+    Without it every actor process holds its own copy of the model and
+    scores its legal actions alone. With it, an actor writes its
+    observation and action features to its slot of shared memory, puts
+    (actor, position, number of actions) on the request queue and waits
+    on its semaphore. The server takes requests until `max_batch_size`
+    (observation, action) pairs, every actor, or `max_latency` seconds,
+    scores them with one forward pass per position, writes the values to
+    the slots and releases the actors. Its model pulls new weights from
+    the `ParameterStore` between batches.
+
+    Args:
+        ctx: The multiprocessing context of the actors
+        param_store (ParameterStore): The weights published by the learner
+        device: The device of the model of the server, one of the actor devices
+        num_actors (int): The number of actors over all devices
+        state_shape (list): The state shape of every position
+        action_shape (list): The action shape of every position
+        max_actions (int): The maximum number of legal actions of a state
+        max_batch_size (int): The number of pairs after which a batch is scored
+        max_latency (float): The seconds to wait for more requests
+    """
+    def __init__(
+        self,
+        ctx,
+        param_store,
+        device,
+        num_actors,
+        state_shape,
+        action_shape,
+        max_actions,
+        max_batch_size=4096,
+        max_latency=0.002,
+    ):
+        self.param_store = param_store
+        self.device = device
+        self.num_actors = num_actors
+        self.obs_dims = [int(np.prod(shape)) for shape in state_shape]
+        self.action_dims = [int(np.prod(shape)) for shape in action_shape]
+        self.max_actions = max_actions
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+
+        # The slots of the actors. The features are int8 as in the buffers.
+        self.obs = torch.zeros((num_actors, max(self.obs_dims)), dtype=torch.float32).share_memory_()
+        self.actions = torch.zeros((num_actors, max_actions, max(self.action_dims)), dtype=torch.int8).share_memory_()
+        self.values = torch.zeros((num_actors, max_actions), dtype=torch.float32).share_memory_()
+        self.requests = ctx.SimpleQueue()
+        self.ready = [ctx.Semaphore(0) for _ in range(num_actors)]
+        # Requests, batches and pairs served
+        self.counters = ctx.RawArray('q', 3)
+        # The versions of the weights of the server
+        self.versions = ctx.RawArray('q', len(self.obs_dims))
+
+    def start(self, ctx):
+        """Start the server process
+
+        Args:
+            ctx: The multiprocessing context of the actors
+
+        Returns:
+            (multiprocessing.Process): The server process
+        """
+        process = ctx.Process(target=self.serve, name='dmc-inference', daemon=True)
+        process.start()
+        return process
+
+    def close(self):
+        self.requests.put(None)
+
+    def client(self, actor_id, exp_epsilon=0.01):
+        """Get the model of an actor, to use instead of a DMCModel
+
+        Args:
+            actor_id (int): The index of the actor over all devices
+            exp_epsilon (float): The probability of exploration
+
+        Returns:
+            (InferenceClient): The client
+        """
+        return InferenceClient(self, actor_id, exp_epsilon)
+
+    def stats(self):
+        """The requests, batches and (observation, action) pairs served so far"""
+        return dict(zip(('requests', 'batches', 'pairs'), self.counters))
+
+    def serve(self):
+        """Serve until `close`, the target of the server process"""
+        model = copy.deepcopy(self.param_store.models[self.device])
+        versions = [0 for _ in self.obs_dims]
+        obs, actions, values = self.obs.numpy(), self.actions.numpy(), self.values.numpy()
+        timer = timeit.default_timer
+        stopped = False
+        while not stopped:
+            if self.param_store.pull(model, self.device, versions):
+                self.versions[:] = versions
+            request = self.requests.get()
+            if request is None:
+                break
+            batch, num_pairs = [request], request[2]
+            deadline = timer() + self.max_latency
+            while len(batch) < self.num_actors and num_pairs < self.max_batch_size:
+                if self.requests.empty():
+                    if timer() >= deadline:
+                        break
+                    time.sleep(0.0001)
+                    continue
+                request = self.requests.get()
+                if request is None:
+                    stopped = True
+                    break
+                batch.append(request)
+                num_pairs += request[2]
+
+            self.counters[0] += len(batch)
+            self.counters[1] += 1
+            self.counters[2] += num_pairs
+            for position in {request[1] for request in batch}:
+                requests = [request for request in batch if request[1] == position]
+                ids = [actor_id for actor_id, _, _ in requests]
+                counts = [count for _, _, count in requests]
+                action_values = np.concatenate([actions[actor_id, :count, :self.action_dims[position]]
+                                                for actor_id, _, count in requests]).astype(np.float32)
+                q_values = model.get_agent(position)._predict_values(
+                    obs[ids, :self.obs_dims[position]], action_values, counts)
+                for (actor_id, _, count), start in zip(requests, np.cumsum([0] + counts[:-1])):
+                    values[actor_id, :count] = q_values[start:start+count]
+                    self.ready[actor_id].release()
+
+
+class InferenceClient:
+    """The agents of an actor, which ask the `InferenceServer` for their values"""
+    def __init__(self, server, actor_id, exp_epsilon=0.01):
+        self.server = server
+        self.actor_id = actor_id
+        self.agents = [
+            RemoteDMCAgent(self, position, exp_epsilon)
+            for position in range(len(server.obs_dims))
+        ]
+        self._slots = None
+
+    @property
+    def versions(self):
+        """The versions of the weights that the server plays every position with"""
+        return list(self.server.versions)
+
+    def get_agent(self, index):
+        return self.agents[index]
+
+    def get_agents(self):
+        return self.agents
+
+    def query(self, position, obs, action_values):
+        """Score the legal actions of one state
+
+        Args:
+            position (int): The position of the player
+            obs (numpy.array): The observation
+            action_values (numpy.array): (num_actions, ...) the features of the legal actions
+
+        Returns:
+            (numpy.array): (num_actions,) the Q values
+        """
+        server = self.server
+        count = len(action_values)
+        if count > server.max_actions:
+            raise ValueError('{} legal actions, the inference server takes at most {}'.format(count, server.max_actions))
+        if self._slots is None:
+            self._slots = (server.obs.numpy()[self.actor_id], server.actions.numpy()[self.actor_id],
+                           server.values.numpy()[self.actor_id])
+        obs_slot, actions_slot, values_slot = self._slots
+        obs_slot[:server.obs_dims[position]] = obs.reshape(-1)
+        actions_slot[:count, :server.action_dims[position]] = action_values.reshape(count, -1)
+        server.requests.put((self.actor_id, position, count))
+        server.ready[self.actor_id].acquire()
+        return values_slot[:count].copy()
+
+
+class RemoteDMCAgent(DMCAgent):
+    """A `DMCAgent` without a network, whose values come from the `InferenceServer`"""
+    def __init__(self, client, position, exp_epsilon=0.01):
+        self.use_raw = False
+        self.client = client
+        self.position = position
+        self.exp_epsilon = exp_epsilon
+        self.action_shape = [client.server.action_dims[position]]
+
+    def _predict_values(self, obs, action_values, counts):
+        values, start = [], 0
+        for state_obs, count in zip(obs, counts):
+            values.append(self.client.query(self.position, state_obs, action_values[start:start+count]))
+            start += count
+        return np.concatenate(values)
@@ -13,11 +13,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import Optional
+
 import numpy as np
 
 import torch
 from torch import nn
 
+from rlcard.agents.inference import BACKENDS, NumpyDMCNet, export_model
+
 class DMCNet(nn.Module):
     def __init__(
         self,
@@ -42,6 +46,55 @@ class DMCNet(nn.Module):
         values = self.fc_layers(x).flatten()
         return values
 
+class DMCSharedNet(nn.Module):
+    """ A DMC network that encodes the observation once per decision
+
+    The observation goes through its own layers to a projection of the size
+    of the first head layer, the action through a linear layer, and the sum
+    of the two goes through the head. With `counts`, every observation is
+    encoded once and broadcast to its legal actions, so a decision costs one
+    pass of the observation layers plus one of the small head per action.
+    """
+    def __init__(
+        self,
+        state_shape,
+        action_shape,
+        mlp_layers=[512,512,512,512],
+        head_layers=[256,256]
+    ):
+        super().__init__()
+        layer_dims = [int(np.prod(state_shape))] + mlp_layers
+        obs_fc = []
+        for i in range(len(layer_dims)-1):
+            obs_fc.append(nn.Linear(layer_dims[i], layer_dims[i+1]))
+            obs_fc.append(nn.ReLU())
+        obs_fc.append(nn.Linear(layer_dims[-1], head_layers[0]))
+        self.obs_layers = nn.Sequential(*obs_fc)
+        self.action_layer = nn.Linear(int(np.prod(action_shape)), head_layers[0], bias=False)
+        head = []
+        for i in range(len(head_layers)-1):
+            head.append(nn.Linear(head_layers[i], head_layers[i+1]))
+            head.append(nn.ReLU())
+        head.append(nn.Linear(head_layers[-1], 1))
+        self.head = nn.Sequential(*head)
+
+    def forward(self, obs, actions, counts: Optional[torch.Tensor] = None):
+        """ Score (observation, action) pairs
+
+        Args:
+            obs: (num_states, ...) the observations, or one per pair if counts is None
+            actions: (num_pairs, ...) the action features
+            counts: (num_states,) the number of actions of every state
+
+        Returns:
+            (num_pairs,) the values
+        """
+        x = self.obs_layers(torch.flatten(obs, 1))
+        if counts is not None:
+            x = torch.repeat_interleave(x, counts, dim=0)
+        x = torch.relu(x + self.action_layer(torch.flatten(actions, 1)))
+        return self.head(x).flatten()
+
 class DMCAgent:
     def __init__(
         self,
@@ -50,12 +103,21 @@ class DMCAgent:
         mlp_layers=[512,512,512,512,512],
         exp_epsilon=0.01,
         device="0",
+        shared_trunk=False,
+        head_layers=[256,256],
     ):
         self.use_raw = False
         self.device = 'cuda:'+device if device != "cpu" else "cpu"
-        self.net = DMCNet(state_shape, action_shape, mlp_layers).to(self.device)
+        self.shared_trunk = shared_trunk
+        if shared_trunk:
+            self.net = DMCSharedNet(state_shape, action_shape, mlp_layers, head_layers).to(self.device)
+        else:
+            self.net = DMCNet(state_shape, action_shape, mlp_layers).to(self.device)
         self.exp_epsilon = exp_epsilon
         self.action_shape = action_shape
+        # The exported network that predicts, see set_inference_backend
+        self.inference_backend = None
+        self._inference = None
 
     def step(self, state):
         action_keys, values = self.predict(state)
@@ -79,6 +141,26 @@ class DMCAgent:
 
         return action, info
 
+    def step_batch(self, states):
+        actions = []
+        for action_keys, values in self.predict_batch(states):
+            if self.exp_epsilon > 0 and np.random.rand() < self.exp_epsilon:
+                actions.append(np.random.choice(action_keys))
+            else:
+                actions.append(action_keys[np.argmax(values)])
+
+        return actions
+
+    def eval_step_batch(self, states):
+        actions, infos = [], []
+        for state, (action_keys, values) in zip(states, self.predict_batch(states)):
+            actions.append(action_keys[np.argmax(values)])
+            info = {}
+            info['values'] = {state['raw_legal_actions'][i]: float(values[i]) for i in range(len(action_keys))}
+            infos.append(info)
+
+        return actions, infos
+
     def share_memory(self):
         self.net.share_memory()
 
@@ -88,9 +170,7 @@ class DMCAgent:
     def parameters(self):
         return self.net.parameters()
 
-    def predict(self, state):
-        # Prepare obs and actions
-        obs = state['obs'].astype(np.float32)
+    def _prepare_actions(self, state):
         legal_actions = state['legal_actions']
         action_keys = np.array(list(legal_actions.keys()))
         action_values = list(legal_actions.values())
@@ -100,19 +180,81 @@ class DMCAgent:
                 action_values[i] = np.zeros(self.action_shape[0])
                 action_values[i][action_keys[i]] = 1
         action_values = np.array(action_values, dtype=np.float32)
+        return action_keys, action_values
+
+    def predict(self, state):
+        # Prepare obs and actions
+        obs = state['obs'].astype(np.float32)
+        action_keys, action_values = self._prepare_actions(state)
+
+        return action_keys, self._predict_values(obs[np.newaxis, :], action_values, [len(action_keys)])
+
+    def predict_batch(self, states):
+        # Stack the legal actions of all the states so that
+        # a single forward pass scores every (obs, action) pair
+        action_keys, action_values = zip(*[self._prepare_actions(state) for state in states])
+        counts = [len(keys) for keys in action_keys]
+        obs = np.stack([state['obs'] for state in states]).astype(np.float32)
+        action_values = np.concatenate(action_values, axis=0)
+
+        values = self._predict_values(obs, action_values, counts)
+        values = np.split(values, np.cumsum(counts)[:-1])
+
+        return list(zip(action_keys, values))
+
+    def _predict_values(self, obs, action_values, counts):
+        ''' Predict the Q values of the legal actions of a batch of states
+
+        Args:
+            obs (numpy.array): (num_states, ...) the observations
+            action_values (numpy.array): (num_actions, ...) the features of the legal actions
+            counts (list): The number of legal actions of every state
+
+        Returns:
+            (numpy.array): (num_actions,) the Q values
+        '''
+        if self.inference_backend is not None:
+            return self._predict_exported(obs, action_values, counts)
+
+        # The shared trunk encodes every observation once
+        if self.shared_trunk:
+            values = self.net.forward(torch.from_numpy(obs).to(self.device),
+                                      torch.from_numpy(action_values).to(self.device),
+                                      torch.as_tensor(counts, device=self.device))
+        else:
+            obs = np.repeat(obs, counts, axis=0)
+            values = self.net.forward(torch.from_numpy(obs).to(self.device),
+                                      torch.from_numpy(action_values).to(self.device))
+
+        return values.cpu().detach().numpy()
 
-        obs = np.repeat(obs[np.newaxis, :], len(action_keys), axis=0)
+    def set_inference_backend(self, backend=None):
+        ''' Predict with an exported copy of the network, see `rlcard.agents.inference`.
+            The copy is a snapshot: it is exported again by `load_state_dict`, but
+            not when the weights are changed in place, e.g., by the learner of
+            `DMCTrainer` through shared memory, so call it again after training.
 
-        # Predict Q values
-        values = self.net.forward(torch.from_numpy(obs).to(self.device),
-                                  torch.from_numpy(action_values).to(self.device))
+        Args:
+            backend (str): 'numpy', 'torchscript', 'int8' or None to predict with torch
+        '''
+        if backend is not None and backend not in BACKENDS:
+            raise ValueError('Unknown backend {}, expected one of {}'.format(backend, BACKENDS))
+        self.inference_backend = backend
+        self._inference = None
 
-        return action_keys, values.cpu().detach().numpy()
+    def _predict_exported(self, obs, action_values, counts):
+        if self._inference is None:
+            self._inference = export_model(self.net, self.inference_backend)
+        if self.shared_trunk or isinstance(self._inference, NumpyDMCNet):
+            # The observation of a state is encoded once
+            return self._inference(obs, action_values, np.asarray(counts, dtype=np.int64))
+        return self._inference(np.repeat(obs, counts, axis=0), action_values)
 
     def forward(self, obs, actions):
         return self.net.forward(obs, actions)
 
     def load_state_dict(self, state_dict):
+        self._inference = None
         return self.net.load_state_dict(state_dict)
 
     def state_dict(self):
@@ -128,7 +270,8 @@ class DMCModel:
         action_shape,
         mlp_layers=[512,512,512,512,512],
         exp_epsilon=0.01,
-        device=0
+        device=0,
+        shared_trunk=False,
     ):
         self.agents = []
         for player_id in range(len(state_shape)):
@@ -138,6 +281,7 @@ class DMCModel:
                 mlp_layers,
                 exp_epsilon,
                 device,
+                shared_trunk,
             )
             self.agents.append(agent)
 
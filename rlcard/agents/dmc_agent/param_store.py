@@ -0,0 +1,111 @@
+import time
+import timeit
+
+import torch
+
+
+class ParameterStore:
+    """Versioned copies of the learner weights in shared memory
+
+    The learner publishes the weights of a position to one shared-memory
+    copy per actor device every `publish_every` optimizer steps or
+    `publish_interval` seconds, whichever comes first, instead of loading
+    them into every actor model after every step. The actors act with
+    their own copies and pull the new versions between episodes, so the
+    learner never waits for them.
+
+    The version of a position is a sequence counter, odd while the learner
+    writes the shared copy. An actor copies a version only when the counter
+    is even and the same after the copy, so it never acts with a mix of
+    two versions.
+
+    Args:
+        models (dict): Device -> DMCModel, the shared copies, moved to shared memory here
+        versions (multiprocessing.Array): The sequence counter of every position, all 0
+        publish_every (int): Optimizer steps between publications
+        publish_interval (float): Seconds between publications
+    """
+    def __init__(self, models, versions, publish_every=10, publish_interval=1.0):
+        self.models = models
+        for model in models.values():
+            model.share_memory()
+            model.eval()
+        self.versions = versions
+        self.publish_every = publish_every
+        self.publish_interval = publish_interval
+        num_players = len(versions)
+        self._steps = [0 for _ in range(num_players)]
+        self._published_at = [timeit.default_timer() for _ in range(num_players)]
+
+    def version(self, position):
+        """The number of publications of a position"""
+        return self.versions[position] // 2
+
+    def maybe_publish(self, position, agent):
+        """Count an optimizer step of the learner and publish if it is time
+
+        Args:
+            position (int): The position
+            agent (DMCAgent): The learner agent of the position
+
+        Returns:
+            (bool): Whether the weights were published
+        """
+        self._steps[position] += 1
+        if (self._steps[position] < self.publish_every
+                and timeit.default_timer() - self._published_at[position] < self.publish_interval):
+            return False
+        self.publish(position, agent)
+        return True
+
+    def publish(self, position, agent):
+        """Copy the weights of a learner agent to the shared copies
+
+        Args:
+            position (int): The position
+            agent (DMCAgent): The learner agent of the position
+        """
+        self.versions[position] += 1
+        state_dict = agent.state_dict()
+        with torch.no_grad():
+            for model in self.models.values():
+                for name, tensor in model.get_agent(position).state_dict().items():
+                    tensor.copy_(state_dict[name])
+        self.versions[position] += 1
+        self._steps[position] = 0
+        self._published_at[position] = timeit.default_timer()
+
+    def pull(self, model, device, versions):
+        """Copy the versions newer than those of an actor into its model
+
+        Args:
+            model (DMCModel): The model the actor acts with, not shared
+            device: The device of the actor
+            versions (list): The version of every position of the model, updated
+
+        Returns:
+            (bool): Whether any position was updated
+        """
+        updated = False
+        for position in range(len(versions)):
+            while True:
+                sequence = self.versions[position]
+                if sequence // 2 == versions[position]:
+                    break
+                if sequence % 2 == 1:
+                    # The learner is writing, the copy would be torn
+                    time.sleep(0.001)
+                    continue
+                shared = self.models[device].get_agent(position).state_dict()
+                agent = model.get_agent(position)
+                with torch.no_grad():
+                    for name, tensor in agent.state_dict().items():
+                        tensor.copy_(shared[name])
+                if self.versions[position] == sequence:
+                    versions[position] = sequence // 2
+                    updated = True
+                    if agent.inference_backend is not None:
+                        # Export the new weights
+                        agent.set_inference_backend(agent.inference_backend)
+                    break
+        return updated
@@ -11,6 +11,12 @@ class DMCAgentPettingZoo(DMCAgent):
     def eval_step(self, state):
         return super().eval_step(wrap_state(state))
 
+    def step_batch(self, states):
+        return super().step_batch([wrap_state(state) for state in states])
+
+    def eval_step_batch(self, states):
+        return super().eval_step_batch([wrap_state(state) for state in states])
+
     def feed(self, ts):
         state, action, reward, next_state, done = tuple(ts)
         state = wrap_state(state)
@@ -25,7 +31,8 @@ class DMCModelPettingZoo:
         env,
         mlp_layers=[512,512,512,512,512],
         exp_epsilon=0.01,
-        device="0"
+        device="0",
+        shared_trunk=False,
     ):
         self.agents = OrderedDict()
         for agent_name in env.agents:
@@ -35,6 +42,7 @@ class DMCModelPettingZoo:
                 mlp_layers,
                 exp_epsilon,
                 device,
+                shared_trunk,
             )
             self.agents[agent_name] = agent
 
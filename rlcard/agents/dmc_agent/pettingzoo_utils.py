@@ -1,9 +1,10 @@
+import copy
 import traceback
 
 import numpy as np
 import torch
 
-from .utils import log
+from .utils import log, UnrollWriter
 from rlcard.utils import run_game_pettingzoo
 
 def create_buffers_pettingzoo(
@@ -23,6 +24,7 @@ def create_buffers_pettingzoo(
                 target=dict(size=(T,), dtype=torch.float32),
                 state=dict(size=(T,)+tuple(state_shape), dtype=torch.int8),
                 action=dict(size=(T,)+(env.action_space(agent_name).n,), dtype=torch.int8),
+                version=dict(size=(T,), dtype=torch.int64),
             )
             _buffers = {key: [] for key in specs}
             for _ in range(num_buffers):
@@ -48,56 +50,36 @@ def act_pettingzoo(
     full_queue,
     model,
     buffers,
-    env
+    env,
+    param_store=None
 ):
     log.info('Device %s Actor %i started.', str(device), i)
     try:
-        done_buf = [[] for _ in range(env.num_agents)]
-        episode_return_buf = [[] for _ in range(env.num_agents)]
-        target_buf = [[] for _ in range(env.num_agents)]
-        state_buf = [[] for _ in range(env.num_agents)]
-        action_buf = [[] for _ in range(env.num_agents)]
-        size = [0 for _ in range(env.num_agents)]
+        # Act with an own copy of the weights, pulled between episodes
+        versions = [0 for _ in range(env.num_agents)]
+        if param_store is not None:
+            model = copy.deepcopy(model)
+
+        writers = [UnrollWriter(T, free_queue[agent_id], full_queue[agent_id], buffers[agent_id])
+                   for agent_id in range(env.num_agents)]
 
         while True:
+            if param_store is not None:
+                param_store.pull(model, device, versions)
             trajectories = run_game_pettingzoo(env, model.agents, is_training=True)
             for agent_id, agent_name in enumerate(env.possible_agents):
-                traj_size = len(trajectories[agent_name]) // 2
+                trajectory = trajectories[agent_name]
+                traj_size = len(trajectory) // 2
                 if traj_size > 0:
-                    size[agent_id] += traj_size
-                    target_return = trajectories[agent_name][-2][1]
-                    target_buf[agent_id].extend([target_return for _ in range(traj_size)])
-                    for i in range(0, len(trajectories[agent_name]), 2):
-                        state = trajectories[agent_name][i][0]['observation']
-                        action = _get_action_feature(
-                            trajectories[agent_name][i+1], model.agents[agent_name].action_shape
-                        )
-                        episode_return = trajectories[agent_name][i][1]
-                        done = trajectories[agent_name][i][2]
-                        state_buf[agent_id].append(torch.from_numpy(state))
-                        action_buf[agent_id].append(torch.from_numpy(action))
-                        episode_return_buf[agent_id].append(episode_return)
-                        done_buf[agent_id].append(done)
-
-                while size[agent_id] > T:
-                    index = free_queue[agent_id].get()
-                    if index is None:
-                        print("index is None")
-                        break
-                    for t in range(T):
-                        temp_done = done_buf[agent_id][t]
-                        buffers[agent_id]['done'][index][t, ...] = temp_done
-                        buffers[agent_id]['episode_return'][index][t, ...] = episode_return_buf[agent_id][t]
-                        buffers[agent_id]['target'][index][t, ...] = target_buf[agent_id][t]
-                        buffers[agent_id]['state'][index][t, ...] = state_buf[agent_id][t]
-                        buffers[agent_id]['action'][index][t, ...] = action_buf[agent_id][t]
-                    full_queue[agent_id].put(index)
-                    done_buf[agent_id] = done_buf[agent_id][T:]
-                    episode_return_buf[agent_id] = episode_return_buf[agent_id][T:]
-                    target_buf[agent_id] = target_buf[agent_id][T:]
-                    state_buf[agent_id] = state_buf[agent_id][T:]
-                    action_buf[agent_id] = action_buf[agent_id][T:]
-                    size[agent_id] -= T
+                    target_return = trajectory[-2][1]
+                    states = [trajectory[i][0]['observation'] for i in range(0, 2*traj_size, 2)]
+                    actions = [_get_action_feature(trajectory[i+1], model.agents[agent_name].action_shape)
+                               for i in range(0, 2*traj_size, 2)]
+                    episode_returns = np.array([trajectory[i][1] for i in range(0, 2*traj_size, 2)], dtype=np.float32)
+                    dones = np.array([trajectory[i][2] for i in range(0, 2*traj_size, 2)], dtype=np.bool_)
+                    if not writers[agent_id].write(states, actions, target_return, episode_returns, dones,
+                                                   versions[agent_id]):
+                        return
 
     except KeyboardInterrupt:
         pass
@@ -25,6 +25,8 @@ from torch import multiprocessing as mp
 from torch import nn
 
 from .file_writer import FileWriter
+from .inference_server import InferenceServer
+from .param_store import ParameterStore
 from .model import DMCModel
 from .pettingzoo_model import DMCModelPettingZoo
 from .utils import (
@@ -38,6 +40,17 @@ from .pettingzoo_utils import (
     create_buffers_pettingzoo,
     act_pettingzoo,
 )
+from rlcard.utils.rollout import (
+    RolloutServer,
+    get_policy_weights,
+    start_local_workers,
+)
+
+def publish_weights(rollout_server, learner_model, num_players):
+    return rollout_server.publish({
+        position: get_policy_weights(learner_model.get_agent(position))
+        for position in range(num_players)
+    })
 
 def compute_loss(logits, targets):
     loss = ((logits - targets)**2).mean()
@@ -45,7 +58,7 @@ def compute_loss(logits, targets):
 
 def learn(
     position,
-    actor_models,
+    param_store,
     agent,
     batch,
     optimizer,
@@ -68,6 +81,8 @@ def learn(
         stats = {
             'mean_episode_return_'+str(position): torch.mean(torch.stack([_r for _r in mean_episode_return_buf[position]])).item(),
             'loss_'+str(position): loss.item(),
+            # How many publications behind the learner the weights that played the batch are
+            'version_lag_'+str(position): param_store.version(position) - batch['version'].double().mean().item(),
         }
 
         optimizer.zero_grad()
@@ -75,8 +90,7 @@ def learn(
         nn.utils.clip_grad_norm_(agent.parameters(), max_grad_norm)
         optimizer.step()
 
-        for actor_model in actor_models.values():
-            actor_model.get_agent(position).load_state_dict(agent.state_dict())
+        param_store.maybe_publish(position, agent)
         return stats
 
 
@@ -104,6 +118,21 @@ class DMCTrainer:
         alpha (float): RMSProp smoothing constant
         momentum (float): RMSProp momentum
         epsilon (float): RMSProp epsilon
+        rollout_address (tuple or str): If set, also accept rollout workers from other
+            processes or machines on this (host, port) or Unix socket path, see rlcard.utils.rollout
+        rollout_authkey (bytes): The key that the rollout workers must present. Required for
+            a TCP address other than a loopback one, None generates a random key otherwise
+        num_rollout_workers (int): The number of rollout workers to start on this machine
+        shared_trunk (boolean): Use `DMCSharedNet`, which encodes the observation once
+            per decision instead of once per legal action
+        publish_every (int): Optimizer steps of a position between two publications of
+            its weights to the actors
+        publish_interval (float): Seconds between two publications, whichever of the two comes first
+        inference_server (boolean): Score the legal actions of all the actors in one
+            `InferenceServer` process instead of in every actor
+        inference_batch_size (int): The number of (observation, action) pairs after which
+            the server scores a batch
+        inference_max_latency (float): The seconds the server waits for more requests
     """
     def __init__(
         self,
@@ -127,7 +156,16 @@ class DMCTrainer:
         learning_rate=0.0001,
         alpha=0.99,
         momentum=0,
-        epsilon=0.00001
+        epsilon=0.00001,
+        rollout_address=None,
+        rollout_authkey=None,
+        num_rollout_workers=0,
+        shared_trunk=False,
+        publish_every=10,
+        publish_interval=1.0,
+        inference_server=False,
+        inference_batch_size=4096,
+        inference_max_latency=0.002,
     ):
         self.env = env
 
@@ -158,6 +196,17 @@ class DMCTrainer:
         self.alpha = alpha
         self.momentum = momentum
         self.epsilon = epsilon
+        self.rollout_address = rollout_address
+        self.rollout_authkey = rollout_authkey
+        self.num_rollout_workers = num_rollout_workers
+        self.shared_trunk = shared_trunk
+        self.publish_every = publish_every
+        self.publish_interval = publish_interval
+        self.inference_server = inference_server
+        self.inference_batch_size = inference_batch_size
+        self.inference_max_latency = inference_max_latency
+        if inference_server and is_pettingzoo_env:
+            raise ValueError('The inference server does not support PettingZoo environments')
 
         self.is_pettingzoo_env = is_pettingzoo_env
         if not self.is_pettingzoo_env:
@@ -172,6 +221,7 @@ class DMCTrainer:
                     self.action_shape,
                     exp_epsilon=self.exp_epsilon,
                     device=str(device),
+                    shared_trunk=self.shared_trunk,
                 )
         else:
             self.num_players = self.env.num_agents
@@ -180,7 +230,8 @@ class DMCTrainer:
                 return DMCModelPettingZoo(
                     self.env,
                     exp_epsilon=self.exp_epsilon,
-                    device=device
+                    device=device,
+                    shared_trunk=self.shared_trunk,
                 )
         self.model_func = model_func
 
@@ -193,13 +244,16 @@ class DMCTrainer:
             self.device_iterator = range(num_actor_devices)
 
     def start(self):
-        # Initialize actor models
-        models = {}
-        for device in self.device_iterator:
-            model = self.model_func(device)
-            model.share_memory()
-            model.eval()
-            models[device] = model
+        ctx = mp.get_context('spawn')
+
+        # The shared copies of the weights that the actors pull
+        param_store = ParameterStore(
+            {device: self.model_func(device) for device in self.device_iterator},
+            ctx.RawArray('q', self.num_players),
+            self.publish_every,
+            self.publish_interval,
+        )
+        models = param_store.models
 
         # Initialize buffers
         if not self.is_pettingzoo_env:
@@ -220,7 +274,6 @@ class DMCTrainer:
 
         # Initialize queues
         actor_processes = []
-        ctx = mp.get_context('spawn')
         free_queue = {}
         full_queue = {}
         for device in self.device_iterator:
@@ -247,6 +300,7 @@ class DMCTrainer:
         for p in range(self.num_players):
             stat_keys.append('mean_episode_return_'+str(p))
             stat_keys.append('loss_'+str(p))
+            stat_keys.append('version_lag_'+str(p))
         frames, stats = 0, {k: 0 for k in stat_keys}
 
         # Load models if any
@@ -258,23 +312,87 @@ class DMCTrainer:
             for p in range(self.num_players):
                 learner_model.get_agent(p).load_state_dict(checkpoint_states["model_state_dict"][p])
                 optimizers[p].load_state_dict(checkpoint_states["optimizer_state_dict"][p])
-                for device in self.device_iterator:
-                    models[device].get_agent(p).load_state_dict(learner_model.get_agent(p).state_dict())
-            stats = checkpoint_states["stats"]
+            stats.update(checkpoint_states["stats"])
             frames = checkpoint_states["frames"]
             log.info(f"Resuming preempted job, current stats:\n{stats}")
 
 
+        # The actors start from the weights of the learner
+        for p in range(self.num_players):
+            param_store.publish(p, learner_model.get_agent(p))
+
+        # One process scores the legal actions of all the actors
+        inference_server = None
+        if self.inference_server:
+            inference_server = InferenceServer(
+                ctx,
+                param_store,
+                self.device_iterator[0],
+                self.num_actors * len(self.device_iterator),
+                self.env.state_shape,
+                self.action_shape,
+                self.env.num_actions,
+                self.inference_batch_size,
+                self.inference_max_latency,
+            )
+            inference_server.start(ctx)
+
         # Starting actor processes
-        for device in self.device_iterator:
+        for device_index, device in enumerate(self.device_iterator):
             num_actors = self.num_actors
             for i in range(self.num_actors):
+                if inference_server is not None:
+                    model, store = inference_server.client(device_index * self.num_actors + i, self.exp_epsilon), None
+                else:
+                    model, store = models[device], param_store
                 actor = ctx.Process(
                     target=act_pettingzoo if self.is_pettingzoo_env else act,
-                    args=(i, device, self.T, free_queue[device], full_queue[device], models[device], buffers[device], self.env))
+                    args=(i, device, self.T, free_queue[device], full_queue[device], model, buffers[device], self.env,
+                          store))
                 actor.start()
                 actor_processes.append(actor)
 
+        # Rollout workers connected over sockets
+        rollout_server = None
+        if self.rollout_address is not None and not self.is_pettingzoo_env:
+            rollout_server = RolloutServer(
+                self.env,
+                agents=self.model_func('cpu').get_agents(),
+                address=self.rollout_address,
+                authkey=self.rollout_authkey,
+                kind='dmc',
+                player_ids=range(self.num_players),
+                unroll_length=self.T,
+            )
+            rollout_server.start()
+            # Rollout server version -> the versions of the positions in the parameter store
+            rollout_versions = {}
+            rollout_versions[publish_weights(rollout_server, learner_model, self.num_players)] = \
+                [param_store.version(p) for p in range(self.num_players)]
+            start_local_workers(rollout_server.address, self.num_rollout_workers, rollout_server.authkey)
+            log.info('Accepting rollout workers at %s', str(rollout_server.address))
+
+            def feed_rollouts(device):
+                """Thread target that copies the remote unrolls into the buffers."""
+                while frames < self.total_frames:
+                    batch = rollout_server.get(timeout=1)
+                    if batch is None:
+                        continue
+                    versions = rollout_versions.get(batch[1], [0] * self.num_players)
+                    for position, unroll in batch[2]:
+                        index = free_queue[device][position].get()
+                        for key in unroll:
+                            buffers[device][position][key][index][...] = torch.from_numpy(unroll[key])
+                        buffers[device][position]['version'][index][...] = versions[position]
+                        full_queue[device][position].put(index)
+
+            rollout_thread = threading.Thread(
+                target=feed_rollouts,
+                name='feed-rollouts',
+                args=(self.device_iterator[0],),
+                daemon=True)
+            rollout_thread.start()
+
         def batch_and_learn(i, device, position, local_lock, position_lock, lock=threading.Lock()):
             """Thread target for the learning process."""
             nonlocal frames, stats
@@ -288,7 +406,7 @@ class DMCTrainer:
                 )
                 _stats = learn(
                     position,
-                    models,
+                    param_store,
                     learner_model.get_agent(position),
                     batch,
                     optimizers[position],
@@ -356,18 +474,32 @@ class DMCTrainer:
             while frames < self.total_frames:
                 start_frames = frames
                 start_time = timer()
+                if inference_server is not None:
+                    start_served = inference_server.stats()
                 time.sleep(5)
 
                 if timer() - last_checkpoint_time > self.save_interval * 60:
                     checkpoint(frames)
                     last_checkpoint_time = timer()
 
+                if rollout_server is not None:
+                    rollout_versions[publish_weights(rollout_server, learner_model, self.num_players)] = \
+                        [param_store.version(p) for p in range(self.num_players)]
+                    log.info('Rollout workers: %s', rollout_server.stats())
+
                 end_time = timer()
                 fps = (frames - start_frames) / (end_time - start_time)
+                inference = ''
+                if inference_server is not None:
+                    served = {k: v - start_served[k] for k, v in inference_server.stats().items()}
+                    batches = max(served['batches'], 1)
+                    inference = ' with the inference server (%.1f requests, %.0f pairs per batch)' % (
+                        served['requests'] / batches, served['pairs'] / batches)
                 log.info(
-                    'After %i frames: @ %.1f fps Stats:\n%s',
+                    'After %i frames: @ %.1f fps%s Stats:\n%s',
                     frames,
                     fps,
+                    inference,
                     pprint.pformat(stats),
                 )
         except KeyboardInterrupt:
@@ -378,4 +510,8 @@ class DMCTrainer:
             log.info('Learning finished after %d frames.', frames)
 
         checkpoint(frames)
+        if inference_server is not None:
+            inference_server.close()
+        if rollout_server is not None:
+            rollout_server.close()
         self.plogger.close()
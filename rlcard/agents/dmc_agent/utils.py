@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import logging
 import traceback
 
@@ -63,6 +64,7 @@ def create_buffers(
                 target=dict(size=(T,), dtype=torch.float32),
                 state=dict(size=(T,)+tuple(state_shape[player_id]), dtype=torch.int8),
                 action=dict(size=(T,)+tuple(action_shape[player_id]), dtype=torch.int8),
+                version=dict(size=(T,), dtype=torch.int64),
             )
             _buffers = {key: [] for key in specs}
             for _ in range(num_buffers):
@@ -94,6 +96,76 @@ def create_optimizers(
         optimizers.append(optimizer)
     return optimizers
 
+class UnrollWriter(object):
+    """Write the frames of one position into the shared unroll buffers
+
+    The frames go straight into the slot taken from the free queue, at a
+    cursor. A full slot goes to the full queue and the rest of the episode
+    carries over to the next slot. CPU slots are written through NumPy
+    views of the shared tensors.
+    """
+    def __init__(self, T, free_queue, full_queue, buffers):
+        self.T = T
+        self.free_queue = free_queue
+        self.full_queue = full_queue
+        self.buffers = buffers
+        self.index = None
+        self.cursor = 0
+        self._slot = None
+
+    def write(self, states, actions, target, episode_returns, dones, version=0):
+        """Write the frames of an episode
+
+        Args:
+            states (list): The observations, numpy arrays
+            actions (list): The action features, numpy arrays
+            target (float): The target of every frame
+            episode_returns (numpy.array): The episode return of every frame
+            dones (numpy.array): Whether every frame ends the episode
+            version (int): The version of the weights that played the episode
+
+        Returns:
+            (bool): False if the free queue handed out None to stop the actor
+        """
+        start = 0
+        while start < len(states):
+            if self.index is None:
+                self.index = self.free_queue.get()
+                if self.index is None:
+                    return False
+                self.cursor = 0
+                self._slot = {key: self._view(self.buffers[key][self.index]) for key in self.buffers}
+            end = min(len(states), start + self.T - self.cursor)
+            frames = slice(self.cursor, self.cursor + end - start)
+            self._set(self._slot['done'], frames, dones[start:end])
+            self._set(self._slot['episode_return'], frames, episode_returns[start:end])
+            self._set(self._slot['target'], frames, target)
+            self._set(self._slot['version'], frames, version)
+            if isinstance(self._slot['state'], np.ndarray):
+                for t in range(start, end):
+                    self._slot['state'][self.cursor + t - start] = states[t]
+                    self._slot['action'][self.cursor + t - start] = actions[t]
+            else:
+                self._set(self._slot['state'], frames, np.stack(states[start:end]))
+                self._set(self._slot['action'], frames, np.stack(actions[start:end]))
+            self.cursor += end - start
+            start = end
+            if self.cursor == self.T:
+                self.full_queue.put(self.index)
+                self.index, self._slot = None, None
+        return True
+
+    @staticmethod
+    def _view(buffer):
+        return buffer.numpy() if buffer.device.type == 'cpu' else buffer
+
+    @staticmethod
+    def _set(buffer, frames, values):
+        if isinstance(buffer, np.ndarray) or np.isscalar(values):
+            buffer[frames] = values
+        else:
+            buffer[frames] = torch.from_numpy(np.asarray(values)).to(buffer.device)
+
 def act(
     i,
     device,
@@ -102,57 +174,42 @@ def act(
     full_queue,
     model,
     buffers,
-    env
+    env,
+    param_store=None
 ):
     try:
         log.info('Device %s Actor %i started.', str(device), i)
 
+        # Act with an own copy of the weights, pulled between episodes
+        versions = [0 for _ in range(env.num_players)]
+        if param_store is not None:
+            model = copy.deepcopy(model)
+
         # Configure environment
         env.seed(i)
         env.set_agents(model.get_agents())
 
-        done_buf = [[] for _ in range(env.num_players)]
-        episode_return_buf = [[] for _ in range(env.num_players)]
-        target_buf = [[] for _ in range(env.num_players)]
-        state_buf = [[] for _ in range(env.num_players)]
-        action_buf = [[] for _ in range(env.num_players)]
-        size = [0 for _ in range(env.num_players)]
+        writers = [UnrollWriter(T, free_queue[p], full_queue[p], buffers[p]) for p in range(env.num_players)]
 
         while True:
+            if param_store is not None:
+                param_store.pull(model, device, versions)
+            elif hasattr(model, 'versions'):
+                # An InferenceClient plays with the weights of the server
+                versions = model.versions
             trajectories, payoffs = env.run(is_training=True)
             for p in range(env.num_players):
-                size[p] += len(trajectories[p][:-1]) // 2
-                diff = size[p] - len(target_buf[p])
-                if diff > 0:
-                    done_buf[p].extend([False for _ in range(diff-1)])
-                    done_buf[p].append(True)
-                    episode_return_buf[p].extend([0.0 for _ in range(diff-1)])
-                    episode_return_buf[p].append(float(payoffs[p]))
-                    target_buf[p].extend([float(payoffs[p]) for _ in range(diff)])
-                    # State and action
-                    for i in range(0, len(trajectories[p])-2, 2):
-                        state = trajectories[p][i]['obs']
-                        action = env.get_action_feature(trajectories[p][i+1])
-                        state_buf[p].append(torch.from_numpy(state))
-                        action_buf[p].append(torch.from_numpy(action))
-                
-                while size[p] > T:
-                    index = free_queue[p].get()
-                    if index is None:
-                        break
-                    for t in range(T):
-                        buffers[p]['done'][index][t, ...] = done_buf[p][t]
-                        buffers[p]['episode_return'][index][t, ...] = episode_return_buf[p][t]
-                        buffers[p]['target'][index][t, ...] = target_buf[p][t]
-                        buffers[p]['state'][index][t, ...] = state_buf[p][t]
-                        buffers[p]['action'][index][t, ...] = action_buf[p][t]
-                    full_queue[p].put(index)
-                    done_buf[p] = done_buf[p][T:]
-                    episode_return_buf[p] = episode_return_buf[p][T:]
-                    target_buf[p] = target_buf[p][T:]
-                    state_buf[p] = state_buf[p][T:]
-                    action_buf[p] = action_buf[p][T:]
-                    size[p] -= T
+                steps = (len(trajectories[p]) - 1) // 2
+                if steps == 0:
+                    continue
+                states = [trajectories[p][t]['obs'] for t in range(0, 2*steps, 2)]
+                actions = [env.get_action_feature(trajectories[p][t+1]) for t in range(0, 2*steps, 2)]
+                dones = np.zeros(steps, dtype=np.bool_)
+                dones[-1] = True
+                episode_returns = np.zeros(steps, dtype=np.float32)
+                episode_returns[-1] = payoffs[p]
+                if not writers[p].write(states, actions, float(payoffs[p]), episode_returns, dones, versions[p]):
+                    return
 
     except KeyboardInterrupt:
         pass
@@ -33,7 +33,9 @@ import torch.nn as nn
 from collections import namedtuple
 from copy import deepcopy
 
-from rlcard.utils.utils import remove_illegal
+from rlcard.utils.utils import remove_illegal, legal_actions_mask
+from rlcard.utils.checkpoint import write_checkpoint
+from rlcard.agents.inference import BACKENDS, export_model
 
 Transition = namedtuple('Transition', ['state', 'action', 'reward', 'next_state', 'done', 'legal_actions'])
 
@@ -59,7 +61,13 @@ class DQNAgent(object):
                  learning_rate=0.00005,
                  device=None,
                  save_path=None,
-                 save_every=float('inf'),):
+                 save_every=float('inf'),
+                 pack_obs=False,
+                 prioritized_replay=False,
+                 priority_alpha=0.6,
+                 priority_beta_start=0.4,
+                 priority_beta_end=1.0,
+                 priority_beta_steps=20000):
 
         '''
         Q-Learning algorithm for off-policy TD control using Function Approximation.
@@ -86,6 +94,15 @@ class DQNAgent(object):
             device (torch.device): whether to use the cpu or gpu
             save_path (str): The path to save the model checkpoints
             save_every (int): Save the model every X training steps
+            pack_obs (boolean): Store the observations in the replay memory with 8 per byte,
+              for binary observations
+            prioritized_replay (boolean): Sample the transitions in proportion to their
+              TD errors instead of uniformly
+            priority_alpha (float): The exponent of the TD errors in the priorities
+            priority_beta_start (float): The exponent of the importance-sampling weights
+              that correct the prioritized sampling. It is annealed over the training steps
+            priority_beta_end (float): The final exponent of the importance-sampling weights
+            priority_beta_steps (int): Number of training steps to anneal the exponent over
         '''
         self.use_raw = False
         self.replay_memory_init_size = replay_memory_init_size
@@ -118,12 +135,21 @@ class DQNAgent(object):
             mlp_layers=mlp_layers, device=self.device)
 
         # Create replay memory
-        self.memory = Memory(replay_memory_size, batch_size)
+        self.prioritized_replay = prioritized_replay
+        self.priority_betas = np.linspace(priority_beta_start, priority_beta_end, max(priority_beta_steps, 1))
+        if prioritized_replay:
+            self.memory = PrioritizedMemory(replay_memory_size, batch_size, num_actions, pack_obs, priority_alpha)
+        else:
+            self.memory = Memory(replay_memory_size, batch_size, num_actions, pack_obs)
         
         # Checkpoint saving parameters
         self.save_path = save_path
         self.save_every = save_every
 
+        # The exported Q-network that predicts, see set_inference_backend
+        self.inference_backend = None
+        self._inference = None
+
     def feed(self, ts):
         ''' Store data in to replay buffer and train the agent. There are two stages.
             In stage 1, populate the memory without training
@@ -177,6 +203,52 @@ class DQNAgent(object):
 
         return best_action, info
 
+    def step_batch(self, states):
+        ''' Predict the actions of a batch of states for generating training data
+            with a single forward pass
+
+        Args:
+            states (list): A list of state dicts
+
+        Returns:
+            actions (list): A list of action ids, one per state
+        '''
+        q_values = self.predict_batch(states)
+        epsilon = self.epsilons[min(self.total_t, self.epsilon_decay_steps-1)]
+        actions = []
+        for state, _q_values in zip(states, q_values):
+            legal_actions = list(state['legal_actions'].keys())
+            probs = np.ones(len(legal_actions), dtype=float) * epsilon / len(legal_actions)
+            best_action_idx = legal_actions.index(np.argmax(_q_values))
+            probs[best_action_idx] += (1.0 - epsilon)
+            action_idx = np.random.choice(np.arange(len(probs)), p=probs)
+            actions.append(legal_actions[action_idx])
+
+        return actions
+
+    def eval_step_batch(self, states):
+        ''' Predict the actions of a batch of states for evaluation purpose
+            with a single forward pass
+
+        Args:
+            states (list): A list of state dicts
+
+        Returns:
+            actions (list): A list of action ids, one per state
+            infos (list): A list of dictionaries containing information
+        '''
+        q_values = self.predict_batch(states)
+        best_actions = np.argmax(q_values, axis=1)
+
+        infos = []
+        for state, _q_values in zip(states, q_values):
+            legal_actions = list(state['legal_actions'].keys())
+            info = {}
+            info['values'] = {state['raw_legal_actions'][i]: float(_q_values[legal_actions[i]]) for i in range(len(legal_actions))}
+            infos.append(info)
+
+        return [int(a) for a in best_actions], infos
+
     def predict(self, state):
         ''' Predict the masked Q-values
 
@@ -187,12 +259,42 @@ class DQNAgent(object):
             q_values (numpy.array): a 1-d array where each entry represents a Q value
         '''
         
-        q_values = self.q_estimator.predict_nograd(np.expand_dims(state['obs'], 0))[0]
-        masked_q_values = -np.inf * np.ones(self.num_actions, dtype=float)
-        legal_actions = list(state['legal_actions'].keys())
-        masked_q_values[legal_actions] = q_values[legal_actions]
+        q_values = self._predict_q_values(np.expand_dims(state['obs'], 0))[0]
+        return np.where(legal_actions_mask([state], self.num_actions)[0], q_values, -np.inf)
 
-        return masked_q_values
+    def predict_batch(self, states):
+        ''' Predict the masked Q-values of a batch of states
+
+        Args:
+            states (list): A list of state dicts
+
+        Returns:
+            q_values (numpy.array): a 2-d array of shape (batch, num_actions)
+              where illegal actions are masked with -inf
+        '''
+        obs = np.stack([state['obs'] for state in states])
+        q_values = self._predict_q_values(obs)
+        return np.where(legal_actions_mask(states, self.num_actions), q_values, -np.inf)
+
+    def set_inference_backend(self, backend=None):
+        ''' Predict with an exported copy of the Q-network, see `rlcard.agents.inference`.
+            The copy is exported again after every training step. Call it again
+            after loading weights into the network from outside the agent.
+
+        Args:
+            backend (str): 'numpy', 'torchscript', 'int8' or None to predict with torch
+        '''
+        if backend is not None and backend not in BACKENDS:
+            raise ValueError('Unknown backend {}, expected one of {}'.format(backend, BACKENDS))
+        self.inference_backend = backend
+        self._inference = None
+
+    def _predict_q_values(self, obs):
+        if self.inference_backend is None:
+            return self.q_estimator.predict_nograd(obs)
+        if self._inference is None:
+            self._inference = export_model(self.q_estimator.qnet, self.inference_backend)
+        return self._inference(obs)
 
     def train(self):
         ''' Train the network
@@ -200,27 +302,23 @@ class DQNAgent(object):
         Returns:
             loss (float): The loss of the current batch.
         '''
-        state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch = self.memory.sample()
-
-        # Calculate best next actions using Q-network (Double DQN)
-        q_values_next = self.q_estimator.predict_nograd(next_state_batch)
-        legal_actions = []
-        for b in range(self.batch_size):
-            legal_actions.extend([i + b * self.num_actions for i in legal_actions_batch[b]])
-        masked_q_values = -np.inf * np.ones(self.num_actions * self.batch_size, dtype=float)
-        masked_q_values[legal_actions] = q_values_next.flatten()[legal_actions]
-        masked_q_values = masked_q_values.reshape((self.batch_size, self.num_actions))
-        best_actions = np.argmax(masked_q_values, axis=1)
+        if self.prioritized_replay:
+            beta = self.priority_betas[min(self.train_t, len(self.priority_betas)-1)]
+            state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch, \
+                weights, indices = self.memory.sample(beta)
+        else:
+            state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch = self.memory.sample()
+            weights = None
 
-        # Evaluate best next actions using Target-network (Double DQN)
-        q_values_next_target = self.target_estimator.predict_nograd(next_state_batch)
         target_batch = reward_batch + np.invert(done_batch).astype(np.float32) * \
-            self.discount_factor * q_values_next_target[np.arange(self.batch_size), best_actions]
+            self.discount_factor * self.next_values(next_state_batch, legal_actions_batch)
 
         # Perform gradient descent update
-        state_batch = np.array(state_batch)
-
-        loss = self.q_estimator.update(state_batch, action_batch, target_batch)
+        loss, td_errors = self.q_estimator.update(state_batch, action_batch, target_batch, weights,
+                                                  return_td_errors=True)
+        if self.prioritized_replay:
+            self.memory.update_priorities(indices, td_errors)
+        self._inference = None
         print('\rINFO - Step {}, rl-loss: {}'.format(self.total_t, loss), end='')
 
         # Update the target estimator
@@ -233,10 +331,33 @@ class DQNAgent(object):
         if self.save_path and self.train_t % self.save_every == 0:
             # To preserve every checkpoint separately, 
             # add another argument to the function call parameterized by self.train_t
-            self.save_checkpoint(self.save_path)
+            self.save_checkpoint(self.save_path, background=True)
             print("\nINFO - Saved model checkpoint.")
 
 
+    def next_values(self, next_state_batch, legal_actions_batch):
+        ''' Evaluate the next states for the Double DQN targets: the best legal
+            actions of the Q-network valued by the target network. Both networks
+            run on one copy of the batch on the device and the masking is done there.
+
+        Args:
+            next_state_batch (numpy.array): (batch, state_shape) next states
+            legal_actions_batch (numpy.array): (batch, num_actions) boolean masks
+              of the legal actions of the next states
+
+        Returns:
+            values (numpy.array): (batch,) the value of every next state
+        '''
+        with torch.no_grad():
+            s = torch.from_numpy(next_state_batch).float().to(self.device)
+            legal = torch.from_numpy(legal_actions_batch).to(self.device)
+            q_values_next = self.q_estimator.qnet(s)
+            q_values_next_target = self.target_estimator.qnet(s)
+            masked_q_values = q_values_next.masked_fill(~legal, -float('inf'))
+            best_actions = masked_q_values.argmax(dim=1, keepdim=True)
+            values = q_values_next_target.gather(1, best_actions).squeeze(1)
+        return values.cpu().numpy()
+
     def feed_memory(self, state, action, reward, next_state, legal_actions, done):
         ''' Feed transition to memory
 
@@ -279,7 +400,11 @@ class DQNAgent(object):
             'train_every': self.train_every,
             'device': self.device,
             'save_path': self.save_path,
-            'save_every': self.save_every
+            'save_every': self.save_every,
+            'prioritized_replay': self.prioritized_replay,
+            'priority_beta_start': self.priority_betas[0],
+            'priority_beta_end': self.priority_betas[-1],
+            'priority_beta_steps': len(self.priority_betas),
         }
 
     @classmethod
@@ -309,6 +434,10 @@ class DQNAgent(object):
             device=checkpoint['device'],
             save_path=checkpoint['save_path'],
             save_every=checkpoint['save_every'],
+            prioritized_replay=checkpoint.get('prioritized_replay', False),
+            priority_beta_start=checkpoint.get('priority_beta_start', 0.4),
+            priority_beta_end=checkpoint.get('priority_beta_end', 1.0),
+            priority_beta_steps=checkpoint.get('priority_beta_steps', 20000),
         )
         
         agent_instance.total_t = checkpoint['total_t']
@@ -316,18 +445,21 @@ class DQNAgent(object):
         
         agent_instance.q_estimator = Estimator.from_checkpoint(checkpoint['q_estimator'])
         agent_instance.target_estimator = deepcopy(agent_instance.q_estimator)
-        agent_instance.memory = Memory.from_checkpoint(checkpoint['memory'])
+        memory_class = PrioritizedMemory if agent_instance.prioritized_replay else Memory
+        agent_instance.memory = memory_class.from_checkpoint(checkpoint['memory'])
 
         return agent_instance
                      
-    def save_checkpoint(self, path, filename='checkpoint_dqn.pt'):
-        ''' Save the model checkpoint (all attributes)
+    def save_checkpoint(self, path, filename='checkpoint_dqn.pt', background=False):
+        ''' Save the model checkpoint (all attributes). The arrays of the replay memory
+            are written to .npy files next to it, read it with `rlcard.utils.checkpoint.read_checkpoint`
 
         Args:
             path (str): the path to save the model
             filename(str): the file name of checkpoint
+            background (bool): write on a background thread, from a copy of the current state
         '''
-        torch.save(self.checkpoint_attributes(), os.path.join(path, filename))
+        write_checkpoint(self.checkpoint_attributes(), os.path.join(path, filename), background)
 
 
 class Estimator(object):
@@ -388,7 +520,7 @@ class Estimator(object):
             q_as = self.qnet(s).cpu().numpy()
         return q_as
 
-    def update(self, s, a, y):
+    def update(self, s, a, y, weights=None, return_td_errors=False):
         ''' Updates the estimator towards the given targets.
             In this case y is the target-network estimated
             value of the Q-network optimal actions, which
@@ -398,9 +530,11 @@ class Estimator(object):
           s (np.ndarray): (batch, state_shape) state representation
           a (np.ndarray): (batch,) integer sampled actions
           y (np.ndarray): (batch,) value of optimal actions according to Q-target
+          weights (np.ndarray): (batch,) importance-sampling weights of the squared errors
+          return_td_errors (boolean): Also return the TD errors
 
         Returns:
-          The calculated loss on the batch.
+          The calculated loss on the batch, and the (batch,) TD errors if return_td_errors.
         '''
         self.optimizer.zero_grad()
 
@@ -417,13 +551,19 @@ class Estimator(object):
         Q = torch.gather(q_as, dim=-1, index=a.unsqueeze(-1)).squeeze(-1)
 
         # update model
-        batch_loss = self.mse_loss(Q, y)
+        if weights is None:
+            batch_loss = self.mse_loss(Q, y)
+        else:
+            weights = torch.from_numpy(weights).float().to(self.device)
+            batch_loss = torch.mean(weights * (Q - y) ** 2)
         batch_loss.backward()
         self.optimizer.step()
         batch_loss = batch_loss.item()
 
         self.qnet.eval()
 
+        if return_td_errors:
+            return batch_loss, (y - Q).detach().cpu().numpy()
         return batch_loss
     
     def checkpoint_attributes(self):
@@ -495,16 +635,68 @@ class EstimatorNetwork(nn.Module):
 
 class Memory(object):
     ''' Memory for saving transitions
+
+    A ring buffer of preallocated arrays: obs, next_obs, action, reward,
+    done and the legal actions of the next state as a bit mask. The arrays
+    are allocated at the first save, when the shape of the observations is
+    known, and a full buffer overwrites its oldest transition. Binary
+    observations can be stored with `np.packbits`, eight per byte.
     '''
 
-    def __init__(self, memory_size, batch_size):
+    def __init__(self, memory_size, batch_size, num_actions=None, pack_obs=False):
         ''' Initialize
         Args:
             memory_size (int): the size of the memroy buffer
+            batch_size (int): the size of the sampled batches
+            num_actions (int): the number of actions, for the width of the legal
+              action masks. They are widened when a larger action is saved if None
+            pack_obs (boolean): store binary observations with 8 per byte
         '''
         self.memory_size = memory_size
         self.batch_size = batch_size
-        self.memory = []
+        self.num_actions = num_actions
+        self.pack_obs = pack_obs
+        # The number of saved transitions and the slot of the next one
+        self.size = 0
+        self.position = 0
+        self.obs_shape = None
+        self.obs_dtype = None
+        self.buffers = None
+        self._outputs = None
+
+    def __len__(self):
+        return self.size
+
+    def _allocate(self, state):
+        ''' Allocate the buffers for observations like `state`
+        '''
+        state = np.asarray(state)
+        self.obs_shape = state.shape
+        if self.pack_obs:
+            obs_shape, obs_dtype = ((state.size + 7) // 8,), np.uint8
+            self.obs_dtype = np.dtype(np.uint8)
+        else:
+            # The estimator computes in float32
+            self.obs_dtype = np.dtype(np.float32) if state.dtype == np.float64 else state.dtype
+            obs_shape, obs_dtype = state.shape, self.obs_dtype
+        num_actions = self.num_actions or 1
+        self.buffers = {
+            'obs': np.zeros((self.memory_size,) + obs_shape, dtype=obs_dtype),
+            'next_obs': np.zeros((self.memory_size,) + obs_shape, dtype=obs_dtype),
+            'action': np.zeros(self.memory_size, dtype=np.int64),
+            'reward': np.zeros(self.memory_size, dtype=np.float32),
+            'done': np.zeros(self.memory_size, dtype=np.bool_),
+            'legal': np.zeros((self.memory_size, (num_actions + 7) // 8), dtype=np.uint8),
+        }
+
+    def _encode(self, obs):
+        obs = np.asarray(obs)
+        if not self.pack_obs:
+            return obs
+        flat = obs.reshape(-1)
+        if np.any((flat != 0) & (flat != 1)):
+            raise ValueError('pack_obs needs binary observations')
+        return np.packbits(flat.astype(np.uint8))
 
     def save(self, state, action, reward, next_state, legal_actions, done):
         ''' Save transition into memory
@@ -517,24 +709,70 @@ class Memory(object):
             legal_actions (list): the legal actions of the next state
             done (boolean): whether the episode is finished
         '''
-        if len(self.memory) == self.memory_size:
-            self.memory.pop(0)
-        transition = Transition(state, action, reward, next_state, done, legal_actions)
-        self.memory.append(transition)
+        if self.memory_size <= 0:
+            return
+        if self.buffers is None:
+            self._allocate(state)
+        buffers = self.buffers
+        legal_actions = list(legal_actions)
+        if legal_actions and max(legal_actions) >= buffers['legal'].shape[1] * 8:
+            width = max(legal_actions) // 8 + 1
+            buffers['legal'] = np.pad(buffers['legal'], ((0, 0), (0, width - buffers['legal'].shape[1])))
+            self._outputs = None
+        i = self.position
+        buffers['obs'][i] = self._encode(state)
+        buffers['next_obs'][i] = self._encode(next_state)
+        buffers['action'][i] = action
+        buffers['reward'][i] = reward
+        buffers['done'][i] = done
+        mask = np.zeros(buffers['legal'].shape[1] * 8, dtype=np.bool_)
+        mask[legal_actions] = True
+        buffers['legal'][i] = np.packbits(mask)
+        self.position = (i + 1) % self.memory_size
+        self.size = min(self.size + 1, self.memory_size)
 
     def sample(self):
         ''' Sample a minibatch from the replay memory
 
+        The arrays are reused by the next call, copy them to keep them.
+
         Returns:
-            state_batch (list): a batch of states
-            action_batch (list): a batch of actions
-            reward_batch (list): a batch of rewards
-            next_state_batch (list): a batch of states
-            done_batch (list): a batch of dones
+            state_batch (numpy.array): a batch of states
+            action_batch (numpy.array): a batch of actions
+            reward_batch (numpy.array): a batch of rewards
+            next_state_batch (numpy.array): a batch of states
+            done_batch (numpy.array): a batch of dones
+            legal_actions_batch (numpy.array): (batch, num_actions) boolean masks
+              of the legal actions of the next states
         '''
-        samples = random.sample(self.memory, self.batch_size)
-        samples = tuple(zip(*samples))
-        return tuple(map(np.array, samples[:-1])) + (samples[-1],)
+        indices = np.array(random.sample(range(self.size), self.batch_size), dtype=np.int64)
+        return self.gather(indices)
+
+    def gather(self, indices):
+        ''' Gather the transitions at some indices into the output arrays
+
+        Args:
+            indices (numpy.array): the indices of the transitions, in [0, len(self))
+
+        Returns:
+            (tuple): the batch, as returned by `sample`
+        '''
+        buffers = self.buffers
+        if self._outputs is None or len(self._outputs['action']) != len(indices):
+            self._outputs = {name: np.empty((len(indices),) + buffer.shape[1:], dtype=buffer.dtype)
+                             for name, buffer in buffers.items()}
+        outputs = self._outputs
+        for name, buffer in buffers.items():
+            np.take(buffer, indices, axis=0, out=outputs[name])
+        legal = np.unpackbits(outputs['legal'], axis=1).astype(np.bool_)
+        if self.num_actions is not None:
+            legal = legal[:, :self.num_actions]
+        obs, next_obs = outputs['obs'], outputs['next_obs']
+        if self.pack_obs:
+            size = int(np.prod(self.obs_shape))
+            obs = np.unpackbits(obs, axis=1, count=size).reshape((len(indices),) + self.obs_shape)
+            next_obs = np.unpackbits(next_obs, axis=1, count=size).reshape((len(indices),) + self.obs_shape)
+        return obs, outputs['action'], outputs['reward'], next_obs, outputs['done'], legal
 
     def checkpoint_attributes(self):
         ''' Returns the attributes that need to be checkpointed
@@ -543,7 +781,14 @@ class Memory(object):
         return {
             'memory_size': self.memory_size,
             'batch_size': self.batch_size,
-            'memory': self.memory
+            'num_actions': self.num_actions,
+            'pack_obs': self.pack_obs,
+            'size': self.size,
+            'position': self.position,
+            'obs_shape': self.obs_shape,
+            'obs_dtype': self.obs_dtype,
+            # Only the saved transitions
+            'buffers': None if self.buffers is None else {name: buffer[:self.size] for name, buffer in self.buffers.items()},
         }
             
     @classmethod
@@ -558,6 +803,175 @@ class Memory(object):
             instance (Memory): the restored instance
         '''
         
-        instance = cls(checkpoint['memory_size'], checkpoint['batch_size'])
-        instance.memory = checkpoint['memory']
+        instance = cls(checkpoint['memory_size'], checkpoint['batch_size'],
+                       checkpoint.get('num_actions'), checkpoint.get('pack_obs', False))
+        if 'memory' in checkpoint:
+            # A list of transitions, from before the ring buffer
+            for t in checkpoint['memory']:
+                instance.save(t.state, t.action, t.reward, t.next_state, t.legal_actions, t.done)
+            return instance
+        if checkpoint['buffers'] is not None:
+            instance.obs_shape = tuple(checkpoint['obs_shape'])
+            instance.obs_dtype = checkpoint['obs_dtype']
+            instance.buffers = {}
+            for name, saved in checkpoint['buffers'].items():
+                if isinstance(saved, np.memmap) and len(saved) == instance.memory_size:
+                    # A full memory mapped copy-on-write by `read_checkpoint`
+                    instance.buffers[name] = saved
+                    continue
+                buffer = np.zeros((instance.memory_size,) + saved.shape[1:], dtype=saved.dtype)
+                buffer[:len(saved)] = saved
+                instance.buffers[name] = buffer
+            instance.size = checkpoint['size']
+            instance.position = checkpoint['position']
+        return instance
+
+
+class SumTree(object):
+    ''' A binary tree in an array whose nodes are the sums of their children
+
+    The leaves are at [capacity, 2 * capacity) and node i has the children
+    2i and 2i + 1, so the root is node 1 and holds the total. Updating a
+    leaf and finding the leaf of a prefix sum take O(log n), and both are
+    vectorized over batches.
+    '''
+
+    def __init__(self, capacity):
+        ''' Initialize a tree with zeros
+
+        Args:
+            capacity (int): the number of leaves, rounded up to a power of 2
+        '''
+        self.capacity = 1 << max(capacity - 1, 0).bit_length()
+        self.nodes = np.zeros(2 * self.capacity)
+
+    def total(self):
+        return self.nodes[1]
+
+    def get(self, indices):
+        return self.nodes[np.asarray(indices) + self.capacity]
+
+    def update(self, indices, values):
+        ''' Set the values of some leaves
+
+        Args:
+            indices (numpy.array): the leaves
+            values (numpy.array): their new values
+        '''
+        nodes = np.asarray(indices) + self.capacity
+        self.nodes[nodes] = values
+        nodes = np.unique(nodes // 2)
+        while len(nodes) and nodes[0] > 0:
+            self.nodes[nodes] = self.nodes[2 * nodes] + self.nodes[2 * nodes + 1]
+            nodes = np.unique(nodes // 2)
+
+    def find(self, prefix_sums):
+        ''' Find the leaves where the cumulative sums of the leaves reach some values
+
+        Args:
+            prefix_sums (numpy.array): values in [0, total)
+
+        Returns:
+            (numpy.array): the leaf of every value
+        '''
+        values = np.array(prefix_sums, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while self.capacity > 1 and nodes[0] < self.capacity:
+            left = 2 * nodes
+            # Rounding must not lead into an empty subtree
+            right = (values >= self.nodes[left]) & (self.nodes[left + 1] > 0)
+            values = np.where(right, values - self.nodes[left], values)
+            nodes = np.where(right, left + 1, left)
+        return nodes - self.capacity
+
+
+class PrioritizedMemory(Memory):
+    ''' Memory that samples transitions in proportion to their priorities
+
+    The priority of a transition is (|TD error| + epsilon) ** alpha, kept in
+    a `SumTree`. New transitions get the largest priority so far, so they
+    are sampled at least once. A batch is stratified: the total priority is
+    cut into batch_size equal segments and one transition is drawn from
+    each segment.
+    '''
+
+    def __init__(self, memory_size, batch_size, num_actions=None, pack_obs=False, alpha=0.6, epsilon=1e-6):
+        ''' Initialize
+        Args:
+            memory_size (int): the size of the memroy buffer
+            batch_size (int): the size of the sampled batches
+            num_actions (int): the number of actions
+            pack_obs (boolean): store binary observations with 8 per byte
+            alpha (float): the exponent of the TD errors, 0 for uniform sampling
+            epsilon (float): added to the TD errors so that every transition can be sampled
+        '''
+        super().__init__(memory_size, batch_size, num_actions, pack_obs)
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.tree = SumTree(memory_size)
+        self.max_priority = 1.0
+
+    def save(self, state, action, reward, next_state, legal_actions, done):
+        ''' Save transition into memory with the largest priority so far
+        '''
+        if self.memory_size > 0:
+            self.tree.update([self.position], [self.max_priority ** self.alpha])
+        super().save(state, action, reward, next_state, legal_actions, done)
+
+    def sample(self, beta=0.4):
+        ''' Sample a stratified minibatch in proportion to the priorities
+
+        Args:
+            beta (float): the exponent of the importance-sampling weights, 1 for
+              a full correction of the prioritized sampling
+
+        Returns:
+            (tuple): the batch as returned by `Memory.sample`, then the (batch,)
+              importance-sampling weights, normalized to a maximum of 1, and the
+              indices of the transitions for `update_priorities`
+        '''
+        total = self.tree.total()
+        segment = total / self.batch_size
+        prefix_sums = (np.arange(self.batch_size) + np.random.random_sample(self.batch_size)) * segment
+        indices = np.minimum(self.tree.find(np.minimum(prefix_sums, total)), self.size - 1)
+        probs = self.tree.get(indices) / total
+        weights = (self.size * probs) ** -beta
+        weights /= weights.max()
+        return self.gather(indices) + (weights, indices)
+
+    def update_priorities(self, indices, td_errors):
+        ''' Set the priorities of transitions from their new TD errors
+
+        Args:
+            indices (numpy.array): the indices returned by `sample`
+            td_errors (numpy.array): the TD errors of the transitions
+        '''
+        priorities = np.abs(td_errors) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
+
+    def checkpoint_attributes(self):
+        ''' Returns the attributes that need to be checkpointed
+        '''
+        attributes = super().checkpoint_attributes()
+        attributes.update({
+            'alpha': self.alpha,
+            'epsilon': self.epsilon,
+            'max_priority': self.max_priority,
+            'priorities': self.tree.get(np.arange(self.size)),
+        })
+        return attributes
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint):
+        ''' Restores the attributes from the checkpoint, also of a `Memory`
+        '''
+        instance = super().from_checkpoint(checkpoint)
+        if 'priorities' in checkpoint:
+            instance.alpha = checkpoint['alpha']
+            instance.epsilon = checkpoint['epsilon']
+            instance.max_priority = checkpoint['max_priority']
+            instance.tree.update(np.arange(len(checkpoint['priorities'])), checkpoint['priorities'])
+        else:
+            instance.tree.update(np.arange(instance.size), np.ones(instance.size))
         return instance
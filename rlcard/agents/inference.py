@@ -0,0 +1,274 @@
+''' CPU inference backends for trained networks
+
+The networks of `DQNAgent`, `NFSPAgent` and `DMCAgent` are small MLPs,
+and predicting one state through torch costs more in tensor conversions
+and module calls than in arithmetic. `export_model` turns a trained
+network into one of:
+
+    'numpy':       `NumpyMLP`, float32 weights in NumPy with the BatchNorm
+                   layers folded into the neighbouring Linear layers
+    'torchscript': a frozen TorchScript module optimized for inference
+    'int8':        the Linear layers dynamically quantized to int8
+
+All of them take and return NumPy arrays. An exported network is a
+snapshot of the weights, export it again after more training.
+'''
+import copy
+import warnings
+
+import numpy as np
+import torch
+from torch import nn
+
+BACKENDS = ('numpy', 'torchscript', 'int8')
+
+
+class NumpyMLP(object):
+    ''' An MLP evaluated with NumPy: Linear layers, each followed by an activation
+    '''
+
+    def __init__(self, weights, biases, activations, output=None):
+        ''' Initialize from the layers
+
+        Args:
+            weights (list): The (in, out) weight matrices
+            biases (list): The (out,) biases
+            activations (list): 'relu', 'tanh' or None after every layer
+            output (str): 'log_softmax' to normalize the output, or None
+        '''
+        self.weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.ascontiguousarray(b, dtype=np.float32) for b in biases]
+        self.activations = list(activations)
+        self.output = output
+
+    @classmethod
+    def from_sequential(cls, sequential, output=None):
+        ''' Export a `nn.Sequential` of Flatten, BatchNorm1d, Linear, ReLU and Tanh layers
+
+        Args:
+            sequential (nn.Sequential): The layers, in eval mode the BatchNorm
+                layers use their running statistics
+            output (str): 'log_softmax' to normalize the output, or None
+
+        Returns:
+            (NumpyMLP): The exported MLP
+        '''
+        weights, biases, activations = [], [], []
+        # The scale and shift of a BatchNorm waiting for the next Linear
+        pending = None
+        for layer in sequential:
+            if isinstance(layer, nn.Flatten):
+                continue
+            if isinstance(layer, nn.BatchNorm1d):
+                scale, shift = _batch_norm_affine(layer)
+                if weights and activations[-1] is None:
+                    # y = (xW + b) * scale + shift
+                    weights[-1] = weights[-1] * scale
+                    biases[-1] = biases[-1] * scale + shift
+                elif pending is None:
+                    pending = (scale, shift)
+                else:
+                    pending = (pending[0] * scale, pending[1] * scale + shift)
+            elif isinstance(layer, nn.Linear):
+                w = layer.weight.detach().cpu().numpy().astype(np.float64).T
+                b = layer.bias.detach().cpu().numpy().astype(np.float64) if layer.bias is not None else np.zeros(w.shape[1])
+                if pending is not None:
+                    # (x * scale + shift)W + b
+                    scale, shift = pending
+                    b = b + shift @ w
+                    w = w * scale[:, None]
+                    pending = None
+                weights.append(w)
+                biases.append(b)
+                activations.append(None)
+            elif isinstance(layer, (nn.ReLU, nn.Tanh)) and weights and activations[-1] is None:
+                activations[-1] = 'relu' if isinstance(layer, nn.ReLU) else 'tanh'
+            else:
+                raise ValueError('Cannot export layer {}'.format(layer))
+        if pending is not None:
+            raise ValueError('A BatchNorm1d layer is not followed by a Linear layer')
+        return cls(weights, biases, activations, output)
+
+    def hidden(self, x, start=0):
+        ''' Run the layers from `start` on
+
+        Args:
+            x (numpy.array): (batch, features) the input of the layer `start`
+            start (int): The first layer
+
+        Returns:
+            (numpy.array): (batch, outputs)
+        '''
+        for w, b, activation in zip(self.weights[start:], self.biases[start:], self.activations[start:]):
+            x = x @ w
+            x += b
+            if activation == 'relu':
+                np.maximum(x, 0, out=x)
+            elif activation == 'tanh':
+                np.tanh(x, out=x)
+        if self.output == 'log_softmax':
+            x -= x.max(axis=1, keepdims=True)
+            x -= np.log(np.exp(x).sum(axis=1, keepdims=True))
+        return x
+
+    def __call__(self, x):
+        ''' Evaluate a batch
+
+        Args:
+            x (numpy.array): (batch, ...) the inputs, flattened
+
+        Returns:
+            (numpy.array): (batch, outputs) float32
+        '''
+        x = np.asarray(x, dtype=np.float32)
+        return self.hidden(x.reshape(len(x), -1))
+
+
+class NumpyDMCNet(object):
+    ''' The Q-network of `DMCAgent` in NumPy
+
+    The first layer is split into its observation and action columns, so
+    that the observation of a state is multiplied once for all its legal
+    actions instead of once per action.
+    '''
+
+    def __init__(self, mlp):
+        ''' Initialize
+
+        Args:
+            mlp (NumpyMLP): The layers, whose input is the observation then the action
+        '''
+        self.mlp = mlp
+
+    def __call__(self, obs, actions, counts=None):
+        ''' Evaluate (observation, action) pairs
+
+        Args:
+            obs (numpy.array): (num_states, ...) the observations, or one per pair if counts is None
+            actions (numpy.array): (num_pairs, ...) the action features
+            counts (list): The number of actions of every state
+
+        Returns:
+            (numpy.array): (num_pairs,) the values
+        '''
+        obs = np.asarray(obs, dtype=np.float32)
+        obs = obs.reshape(len(obs), -1)
+        actions = np.asarray(actions, dtype=np.float32)
+        actions = actions.reshape(len(actions), -1)
+        w, b = self.mlp.weights[0], self.mlp.biases[0]
+        obs_dim = obs.shape[1]
+        x = obs @ w[:obs_dim]
+        if counts is not None:
+            x = np.repeat(x, counts, axis=0)
+        x += actions @ w[obs_dim:]
+        x += b
+        activation = self.mlp.activations[0]
+        if activation == 'relu':
+            np.maximum(x, 0, out=x)
+        elif activation == 'tanh':
+            np.tanh(x, out=x)
+        return self.mlp.hidden(x, start=1).reshape(-1)
+
+
+class NumpyDMCSharedNet(object):
+    ''' `DMCSharedNet` in NumPy
+    '''
+
+    def __init__(self, obs_mlp, action_mlp, head):
+        ''' Initialize
+
+        Args:
+            obs_mlp (NumpyMLP): The observation layers, up to the projection to the head
+            action_mlp (NumpyMLP): The action layer
+            head (NumpyMLP): The head after the ReLU of the sum of the two
+        '''
+        self.obs_mlp = obs_mlp
+        self.action_mlp = action_mlp
+        self.head = head
+
+    def __call__(self, obs, actions, counts=None):
+        ''' Evaluate (observation, action) pairs, see `NumpyDMCNet`
+        '''
+        x = self.obs_mlp(obs)
+        if counts is not None:
+            x = np.repeat(x, counts, axis=0)
+        x += self.action_mlp(actions)
+        np.maximum(x, 0, out=x)
+        return self.head.hidden(x).reshape(-1)
+
+
+class TorchInference(object):
+    ''' A torch module on the CPU called with NumPy arrays
+    '''
+
+    def __init__(self, module):
+        self.module = module
+
+    def __call__(self, *inputs):
+        with torch.no_grad():
+            outputs = self.module(*[_to_tensor(x) for x in inputs])
+        return outputs.numpy()
+
+
+def export_model(module, backend='numpy'):
+    ''' Export a trained network for inference on the CPU
+
+    Args:
+        module (nn.Module): `EstimatorNetwork` of `DQNAgent`, `AveragePolicyNetwork`
+            of `NFSPAgent`, `DMCNet` or `DMCSharedNet`
+        backend (str): 'numpy', 'torchscript' or 'int8'
+
+    Returns:
+        (callable): NumPy inputs -> NumPy outputs, as the forward of the module
+    '''
+    if backend not in BACKENDS:
+        raise ValueError('Unknown backend {}, expected one of {}'.format(backend, BACKENDS))
+    module = copy.deepcopy(module).cpu().eval()
+    if backend == 'numpy':
+        if hasattr(module, 'mlp'):
+            # AveragePolicyNetwork returns log probabilities
+            return NumpyMLP.from_sequential(module.mlp, output='log_softmax')
+        from rlcard.agents.dmc_agent.model import DMCNet, DMCSharedNet
+        if isinstance(module, DMCSharedNet):
+            return NumpyDMCSharedNet(NumpyMLP.from_sequential(module.obs_layers),
+                                     NumpyMLP.from_sequential([module.action_layer]),
+                                     NumpyMLP.from_sequential(module.head))
+        mlp = NumpyMLP.from_sequential(module.fc_layers)
+        return NumpyDMCNet(mlp) if isinstance(module, DMCNet) else mlp
+    if backend == 'int8':
+        with warnings.catch_warnings():
+            # Recent versions of torch deprecate torch.ao.quantization for torchao
+            warnings.simplefilter('ignore', DeprecationWarning)
+            warnings.simplefilter('ignore', UserWarning)
+            module = torch.ao.quantization.quantize_dynamic(module, {nn.Linear}, dtype=torch.qint8)
+        return TorchInference(module)
+    for layer in module.modules():
+        # The layer sizes computed with np.prod are not TorchScript constants
+        for name in getattr(layer, '__constants__', ()):
+            if isinstance(getattr(layer, name, None), np.integer):
+                setattr(layer, name, int(getattr(layer, name)))
+    with warnings.catch_warnings():
+        # torch.jit.script is deprecated in recent versions of torch
+        warnings.simplefilter('ignore', FutureWarning)
+        module = torch.jit.optimize_for_inference(torch.jit.script(module))
+    return TorchInference(module)
+
+
+def _batch_norm_affine(layer):
+    ''' Get the scale and the shift of a BatchNorm1d in eval mode
+    '''
+    mean = layer.running_mean.detach().cpu().numpy().astype(np.float64)
+    var = layer.running_var.detach().cpu().numpy().astype(np.float64)
+    scale = 1 / np.sqrt(var + layer.eps)
+    shift = -mean * scale
+    if layer.affine:
+        gamma = layer.weight.detach().cpu().numpy().astype(np.float64)
+        beta = layer.bias.detach().cpu().numpy().astype(np.float64)
+        scale, shift = scale * gamma, shift * gamma + beta
+    return scale, shift
+
+def _to_tensor(x):
+    ''' Convert floats to float32 and integers, e.g., counts, to int64
+    '''
+    x = np.asarray(x)
+    return torch.from_numpy(x.astype(np.int64 if np.issubdtype(x.dtype, np.integer) else np.float32, copy=False))
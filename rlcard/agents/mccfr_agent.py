@@ -0,0 +1,449 @@
+''' Monte Carlo CFR with external or outcome sampling
+
+The regrets and the average policy are dictionaries of infoset key ->
+array over all the actions, as in `CFRAgent`. The iterations can be
+spread over a pool of processes: every worker traverses with its own
+copy of the regrets and sends back the changes of its tables after
+`sync_interval` iterations, which are summed into the tables of the
+agent before the next round.
+'''
+import os
+import pickle
+import multiprocessing as mp
+
+import numpy as np
+
+from rlcard.games.base import GameTree, CHANCE
+from rlcard.utils.parallel_utils import derive_seeds
+from rlcard.utils.policy_table import TABLE_FILE, PolicyTable, write_policy_tables, load_policy_tables
+
+# The agent of a worker process, built once by `_init_worker`
+_worker = {}
+
+
+class EnvTree(GameTree):
+    ''' Walk the tree of an environment with step and step_back
+
+    Chance is sampled by the game engine: the root is a chance node with a
+    single outcome that resets the environment. The infoset of a player is
+    the bytes of its observation, as in `CFRAgent`.
+    '''
+
+    def __init__(self, env):
+        ''' Wrap an environment
+
+        Args:
+            env (Env): An environment made with allow_step_back
+        '''
+        if not env.allow_step_back:
+            raise ValueError('The environment needs allow_step_back=True')
+        self.env = env
+        self.num_players = env.num_players
+        self.num_actions = env.num_actions
+        self._states = []
+
+    def seed(self, seed):
+        ''' Seed the chance of the game engine
+        '''
+        self.env.seed(seed)
+
+    def current_player(self):
+        if not self._states:
+            return CHANCE
+        return self.env.get_player_id()
+
+    def is_over(self):
+        return bool(self._states) and self.env.is_over()
+
+    def chance_outcomes(self):
+        return [(None, 1.0)]
+
+    def legal_action_ids(self):
+        return list(self._states[-1]['legal_actions'].keys())
+
+    def infoset_key(self, player):
+        if player == self.env.get_player_id():
+            state = self._states[-1]
+        else:
+            state = self.env.get_state(player)
+        return state['obs'].tobytes()
+
+    @staticmethod
+    def key_from_state(state):
+        return state['obs'].tobytes()
+
+    def apply(self, action):
+        if not self._states:
+            state, _ = self.env.reset()
+        else:
+            state, _ = self.env.step(action)
+        self._states.append(state)
+
+    def undo(self):
+        self._states.pop()
+        if self._states:
+            self.env.step_back()
+
+    def payoffs(self):
+        return list(self.env.get_payoffs())
+
+
+def regret_matching(regret, legal_actions):
+    ''' Get the policy of an infoset from its cumulative regrets
+
+    Args:
+        regret (numpy.array): The regrets of all the actions
+        legal_actions (list): The legal action ids
+
+    Returns:
+        (numpy.array): The probabilities of all the actions, uniform over the
+            legal actions if no regret is positive
+    '''
+    probs = np.zeros(len(regret))
+    positive = np.maximum(regret[legal_actions], 0)
+    total = positive.sum()
+    if total > 0:
+        probs[legal_actions] = positive / total
+    else:
+        probs[legal_actions] = 1.0 / len(legal_actions)
+    return probs
+
+
+class MCCFRAgent():
+    ''' Implement external-sampling and outcome-sampling MCCFR
+    '''
+
+    def __init__(self,
+                 env,
+                 model_path='./mccfr_model',
+                 sampling='external',
+                 weighting='linear',
+                 plus=False,
+                 exploration=0.6,
+                 tree=None,
+                 seed=None):
+        ''' Initilize Agent
+
+        Args:
+            env (Env): Env class, made with allow_step_back if no tree is given
+            model_path (str): The directory of the saved model
+            sampling (str): 'external' or 'outcome'
+            weighting (str): 'linear' to weight the regrets and the average
+                policy of iteration t by t (Linear CFR), or 'uniform'
+            plus (bool): Floor the regrets at zero as in CFR+
+            exploration (float): The exploration of the traverser in outcome sampling
+            tree (GameTree): The game tree, `EnvTree(env)` by default
+            seed (int): The seed of the sampling
+        '''
+        if sampling not in ('external', 'outcome'):
+            raise ValueError('Unknown sampling {}'.format(sampling))
+        if weighting not in ('linear', 'uniform'):
+            raise ValueError('Unknown weighting {}'.format(weighting))
+        self.use_raw = False
+        self.env = env
+        self.model_path = model_path
+        self.sampling = sampling
+        self.weighting = weighting
+        self.plus = plus
+        self.exploration = exploration
+        self.tree = tree if tree is not None else EnvTree(env)
+        self.np_random = np.random.RandomState(seed)
+
+        self.regrets = {}
+        self.average_policy = {}
+        self.iteration = 0
+
+    def train(self):
+        ''' Do one iteration, a traversal for every player
+        '''
+        self.iteration += 1
+        self._iterate(self.iteration)
+
+    def _iterate(self, iteration):
+        weight = iteration if self.weighting == 'linear' else 1.0
+        for player_id in range(self.tree.num_players):
+            if self.sampling == 'external':
+                self._traverse_external(player_id, weight)
+            else:
+                self._traverse_outcome(player_id, weight, 1.0, 1.0, 1.0)
+
+    def _sample(self, probs):
+        action = np.searchsorted(np.cumsum(probs), self.np_random.random_sample(), side='right')
+        return min(action, len(probs) - 1)
+
+    def _sample_chance(self):
+        outcomes = self.tree.chance_outcomes()
+        return outcomes[self._sample(np.array([prob for _, prob in outcomes]))][0]
+
+    def _get_regret(self, key):
+        if key not in self.regrets:
+            self.regrets[key] = np.zeros(self.tree.num_actions)
+        return self.regrets[key]
+
+    def _add_regret(self, key, delta):
+        regret = self._get_regret(key)
+        regret += delta
+        if self.plus:
+            np.maximum(regret, 0, out=regret)
+
+    def _add_policy(self, key, delta):
+        if key not in self.average_policy:
+            self.average_policy[key] = np.zeros(self.tree.num_actions)
+        self.average_policy[key] += delta
+
+    def _traverse_external(self, player_id, weight):
+        ''' Sample chance and the opponents, explore all the actions of the traverser
+
+        Returns:
+            (float): The sampled utility of the traverser
+        '''
+        tree = self.tree
+        if tree.is_over():
+            return tree.payoffs()[player_id]
+        current_player = tree.current_player()
+        if current_player == CHANCE:
+            tree.apply(self._sample_chance())
+            utility = self._traverse_external(player_id, weight)
+            tree.undo()
+            return utility
+
+        key = tree.infoset_key(current_player)
+        legal_actions = tree.legal_action_ids()
+        probs = regret_matching(self._get_regret(key), legal_actions)
+        if current_player != player_id:
+            self._add_policy(key, weight * probs)
+            tree.apply(self._sample(probs))
+            utility = self._traverse_external(player_id, weight)
+            tree.undo()
+            return utility
+
+        action_utilities = np.zeros(tree.num_actions)
+        for action in legal_actions:
+            tree.apply(action)
+            action_utilities[action] = self._traverse_external(player_id, weight)
+            tree.undo()
+        utility = np.dot(probs, action_utilities)
+        delta = np.zeros(tree.num_actions)
+        delta[legal_actions] = weight * (action_utilities[legal_actions] - utility)
+        self._add_regret(key, delta)
+        return utility
+
+    def _traverse_outcome(self, player_id, weight, player_reach, opponent_reach, sample_reach):
+        ''' Sample one terminal history, exploring the actions of the traverser
+
+        Args:
+            player_id (int): The traverser
+            weight (float): The weight of the iteration
+            player_reach (float): The reach probability of the traverser
+            opponent_reach (float): The reach probability of the opponents. Chance is
+                left out of it, as of `sample_reach`, because it is sampled on-policy.
+            sample_reach (float): The probability of sampling the history, without chance
+
+        Returns:
+            (tuple): The utility divided by the probability of sampling the
+                terminal history and the reach probability from the current
+                history to it
+        '''
+        tree = self.tree
+        if tree.is_over():
+            return tree.payoffs()[player_id] / sample_reach, 1.0
+        current_player = tree.current_player()
+        if current_player == CHANCE:
+            # Chance is sampled with its own probabilities, which cancel out
+            tree.apply(self._sample_chance())
+            result = self._traverse_outcome(player_id, weight, player_reach, opponent_reach, sample_reach)
+            tree.undo()
+            return result
+
+        key = tree.infoset_key(current_player)
+        legal_actions = tree.legal_action_ids()
+        probs = regret_matching(self._get_regret(key), legal_actions)
+        if current_player == player_id:
+            sample_probs = (1 - self.exploration) * probs
+            sample_probs[legal_actions] += self.exploration / len(legal_actions)
+        else:
+            sample_probs = probs
+        action = self._sample(sample_probs)
+
+        tree.apply(action)
+        if current_player == player_id:
+            utility, tail = self._traverse_outcome(player_id, weight, player_reach * probs[action],
+                                                   opponent_reach, sample_reach * sample_probs[action])
+        else:
+            utility, tail = self._traverse_outcome(player_id, weight, player_reach,
+                                                   opponent_reach * probs[action], sample_reach * sample_probs[action])
+        tree.undo()
+
+        if current_player == player_id:
+            value = utility * opponent_reach
+            delta = np.zeros(tree.num_actions)
+            delta[legal_actions] = -value * tail * probs[action]
+            delta[action] = value * tail * (1 - probs[action])
+            self._add_regret(key, weight * delta)
+            self._add_policy(key, weight * player_reach / sample_reach * probs)
+        return utility, tail * probs[action]
+
+    def train_parallel(self, num_iterations, num_workers=None, sync_interval=100, seed=0, start_method=None):
+        ''' Run iterations in a pool of processes
+
+        Args:
+            num_iterations (int): The number of iterations, rounded up to whole rounds
+            num_workers (int): The number of worker processes. Defaults to the CPU count.
+            sync_interval (int): The iterations of a worker between two merges of the tables
+            seed (int): The master seed of the workers
+            start_method (str): The multiprocessing start method, e.g., 'fork' or 'spawn'
+        '''
+        if num_workers is None:
+            num_workers = mp.cpu_count()
+        iterations_per_round = num_workers * sync_interval
+        num_rounds = (num_iterations + iterations_per_round - 1) // iterations_per_round
+        seeds = derive_seeds(seed, num_rounds * num_workers)
+        ctx = mp.get_context(start_method)
+        with ctx.Pool(num_workers, initializer=_init_worker, initargs=(self._worker_copy(),)) as pool:
+            for r in range(num_rounds):
+                tasks = [(self.regrets, self.iteration, w, num_workers, sync_interval, seeds[r * num_workers + w])
+                         for w in range(num_workers)]
+                for regret_deltas, policy_deltas in pool.imap(_star_run_worker, tasks):
+                    for key, delta in regret_deltas.items():
+                        self._add_regret(key, delta)
+                    for key, delta in policy_deltas.items():
+                        self._add_policy(key, delta)
+                self.iteration += iterations_per_round
+
+    def _worker_copy(self):
+        ''' A copy of the agent without the tables, sent to the workers
+        '''
+        regrets, average_policy = self.regrets, self.average_policy
+        self.regrets, self.average_policy = {}, {}
+        try:
+            return pickle.dumps(self)
+        finally:
+            self.regrets, self.average_policy = regrets, average_policy
+
+    def _run(self, regrets, iteration, worker, num_workers, num_iterations, seed):
+        ''' Run the iterations of one worker in a round from the shared regrets
+
+        The worker takes every num_workers-th iteration, so the iterations of
+        a round are numbered as if they were run one after the other.
+
+        Returns:
+            (tuple): The changes of the regrets and of the average policy
+        '''
+        self.np_random.seed(seed)
+        if isinstance(self.tree, EnvTree):
+            self.tree.seed(seed)
+        self.regrets = {key: regret.copy() for key, regret in regrets.items()}
+        self.average_policy = {}
+        for i in range(num_iterations):
+            self._iterate(iteration + i * num_workers + worker + 1)
+        regret_deltas = {}
+        for key, regret in self.regrets.items():
+            delta = regret - regrets[key] if key in regrets else regret
+            if np.any(delta):
+                regret_deltas[key] = delta
+        return regret_deltas, self.average_policy
+
+    def action_probs(self, state, policy):
+        ''' Obtain the action probabilities of a state of the environment
+
+        Args:
+            state (dict): The state
+            policy (dict): The used table, regrets or average policy
+
+        Returns:
+            (numpy.array): The probabilities of all the actions
+        '''
+        key = self.tree.key_from_state(state)
+        legal_actions = list(state['legal_actions'].keys())
+        if policy is self.regrets:
+            return regret_matching(self.regrets.get(key, np.zeros(self.tree.num_actions)), legal_actions)
+        probs = np.zeros(self.tree.num_actions)
+        if key in policy and policy[key][legal_actions].sum() > 0:
+            probs[legal_actions] = policy[key][legal_actions] / policy[key][legal_actions].sum()
+        else:
+            probs[legal_actions] = 1.0 / len(legal_actions)
+        return probs
+
+    def step(self, state):
+        ''' Sample an action from the current policy
+        '''
+        probs = self.action_probs(state, self.regrets)
+        return np.random.choice(len(probs), p=probs)
+
+    def eval_step(self, state):
+        ''' Given a state, predict action based on average policy
+
+        Args:
+            state (dict): State of the environment
+
+        Returns:
+            action (int): Predicted action
+            info (dict): A dictionary containing information
+        '''
+        probs = self.action_probs(state, self.average_policy)
+        action = np.random.choice(len(probs), p=probs)
+
+        info = {}
+        info['probs'] = {state['raw_legal_actions'][i]: float(probs[action_id])
+                         for i, action_id in enumerate(state['legal_actions'])}
+
+        return action, info
+
+    def save(self):
+        ''' Save model
+        '''
+        if not os.path.exists(self.model_path):
+            os.makedirs(self.model_path)
+
+        with open(os.path.join(self.model_path, 'average_policy.pkl'), 'wb') as f:
+            pickle.dump(self.average_policy, f)
+        with open(os.path.join(self.model_path, 'regrets.pkl'), 'wb') as f:
+            pickle.dump(self.regrets, f)
+        with open(os.path.join(self.model_path, 'iteration.pkl'), 'wb') as f:
+            pickle.dump(self.iteration, f)
+
+    def load(self):
+        ''' Load model
+        '''
+        if not os.path.exists(self.model_path):
+            return
+
+        with open(os.path.join(self.model_path, 'average_policy.pkl'), 'rb') as f:
+            self.average_policy = pickle.load(f)
+        with open(os.path.join(self.model_path, 'regrets.pkl'), 'rb') as f:
+            self.regrets = pickle.load(f)
+        with open(os.path.join(self.model_path, 'iteration.pkl'), 'rb') as f:
+            self.iteration = pickle.load(f)
+
+    def save_table(self):
+        ''' Save the tables to one memory-mappable file. It is written
+            atomically, so it can checkpoint a long run at any iteration.
+        '''
+        if not os.path.exists(self.model_path):
+            os.makedirs(self.model_path)
+        tables = {'average_policy': self.average_policy, 'regrets': self.regrets}
+        write_policy_tables(os.path.join(self.model_path, TABLE_FILE), tables,
+                            self.tree.num_actions, meta={'iteration': self.iteration})
+
+    def load_table(self, resume=False):
+        ''' Load the tables saved by `save_table`
+
+        Args:
+            resume (boolean): Load copies of the tables to continue training.
+                Otherwise the average policy is mapped read-only for evaluation.
+        '''
+        path = os.path.join(self.model_path, TABLE_FILE)
+        if resume:
+            tables, meta = load_policy_tables(path)
+            self.average_policy = tables['average_policy']
+            self.regrets = tables['regrets']
+        else:
+            self.average_policy = PolicyTable(path, 'average_policy')
+            meta = self.average_policy.meta
+        self.iteration = meta['iteration']
+
+def _init_worker(agent):
+    _worker['agent'] = pickle.loads(agent)
+
+def _star_run_worker(args):
+    return _worker['agent']._run(*args)
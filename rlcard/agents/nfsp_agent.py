@@ -30,6 +30,8 @@ import torch.nn.functional as F
 
 from rlcard.agents.dqn_agent import DQNAgent
 from rlcard.utils.utils import remove_illegal
+from rlcard.utils.checkpoint import write_checkpoint
+from rlcard.agents.inference import BACKENDS, export_model
 
 Transition = collections.namedtuple('Transition', 'info_state action_probs')
 
@@ -134,6 +136,10 @@ class NFSPAgent(object):
         self.save_path = save_path
         self.save_every = save_every
 
+        # The exported average policy network, see set_inference_backend
+        self.inference_backend = None
+        self._inference = None
+
     def _build_model(self):
         ''' Build the average policy network
         '''
@@ -177,9 +183,7 @@ class NFSPAgent(object):
         legal_actions = list(state['legal_actions'].keys())
         if self._mode == 'best_response':
             action = self._rl_agent.step(state)
-            one_hot = np.zeros(self._num_actions)
-            one_hot[action] = 1
-            self._add_transition(obs, one_hot)
+            self._add_transition(obs, action)
 
         elif self._mode == 'average_policy':
             probs = self._act(obs)
@@ -212,6 +216,55 @@ class NFSPAgent(object):
             raise ValueError("'evaluate_with' should be either 'average_policy' or 'best_response'.")
         return action, info
 
+    def step_batch(self, states):
+        ''' Returns the actions to be taken for a batch of states.
+
+        Args:
+            states (list): A list of state dicts
+
+        Returns:
+            actions (list): A list of action ids, one per state
+        '''
+        if self._mode == 'best_response':
+            actions = self._rl_agent.step_batch(states)
+            for state, action in zip(states, actions):
+                self._add_transition(state['obs'], action)
+
+        elif self._mode == 'average_policy':
+            probs_batch = self._act_batch(np.stack([state['obs'] for state in states]))
+            actions = []
+            for state, probs in zip(states, probs_batch):
+                probs = remove_illegal(probs, list(state['legal_actions'].keys()))
+                actions.append(np.random.choice(len(probs), p=probs))
+
+        return actions
+
+    def eval_step_batch(self, states):
+        ''' Use the average policy for evaluating a batch of states
+
+        Args:
+            states (list): A list of state dicts
+
+        Returns:
+            actions (list): A list of action ids, one per state
+            infos (list): A list of dictionaries containing information
+        '''
+        if self.evaluate_with == 'best_response':
+            return self._rl_agent.eval_step_batch(states)
+        elif self.evaluate_with == 'average_policy':
+            probs_batch = self._act_batch(np.stack([state['obs'] for state in states]))
+            actions, infos = [], []
+            for state, probs in zip(states, probs_batch):
+                legal_actions = list(state['legal_actions'].keys())
+                probs = remove_illegal(probs, legal_actions)
+                actions.append(np.random.choice(len(probs), p=probs))
+                info = {}
+                info['probs'] = {state['raw_legal_actions'][i]: float(probs[legal_actions[i]]) for i in range(len(legal_actions))}
+                infos.append(info)
+        else:
+            raise ValueError("'evaluate_with' should be either 'average_policy' or 'best_response'.")
+        return actions, infos
+
     def sample_episode_policy(self):
         ''' Sample average/best_response policy
         '''
@@ -230,28 +283,54 @@ class NFSPAgent(object):
             action_probs (numpy.array): The predicted action probability.
         '''
         info_state = np.expand_dims(info_state, axis=0)
-        info_state = torch.from_numpy(info_state).float().to(self.device)
+        return self._act_batch(info_state)[0]
+
+    def _act_batch(self, info_states):
+        ''' Predict action probabilities of a batch of observations
+            Not connected to computation graph
+        Args:
+            info_states (numpy.array): A batch of obervations, (batch, state_size)
+
+        Returns:
+            action_probs (numpy.array): The predicted action probabilities, (batch, num_actions)
+        '''
+        if self.inference_backend is not None:
+            if self._inference is None:
+                self._inference = export_model(self.policy_network, self.inference_backend)
+            return np.exp(self._inference(info_states))
+
+        info_states = torch.from_numpy(info_states).float().to(self.device)
 
         with torch.no_grad():
-            log_action_probs = self.policy_network(info_state).cpu().numpy()
+            log_action_probs = self.policy_network(info_states).cpu().numpy()
 
-        action_probs = np.exp(log_action_probs)[0]
+        return np.exp(log_action_probs)
 
-        return action_probs
+    def set_inference_backend(self, backend=None):
+        ''' Act with exported copies of the average policy network and of the
+            Q-network, see `rlcard.agents.inference`. The copies are exported
+            again after every training step. Call it again after loading weights
+            into the networks from outside the agent.
 
-    def _add_transition(self, state, probs):
+        Args:
+            backend (str): 'numpy', 'torchscript', 'int8' or None to act with torch
+        '''
+        if backend is not None and backend not in BACKENDS:
+            raise ValueError('Unknown backend {}, expected one of {}'.format(backend, BACKENDS))
+        self.inference_backend = backend
+        self._inference = None
+        self._rl_agent.set_inference_backend(backend)
+
+    def _add_transition(self, state, action):
         ''' Adds the new transition to the reservoir buffer.
 
-        Transitions are in the form (state, probs).
+        Transitions are in the form (state, action) of the best response.
 
         Args:
             state (numpy.array): The state.
-            probs (numpy.array): The probabilities of each action.
+            action (int): The action id of the best response.
         '''
-        transition = Transition(
-                info_state=state,
-                action_probs=probs)
-        self._reservoir_buffer.add(transition)
+        self._reservoir_buffer.add(state, action)
 
     def train_sl(self):
         ''' Compute the loss on sampled transitions and perform a avg-network update.
@@ -266,35 +345,35 @@ class NFSPAgent(object):
                 len(self._reservoir_buffer) < self._min_buffer_size_to_learn):
             return None
 
-        transitions = self._reservoir_buffer.sample(self._batch_size)
-        info_states = [t.info_state for t in transitions]
-        action_probs = [t.action_probs for t in transitions]
+        info_states, actions = self._reservoir_buffer.sample(self._batch_size)
 
         self.policy_network_optimizer.zero_grad()
         self.policy_network.train()
 
         # (batch, state_size)
-        info_states = torch.from_numpy(np.array(info_states)).float().to(self.device)
+        info_states = torch.from_numpy(info_states).float().to(self.device)
 
-        # (batch, num_actions)
-        eval_action_probs = torch.from_numpy(np.array(action_probs)).float().to(self.device)
+        # (batch, 1)
+        actions = torch.from_numpy(actions).long().to(self.device).unsqueeze(-1)
 
         # (batch, num_actions)
         log_forecast_action_probs = self.policy_network(info_states)
 
-        ce_loss = - (eval_action_probs * log_forecast_action_probs).sum(dim=-1).mean()
+        # The cross-entropy with the one-hot best responses
+        ce_loss = - log_forecast_action_probs.gather(-1, actions).mean()
         ce_loss.backward()
 
         self.policy_network_optimizer.step()
         ce_loss = ce_loss.item()
         self.policy_network.eval()
+        self._inference = None
 
         self.train_t += 1
 
         if self.save_path and self.train_t % self.save_every == 0:
             # To preserve every checkpoint separately, 
             # add another argument to the function call parameterized by self.train_t
-            self.save_checkpoint(self.save_path)
+            self.save_checkpoint(self.save_path, background=True)
             print("\nINFO - Saved model checkpoint.")
 
         return ce_loss
@@ -361,17 +440,20 @@ class NFSPAgent(object):
         agent.policy_network.eval()
         agent.policy_network_optimizer = torch.optim.Adam(agent.policy_network.parameters(), lr=agent._sl_learning_rate)
         agent.policy_network_optimizer.load_state_dict(checkpoint['policy_network_optimizer'])
-        agent._rl_agent.from_checkpoint(checkpoint['rl_agent'])
+        agent._rl_agent = DQNAgent.from_checkpoint(checkpoint['rl_agent'])
         agent._rl_agent.set_device(agent.device)
         return agent
         
-    def save_checkpoint(self, path, filename='checkpoint_nfsp.pt'):
-        ''' Save the model checkpoint (all attributes)
+    def save_checkpoint(self, path, filename='checkpoint_nfsp.pt', background=False):
+        ''' Save the model checkpoint (all attributes). The arrays of the reservoir buffer
+            and of the replay memory are written to .npy files next to it, read it with
+            `rlcard.utils.checkpoint.read_checkpoint`
 
         Args:
             path (str): the path to save the model
+            background (bool): write on a background thread, from a copy of the current state
         '''
-        torch.save(self.checkpoint_attributes(), os.path.join(path, filename))
+        write_checkpoint(self.checkpoint_attributes(), os.path.join(path, filename), background)
         
 
 class AveragePolicyNetwork(nn.Module):
@@ -454,8 +536,10 @@ class AveragePolicyNetwork(nn.Module):
 class ReservoirBuffer(object):
     ''' Allows uniform sampling over a stream of data.
 
-    This class supports the storage of arbitrary elements, such as observation
-    tensors, integer actions, etc.
+    The buffer holds the states and the int action ids of the best
+    responses in preallocated arrays, allocated at the first add. Once it
+    is full, the number of adds to skip before the next replacement is
+    drawn at once (Algorithm L), instead of one random number per add.
 
     See https://en.wikipedia.org/wiki/Reservoir_sampling for more details.
     '''
@@ -464,22 +548,61 @@ class ReservoirBuffer(object):
         ''' Initialize the buffer.
         '''
         self._reservoir_buffer_capacity = reservoir_buffer_capacity
-        self._data = []
+        self._info_states = None
+        self._actions = None
+        self.clear()
+
+    def clear(self):
+        ''' Clear the buffer
+        '''
+        self._size = 0
         self._add_calls = 0
+        # The add call that replaces an element next, and the weight of Algorithm L
+        self._next_replace = None
+        self._w = None
+
+    def _allocate(self, info_state):
+        info_state = np.asarray(info_state)
+        # The network computes in float32
+        dtype = np.float32 if info_state.dtype == np.float64 else info_state.dtype
+        self._info_states = np.zeros((self._reservoir_buffer_capacity,) + info_state.shape, dtype=dtype)
+        self._actions = np.zeros(self._reservoir_buffer_capacity, dtype=np.int32)
+
+    def _skip(self):
+        ''' Draw the next add call that replaces an element
+        '''
+        capacity = self._reservoir_buffer_capacity
+        self._w *= np.exp(np.log(1.0 - np.random.random_sample()) / capacity)
+        skip = np.floor(np.log(1.0 - np.random.random_sample()) / np.log1p(-self._w)) if self._w < 1 else 0
+        self._next_replace += int(skip) + 1
 
-    def add(self, element):
-        ''' Potentially adds `element` to the reservoir buffer.
+    def add(self, info_state, action):
+        ''' Potentially adds a transition to the reservoir buffer.
 
         Args:
-            element (object): data to be added to the reservoir buffer.
+            info_state (numpy.array): The state
+            action (int): The action id of the best response
         '''
-        if len(self._data) < self._reservoir_buffer_capacity:
-            self._data.append(element)
-        else:
-            idx = np.random.randint(0, self._add_calls + 1)
-            if idx < self._reservoir_buffer_capacity:
-                self._data[idx] = element
+        capacity = self._reservoir_buffer_capacity
         self._add_calls += 1
+        if capacity <= 0:
+            return
+        if self._info_states is None:
+            self._allocate(info_state)
+        if self._size < capacity:
+            idx = self._size
+            self._size += 1
+            if self._size == capacity:
+                self._w = 1.0
+                self._next_replace = self._add_calls
+                self._skip()
+        elif self._add_calls == self._next_replace:
+            idx = np.random.randint(capacity)
+            self._skip()
+        else:
+            return
+        self._info_states[idx] = info_state
+        self._actions[idx] = action
 
     def sample(self, num_samples):
         ''' Returns `num_samples` uniformly sampled from the buffer.
@@ -488,39 +611,67 @@ class ReservoirBuffer(object):
             num_samples (int): The number of samples to draw.
 
         Returns:
-            An iterable over `num_samples` random elements of the buffer.
+            info_states (numpy.array): (num_samples, state_shape) the states
+            actions (numpy.array): (num_samples,) the action ids
 
         Raises:
             ValueError: If there are less than `num_samples` elements in the buffer
         '''
-        if len(self._data) < num_samples:
+        if self._size < num_samples:
             raise ValueError("{} elements could not be sampled from size {}".format(
-                    num_samples, len(self._data)))
-        return random.sample(self._data, num_samples)
-
-    def clear(self):
-        ''' Clear the buffer
-        '''
-        self._data = []
-        self._add_calls = 0
+                    num_samples, self._size))
+        indices = np.array(random.sample(range(self._size), num_samples), dtype=np.int64)
+        return self._info_states[indices], self._actions[indices]
         
     def checkpoint_attributes(self):
+        # Arrays, which `write_checkpoint` writes to .npy files
         return {
-            'data': self._data,
+            'info_states': self._info_states[:self._size] if self._info_states is not None else np.zeros(0),
+            'actions': self._actions[:self._size] if self._actions is not None else np.zeros(0, dtype=np.int32),
             'add_calls': self._add_calls,
+            'next_replace': self._next_replace,
+            'w': self._w,
             'reservoir_buffer_capacity': self._reservoir_buffer_capacity,
         }
         
     @classmethod
     def from_checkpoint(cls, checkpoint):
         reservoir_buffer = cls(checkpoint['reservoir_buffer_capacity'])
-        reservoir_buffer._data = checkpoint['data']
+        capacity = reservoir_buffer._reservoir_buffer_capacity
+        if 'data' in checkpoint:
+            # A list of transitions with one-hot action probabilities
+            info_states = np.array([t.info_state for t in checkpoint['data']])
+            actions = np.array([np.argmax(t.action_probs) for t in checkpoint['data']], dtype=np.int32)
+        elif 'action_probs' in checkpoint:
+            info_states, actions = checkpoint['info_states'], np.argmax(checkpoint['action_probs'], axis=-1)
+        else:
+            info_states, actions = checkpoint['info_states'], checkpoint['actions']
+        size = min(len(info_states), capacity)
+        if isinstance(info_states, np.memmap) and size == capacity:
+            # A full buffer mapped copy-on-write by `read_checkpoint`
+            reservoir_buffer._info_states = info_states
+            reservoir_buffer._actions = np.asarray(actions, dtype=np.int32)
+        elif size > 0:
+            reservoir_buffer._allocate(info_states[0])
+            reservoir_buffer._info_states[:size] = info_states[:size]
+            reservoir_buffer._actions[:size] = actions[:size]
+        reservoir_buffer._size = size
         reservoir_buffer._add_calls = checkpoint['add_calls']
+        if size == capacity and capacity > 0:
+            if checkpoint.get('next_replace') is not None:
+                reservoir_buffer._next_replace = checkpoint['next_replace']
+                reservoir_buffer._w = checkpoint['w']
+            else:
+                # Start the skips again with the acceptance rate of the stream so far
+                reservoir_buffer._w = capacity / max(reservoir_buffer._add_calls, capacity)
+                reservoir_buffer._next_replace = reservoir_buffer._add_calls
+                reservoir_buffer._skip()
         return reservoir_buffer
 
     def __len__(self):
-        return len(self._data)
+        return self._size
 
     def __iter__(self):
-        return iter(self._data)
+        for i in range(self._size):
+            yield self._info_states[i], int(self._actions[i])
 
@@ -11,6 +11,12 @@ class NFSPAgentPettingZoo(NFSPAgent):
     def eval_step(self, state):
         return super().eval_step(wrap_state(state))
 
+    def step_batch(self, states):
+        return super().step_batch([wrap_state(state) for state in states])
+
+    def eval_step_batch(self, states):
+        return super().eval_step_batch([wrap_state(state) for state in states])
+
     def feed(self, ts):
         state, action, reward, next_state, done = tuple(ts)
         state = wrap_state(state)
@@ -26,6 +32,12 @@ class DQNAgentPettingZoo(DQNAgent):
     def eval_step(self, state):
         return super().eval_step(wrap_state(state))
 
+    def step_batch(self, states):
+        return super().step_batch([wrap_state(state) for state in states])
+
+    def eval_step_batch(self, states):
+        return super().eval_step_batch([wrap_state(state) for state in states])
+
     def feed(self, ts):
         state, action, reward, next_state, done = tuple(ts)
         state = wrap_state(state)
@@ -40,3 +52,9 @@ class RandomAgentPettingZoo(RandomAgent):
 
     def eval_step(self, state):
         return super().eval_step(wrap_state(state))
+
+    def step_batch(self, states):
+        return super().step_batch([wrap_state(state) for state in states])
+
+    def eval_step_batch(self, states):
+        return super().eval_step_batch([wrap_state(state) for state in states])
@@ -45,3 +45,31 @@ class RandomAgent(object):
         info['probs'] = {state['raw_legal_actions'][i]: probs[list(state['legal_actions'].keys())[i]] for i in range(len(state['legal_actions']))}
 
         return self.step(state), info
+
+    def step_batch(self, states):
+        ''' Predict the actions of a batch of states in generating training data.
+
+        Args:
+            states (list): A list of state dicts
+
+        Returns:
+            actions (list): The actions predicted (randomly chosen) by the random agent
+        '''
+        return [self.step(state) for state in states]
+
+    def eval_step_batch(self, states):
+        ''' Predict the actions of a batch of states for evaluation.
+
+        Args:
+            states (list): A list of state dicts
+
+        Returns:
+            actions (list): The actions predicted (randomly chosen) by the random agent
+            infos (list): The list of dictionaries containing action probabilities
+        '''
+        actions, infos = [], []
+        for state in states:
+            action, info = self.eval_step(state)
+            actions.append(action)
+            infos.append(info)
+        return actions, infos
@@ -0,0 +1,326 @@
+''' CFR and CFR+ over a game tree flattened into arrays
+
+The tree of a small game is enumerated once. The nodes are numbered in
+breadth-first order, so the nodes of a depth are contiguous and the
+children of a node are contiguous, and an iteration is a few NumPy
+passes over the depths instead of a recursion through the environment.
+'''
+import os
+import json
+
+import numpy as np
+
+from rlcard.games.base import CHANCE
+
+TERMINAL, CHANCE_NODE, DECISION = 0, 1, 2
+
+
+class FlatTree(object):
+    ''' The arrays of an enumerated game tree
+
+    Every node has a `parent`, the `action` that leads to it from its
+    parent and the probability `chance_prob` of that action if the parent
+    is a chance node. Decision nodes have a `player` and an `infoset`.
+    Terminal nodes have the `utility` of every player.
+    '''
+
+    def __init__(self, tree):
+        ''' Enumerate a game tree
+
+        Args:
+            tree (GameTree): The tree of a small game, e.g., `LeducholdemTree`
+        '''
+        self.num_players = tree.num_players
+        self.num_actions = tree.num_actions
+        self.infoset_keys = []
+        self.infoset_ids = {}
+        infoset_players = []
+        infoset_legal = []
+
+        # Depth-first enumeration: node -> (parent, action, chance_prob, kind, player, infoset, utility)
+        nodes = []
+        children = []
+
+        def visit(parent, action, chance_prob):
+            node = len(nodes)
+            children.append([])
+            if parent >= 0:
+                children[parent].append(node)
+            if tree.is_over():
+                nodes.append((parent, action, chance_prob, TERMINAL, -1, -1, tree.payoffs()))
+                return
+            player = tree.current_player()
+            if player == CHANCE:
+                nodes.append((parent, action, chance_prob, CHANCE_NODE, -1, -1, None))
+                for outcome, prob in tree.chance_outcomes():
+                    tree.apply(outcome)
+                    visit(node, outcome, prob)
+                    tree.undo()
+                return
+            key = tree.infoset_key(player)
+            legal_actions = tree.legal_action_ids()
+            if key not in self.infoset_ids:
+                self.infoset_ids[key] = len(self.infoset_keys)
+                self.infoset_keys.append(key)
+                infoset_players.append(player)
+                legal = np.zeros(self.num_actions, dtype=np.bool_)
+                legal[legal_actions] = True
+                infoset_legal.append(legal)
+            nodes.append((parent, action, chance_prob, DECISION, player, self.infoset_ids[key], None))
+            for action_id in legal_actions:
+                tree.apply(action_id)
+                visit(node, action_id, 1.0)
+                tree.undo()
+
+        visit(-1, -1, 1.0)
+
+        # Renumber breadth-first
+        order = [0]
+        level_ends = []
+        start = 0
+        while start < len(order):
+            end = len(order)
+            level_ends.append(end)
+            for node in order[start:end]:
+                order.extend(children[node])
+            start = end
+        new_id = np.empty(len(nodes), dtype=np.int64)
+        new_id[order] = np.arange(len(nodes))
+
+        self.num_nodes = len(nodes)
+        self.parent = np.array([new_id[nodes[i][0]] if nodes[i][0] >= 0 else -1 for i in order], dtype=np.int64)
+        self.action = np.array([nodes[i][1] for i in order], dtype=np.int64)
+        self.chance_prob = np.array([nodes[i][2] for i in order], dtype=np.float64)
+        self.kind = np.array([nodes[i][3] for i in order], dtype=np.int8)
+        self.player = np.array([nodes[i][4] for i in order], dtype=np.int64)
+        self.infoset = np.array([nodes[i][5] for i in order], dtype=np.int64)
+        self.utility = np.zeros((self.num_nodes, self.num_players))
+        for n, i in enumerate(order):
+            if nodes[i][6] is not None:
+                self.utility[n] = nodes[i][6]
+        self.infoset_player = np.array(infoset_players, dtype=np.int64)
+        self.legal = np.array(infoset_legal, dtype=np.bool_).reshape(-1, self.num_actions)
+        self.num_infosets = len(self.infoset_keys)
+
+        # The nodes of depth d are levels[d]:levels[d + 1]
+        self.levels = np.array([0] + level_ends, dtype=np.int64)
+        self.depth = len(level_ends)
+        # The infoset and the player of the parent of every decision child
+        self.parent_infoset = np.where(self.parent >= 0, self.infoset[np.maximum(self.parent, 0)], -1)
+        self.parent_player = np.where(self.parent >= 0, self.player[np.maximum(self.parent, 0)], -1)
+        self.is_decision_child = self.parent_infoset >= 0
+        self.edge_index = np.where(self.is_decision_child, self.parent_infoset * self.num_actions + self.action, 0)
+        # The first child of every internal node of a level, for summing the values of the children
+        self.child_starts = []
+        for d in range(self.depth - 1):
+            lo, hi = self.levels[d + 1], self.levels[d + 2]
+            parents = self.parent[lo:hi]
+            first = np.flatnonzero(np.r_[True, parents[1:] != parents[:-1]])
+            self.child_starts.append((parents[first], first))
+
+    def edge_weights(self, policy):
+        ''' Get the probability of reaching every node from its parent
+
+        Args:
+            policy (numpy.array): The (num_infosets, num_actions) policy
+
+        Returns:
+            (numpy.array): The probability of the action of a decision
+                parent, or the chance probability
+        '''
+        weights = self.chance_prob.copy()
+        weights[self.is_decision_child] = policy.reshape(-1)[self.edge_index[self.is_decision_child]]
+        return weights
+
+    def reach(self, weights):
+        ''' Get the contribution of every player and of chance to the reach probability
+
+        Args:
+            weights (numpy.array): The edge weights
+
+        Returns:
+            (numpy.array): (num_players + 1, num_nodes), the last row is chance
+        '''
+        reach = np.ones((self.num_players + 1, self.num_nodes))
+        rows = np.where(self.is_decision_child, self.parent_player, self.num_players)
+        for d in range(1, self.depth):
+            lo, hi = self.levels[d], self.levels[d + 1]
+            reach[:, lo:hi] = reach[:, self.parent[lo:hi]]
+            reach[rows[lo:hi], np.arange(lo, hi)] *= weights[lo:hi]
+        return reach
+
+    def values(self, weights):
+        ''' Get the expected utility of every node for every player
+
+        Args:
+            weights (numpy.array): The edge weights
+
+        Returns:
+            (numpy.array): (num_nodes, num_players)
+        '''
+        values = self.utility.copy()
+        for d in range(self.depth - 2, -1, -1):
+            lo, hi = self.levels[d + 1], self.levels[d + 2]
+            parents, first = self.child_starts[d]
+            weighted = values[lo:hi] * weights[lo:hi, None]
+            values[parents] = np.add.reduceat(weighted, first, axis=0)
+        return values
+
+
+def regret_matching(regrets, legal):
+    ''' Get the policy of every infoset from its cumulative regrets
+
+    Args:
+        regrets (numpy.array): (num_infosets, num_actions)
+        legal (numpy.array): (num_infosets, num_actions) legal action mask
+
+    Returns:
+        (numpy.array): The policy, uniform over the legal actions without positive regret
+    '''
+    positive = np.maximum(regrets, 0) * legal
+    total = positive.sum(axis=1, keepdims=True)
+    uniform = legal / legal.sum(axis=1, keepdims=True)
+    return np.where(total > 0, positive / np.where(total > 0, total, 1), uniform)
+
+
+class VectorizedCFRAgent():
+    ''' Implement CFR and CFR+ over a flattened game tree
+    '''
+
+    def __init__(self, env, model_path='./vectorized_cfr_model', plus=True, tree=None):
+        ''' Initilize Agent
+
+        Args:
+            env (Env): Env class, leduc-holdem if no tree is given
+            model_path (str): The directory of the saved model
+            plus (bool): True for CFR+, i.e., regrets floored at zero and linear
+                averaging. Vanilla CFR otherwise.
+            tree (GameTree): The game tree to solve, e.g., `LeducholdemTree`
+        '''
+        self.use_raw = False
+        self.env = env
+        self.model_path = model_path
+        self.plus = plus
+        if tree is None:
+            if env.name != 'leduc-holdem':
+                raise ValueError('No game tree for {}, please pass one'.format(env.name))
+            from rlcard.games.leducholdem.tree import LeducholdemTree
+            tree = LeducholdemTree(env.num_players)
+        self.tree = FlatTree(tree)
+        self.key_from_state = tree.key_from_state
+
+        self.regrets = np.zeros((self.tree.num_infosets, self.tree.num_actions))
+        self.average_policy = np.zeros((self.tree.num_infosets, self.tree.num_actions))
+        self.policy = regret_matching(self.regrets, self.tree.legal)
+        self.iteration = 0
+
+    def train(self):
+        ''' Do one iteration of CFR, updating the players in turn
+        '''
+        self.iteration += 1
+        tree = self.tree
+        weight = self.iteration if self.plus else 1
+        decision = tree.is_decision_child
+        size = tree.num_infosets * tree.num_actions
+        for player_id in range(tree.num_players):
+            weights = tree.edge_weights(self.policy)
+            reach = tree.reach(weights)
+            values = tree.values(weights)[:, player_id]
+
+            # The children of the decisions of the player
+            children = np.flatnonzero(decision & (tree.parent_player == player_id))
+            parents = tree.parent[children]
+            counterfactual_reach = np.prod(np.delete(reach[:, parents], player_id, axis=0), axis=0)
+            regrets = counterfactual_reach * (values[children] - values[parents])
+            self.regrets += np.bincount(tree.edge_index[children], weights=regrets,
+                                        minlength=size).reshape(self.regrets.shape)
+            if self.plus:
+                np.maximum(self.regrets, 0, out=self.regrets)
+            policy = weight * reach[player_id, parents] * weights[children]
+            self.average_policy += np.bincount(tree.edge_index[children], weights=policy,
+                                               minlength=size).reshape(self.average_policy.shape)
+
+            mask = tree.infoset_player == player_id
+            self.policy[mask] = regret_matching(self.regrets[mask], tree.legal[mask])
+
+    def get_average_policy(self):
+        ''' Get the normalized average policy
+
+        Returns:
+            (numpy.array): (num_infosets, num_actions), uniform over the legal
+                actions of the infosets that were never reached
+        '''
+        total = self.average_policy.sum(axis=1, keepdims=True)
+        uniform = self.tree.legal / self.tree.legal.sum(axis=1, keepdims=True)
+        return np.where(total > 0, self.average_policy / np.where(total > 0, total, 1), uniform)
+
+    def action_probs(self, state, policy):
+        ''' Obtain the action probabilities of a state of the environment
+
+        Args:
+            state (dict): The state
+            policy (numpy.array): The used policy
+
+        Returns:
+            (numpy.array): The probabilities of all the actions
+        '''
+        infoset = self.tree.infoset_ids.get(self.key_from_state(state))
+        legal_actions = list(state['legal_actions'].keys())
+        probs = np.zeros(self.tree.num_actions)
+        if infoset is None:
+            probs[legal_actions] = 1.0 / len(legal_actions)
+        else:
+            probs[legal_actions] = policy[infoset, legal_actions]
+            probs /= probs.sum()
+        return probs
+
+    def step(self, state):
+        ''' Sample an action from the current policy
+        '''
+        probs = self.action_probs(state, self.policy)
+        return np.random.choice(len(probs), p=probs)
+
+    def eval_step(self, state):
+        ''' Given a state, predict action based on average policy
+
+        Args:
+            state (dict): State of the environment
+
+        Returns:
+            action (int): Predicted action
+            info (dict): A dictionary containing information
+        '''
+        probs = self.action_probs(state, self.get_average_policy())
+        action = np.random.choice(len(probs), p=probs)
+
+        info = {}
+        info['probs'] = {state['raw_legal_actions'][i]: float(probs[action_id])
+                         for i, action_id in enumerate(state['legal_actions'])}
+
+        return action, info
+
+    def save(self):
+        ''' Save model
+        '''
+        if not os.path.exists(self.model_path):
+            os.makedirs(self.model_path)
+        np.savez(os.path.join(self.model_path, 'tables.npz'),
+                 regrets=self.regrets, average_policy=self.average_policy, iteration=self.iteration)
+        with open(os.path.join(self.model_path, 'infosets.json'), 'w') as f:
+            json.dump({'plus': self.plus, 'infoset_keys': self.tree.infoset_keys}, f)
+
+    def load(self):
+        ''' Load model
+        '''
+        if not os.path.exists(self.model_path):
+            return
+        with open(os.path.join(self.model_path, 'infosets.json')) as f:
+            saved = json.load(f)
+        if saved['infoset_keys'] != self.tree.infoset_keys:
+            raise ValueError('{} was trained on a different game tree'.format(self.model_path))
+        self.plus = saved['plus']
+        tables = np.load(os.path.join(self.model_path, 'tables.npz'))
+        self.regrets = tables['regrets']
+        self.average_policy = tables['average_policy']
+        self.iteration = int(tables['iteration'])
+        self.policy = regret_matching(self.regrets, self.tree.legal)
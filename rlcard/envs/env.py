@@ -1,5 +1,10 @@
+from collections import namedtuple
+
 from rlcard.utils import *
 
+# A snapshot of an environment, see `Env.snapshot`
+EnvSnapshot = namedtuple('EnvSnapshot', ['game', 'np_random', 'timestep', 'action_recorder'])
+
 class Env(object):
     '''
     The base Env class. For all the environments in RLCard,
@@ -107,6 +112,39 @@ class Env(object):
 
         return state, player_id
 
+    def snapshot(self, history=False):
+        ''' Take a snapshot of the current game, to go back to it with `restore`
+
+        Args:
+            history (bool): Include the step back history of the game, for
+                `step_back` after `restore`. Without it the snapshot is small.
+
+        Returns:
+            (EnvSnapshot): A picklable snapshot of the game, the state of the
+                random generator, the timestep and the action record
+        '''
+        return EnvSnapshot(self.game.snapshot(history), self.np_random.get_state(), self.timestep, list(self.action_recorder))
+
+    def restore(self, snapshot):
+        ''' Restore a snapshot taken with `snapshot`, possibly in another process
+
+        Args:
+            snapshot (EnvSnapshot): The snapshot
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (dict): The state of the current player
+                (int): The ID of the current player
+        '''
+        self.game.restore(snapshot.game)
+        self.np_random.set_state(snapshot.np_random)
+        self.timestep = snapshot.timestep
+        self.action_recorder = list(snapshot.action_recorder)
+
+        player_id = self.get_player_id()
+        return self.get_state(player_id), player_id
+
     def set_agents(self, agents):
         '''
         Set the agents that will interact with the environment.
@@ -1,5 +1,8 @@
 ''' Game-related base classes
 '''
+import io
+import pickle
+
 class Card:
     '''
     Card stores the suit and rank of a single card
@@ -50,3 +53,155 @@ class Card:
             string: the combination of suit and rank of a card. Eg: 1S, 2H, AD, BJ, RJ...
         '''
         return self.suit+self.rank
+
+class _GamePickler(pickle.Pickler):
+    ''' Pickle the state of a game by reference to the game itself, its
+        random generator and the shared objects, e.g., singleton cards
+    '''
+
+    def __init__(self, file, game, shared):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.game = game
+        self.shared = {id(obj): i for i, obj in enumerate(shared)}
+
+    def persistent_id(self, obj):
+        if obj is self.game:
+            return 'game'
+        if obj is self.game.np_random:
+            return 'np_random'
+        return self.shared.get(id(obj))
+
+class _GameUnpickler(pickle.Unpickler):
+
+    def __init__(self, file, game, shared):
+        super().__init__(file)
+        self.game = game
+        self.shared = shared
+
+    def persistent_load(self, pid):
+        if pid == 'game':
+            return self.game
+        if pid == 'np_random':
+            return self.game.np_random
+        return self.shared[pid]
+
+def snapshot_game(game, shared=(), history=False):
+    ''' Take a snapshot of the state of a game
+
+    The snapshot is a pickled copy of the attributes of the game. The random
+    generator is not copied: the objects of the game refer to the random
+    generator of the game that restores the snapshot. The state of the
+    random generator is saved by `Env.snapshot`.
+
+    The step back history is left out unless `history` is set. Some engines
+    keep deep copies of the game in it, which would make every snapshot grow
+    with the game. A game restored without it cannot step back.
+
+    Args:
+        game (object): The game
+        shared (list): Module-level objects that the engine compares by
+            identity. They are stored as references, not copied.
+        history (bool): Include the step back history
+
+    Returns:
+        (bytes): The snapshot, which can be sent to other processes
+    '''
+    excluded = ('np_random', 'allow_step_back') if history else ('np_random', 'allow_step_back', 'history')
+    state = {key: value for key, value in game.__dict__.items() if key not in excluded}
+    buffer = io.BytesIO()
+    _GamePickler(buffer, game, shared).dump(state)
+    return buffer.getvalue()
+
+def restore_game(game, snapshot, shared=()):
+    ''' Restore a game from a snapshot taken with `snapshot_game`
+
+    Args:
+        game (object): A game of the same class and configuration
+        snapshot (bytes): The snapshot
+        shared (list): The shared objects given to `snapshot_game`
+    '''
+    state = _GameUnpickler(io.BytesIO(snapshot), game, shared).load()
+    if 'history' not in state and isinstance(getattr(game, 'history', None), list):
+        # The history of the game before the restore does not apply
+        state['history'] = []
+    game.__dict__.update(state)
+
+# The player of the chance nodes of a game tree
+CHANCE = -1
+
+class GameTree(object):
+    ''' The interface of tabular solvers to a game
+
+    A game tree is walked in place with `apply` and `undo`, without
+    encoding observations. Chance nodes have the player CHANCE and are
+    applied with one of their outcomes. Subclasses set `num_players` and
+    `num_actions`.
+    '''
+
+    def current_player(self):
+        ''' Get the player to act, CHANCE at chance nodes
+        '''
+        raise NotImplementedError
+
+    def is_over(self):
+        ''' Check if the node is terminal
+        '''
+        raise NotImplementedError
+
+    def legal_action_ids(self):
+        ''' Get the ids of the legal actions of the player to act
+
+        Returns:
+            (list): The action ids, as in the environment of the game
+        '''
+        raise NotImplementedError
+
+    def chance_outcomes(self):
+        ''' Get the outcomes of a chance node
+
+        Returns:
+            (list): (outcome, probability) pairs
+        '''
+        raise NotImplementedError
+
+    def infoset_key(self, player):
+        ''' Get the information set of a player
+
+        Args:
+            player (int): The player id
+
+        Returns:
+            (str): A key that is equal for the nodes the player cannot tell apart
+        '''
+        raise NotImplementedError
+
+    def apply(self, action):
+        ''' Take an action id, or an outcome at chance nodes
+        '''
+        raise NotImplementedError
+
+    def undo(self):
+        ''' Undo the last `apply`
+        '''
+        raise NotImplementedError
+
+    def payoffs(self):
+        ''' Get the payoffs of a terminal node
+
+        Returns:
+            (list): The payoff of every player
+        '''
+        raise NotImplementedError
+
+    @staticmethod
+    def key_from_state(state):
+        ''' Get the information set of a state of the environment, for the
+            agents that play a solved tree in the environment
+
+        Args:
+            state (dict): The state returned by the environment
+
+        Returns:
+            (str): The key, equal to `infoset_key` of the player to act
+        '''
+        raise NotImplementedError
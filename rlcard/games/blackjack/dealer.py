@@ -28,10 +28,16 @@ class BlackjackDealer:
 
         Args:
             player_id (int): the target player's id
+
+        Returns:
+            (int): The index in the deck of the card, None with infinite decks
         '''
         idx = self.np_random.choice(len(self.deck))
         card = self.deck[idx]
         if self.num_decks != 0:  # If infinite decks, do not pop card from deck
             self.deck.pop(idx)
+        else:
+            idx = None
         # card = self.deck.pop()
         player.hand.append(card)
+        return idx
@@ -1,9 +1,9 @@
-from copy import deepcopy
 import numpy as np
 
 from rlcard.games.blackjack import Dealer
 from rlcard.games.blackjack import Player
 from rlcard.games.blackjack import Judger
+from rlcard.games.base import snapshot_game, restore_game
 
 class BlackjackGame:
 
@@ -64,22 +64,23 @@ class BlackjackGame:
             int: next plater's id
         '''
         if self.allow_step_back:
-            p = deepcopy(self.players[self.game_pointer])
-            d = deepcopy(self.dealer)
-            w = deepcopy(self.winner)
-            self.history.append((d, p, w))
+            # Record the values that the step may change. The cards dealt
+            # during the step are added to the record by `_deal_card`
+            p = self.players[self.game_pointer]
+            self.history.append((self.game_pointer, p.status, p.score, self.dealer.status, self.dealer.score,
+                                 dict(self.winner), []))
 
         next_state = {}
         # Play hit
         if action != "stand":
-            self.dealer.deal_card(self.players[self.game_pointer])
+            self._deal_card(self.players[self.game_pointer])
             self.players[self.game_pointer].status, self.players[self.game_pointer].score = self.judger.judge_round(
                 self.players[self.game_pointer])
             if self.players[self.game_pointer].status == 'bust':
                 # game over, set up the winner, print out dealer's hand # If bust, pass the game pointer
                 if self.game_pointer >= self.num_players - 1:
                     while self.judger.judge_score(self.dealer.hand) < 17:
-                        self.dealer.deal_card(self.dealer)
+                        self._deal_card(self.dealer)
                     self.dealer.status, self.dealer.score = self.judger.judge_round(self.dealer)
                     for i in range(self.num_players):
                         self.judger.judge_game(self, i) 
@@ -93,7 +94,7 @@ class BlackjackGame:
                 self.players[self.game_pointer])
             if self.game_pointer >= self.num_players - 1:
                 while self.judger.judge_score(self.dealer.hand) < 17:
-                    self.dealer.deal_card(self.dealer)
+                    self._deal_card(self.dealer)
                 self.dealer.status, self.dealer.score = self.judger.judge_round(self.dealer)
                 for i in range(self.num_players):
                     self.judger.judge_game(self, i) 
@@ -128,12 +129,48 @@ class BlackjackGame:
         Returns:
             Status (bool): check if the step back is success or not
         '''
-        #while len(self.history) > 0:
         if len(self.history) > 0:
-            self.dealer, self.players[self.game_pointer], self.winner = self.history.pop()
+            self.game_pointer, status, score, self.dealer.status, self.dealer.score, self.winner, dealt = self.history.pop()
+            self.players[self.game_pointer].status = status
+            self.players[self.game_pointer].score = score
+            # Put the dealt cards back where they were drawn from
+            for player, index in reversed(dealt):
+                card = player.hand.pop()
+                if index is not None:
+                    self.dealer.deck.insert(index, card)
             return True
         return False
 
+    def _deal_card(self, player):
+        ''' Deal a card to a player or the dealer and record where it was drawn from
+
+        Args:
+            player (object): The player or the dealer
+        '''
+        index = self.dealer.deal_card(player)
+        if self.allow_step_back:
+            self.history[-1][-1].append((player, index))
+
+    def snapshot(self, history=False):
+        ''' Take a snapshot of the game
+
+        Args:
+            history (bool): Include the step back history, for `step_back` after
+                `restore`. The history makes the snapshot large and slow.
+
+        Returns:
+            (bytes): A picklable snapshot. The random generator is not included.
+        '''
+        return snapshot_game(self, history=history)
+
+    def restore(self, snapshot):
+        ''' Restore the game from a snapshot taken with `snapshot`
+
+        Args:
+            snapshot (bytes): The snapshot
+        '''
+        restore_game(self, snapshot)
+
     def get_num_players(self):
         ''' Return the number of players in blackjack
 
@@ -11,6 +11,7 @@ import numpy as np
 from .judger import BridgeJudger
 from .round import BridgeRound
 from .utils.action_event import ActionEvent, CallActionEvent, PlayCardAction
+from rlcard.games.base import snapshot_game, restore_game
 
 
 class BridgeGame:
@@ -54,6 +55,25 @@ class BridgeGame:
         next_state = self.get_state(player_id=next_player_id)
         return next_state, next_player_id
 
+    def snapshot(self, history=False) -> bytes:
+        ''' Take a snapshot of the game
+
+        Args:
+            history (bool): Unused, the game keeps no step back history
+
+        Returns:
+            (bytes): A picklable snapshot. The random generator is not included.
+        '''
+        return snapshot_game(self, history=history)
+
+    def restore(self, snapshot: bytes):
+        ''' Restore the game from a snapshot taken with `snapshot`
+
+        Args:
+            snapshot (bytes): The snapshot
+        '''
+        restore_game(self, snapshot)
+
     def get_num_players(self) -> int:
         ''' Return the number of players in the game
         '''
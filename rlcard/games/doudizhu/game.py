@@ -9,6 +9,7 @@ from rlcard.games.doudizhu.utils import cards2str, doudizhu_sort_card, CARD_RANK
 from rlcard.games.doudizhu import Player
 from rlcard.games.doudizhu import Round
 from rlcard.games.doudizhu import Judger
+from rlcard.games.base import snapshot_game, restore_game
 
 
 class DoudizhuGame:
@@ -144,6 +145,26 @@ class DoudizhuGame:
         '''
         return self.round.current_player
 
+    def snapshot(self, history=False):
+        ''' Take a snapshot of the game
+
+        Args:
+            history (bool): Include the step back history, for `step_back` after
+                `restore`. The history makes the snapshot large and slow.
+
+        Returns:
+            (bytes): A picklable snapshot. The random generator is not included.
+        '''
+        return snapshot_game(self, history=history)
+
+    def restore(self, snapshot):
+        ''' Restore the game from a snapshot taken with `snapshot`
+
+        Args:
+            snapshot (bytes): The snapshot
+        '''
+        restore_game(self, snapshot)
+
     def get_num_players(self):
         ''' Return the number of players in doudizhu
 
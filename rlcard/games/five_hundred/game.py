@@ -11,6 +11,8 @@ import numpy as np
 from .judger import FiveHundredJudger
 from .round import FiveHundredRound
 from .utils.action_event import ActionEvent, CallActionEvent, PlayCardAction
+from .utils.five_hundred_card import FiveHundredCard
+from rlcard.games.base import snapshot_game, restore_game
 
 
 class FiveHundredGame:
@@ -71,6 +73,31 @@ class FiveHundredGame:
         next_state = self.get_state(player_id=next_player_id)
         return next_state, next_player_id
 
+    def snapshot(self, history=False) -> tuple:
+        ''' Take a snapshot of the game
+
+        The cards are module-level objects that the engine compares by
+        identity, and the suit of the joker is set when it is played, so the
+        cards are stored as references and the suit of the joker is saved.
+
+        Args:
+            history (bool): Unused, the game keeps no step back history
+
+        Returns:
+            (tuple): A picklable snapshot. The random generator is not included.
+        '''
+        return snapshot_game(self, shared=_shared_cards(), history=history), FiveHundredCard.card(42).suit
+
+    def restore(self, snapshot: tuple):
+        ''' Restore the game from a snapshot taken with `snapshot`
+
+        Args:
+            snapshot (tuple): The snapshot
+        '''
+        state, joker_suit = snapshot
+        restore_game(self, state, shared=_shared_cards())
+        FiveHundredCard.card(42).suit = joker_suit
+
     def get_num_players(self) -> int:
         ''' Return the number of players in the game
         '''
@@ -116,3 +143,5 @@ class FiveHundredGame:
         state["scores"] = list(self.scores)
         return state
 
+def _shared_cards():
+    return [FiveHundredCard.card(card_id) for card_id in range(43)]
@@ -0,0 +1,116 @@
+'''
+    File name: five_hundred/tree.py
+    Date created: 10/19/2026
+'''
+
+from rlcard.games.base import GameTree, CHANCE
+
+from .game import FiveHundredGame
+from .round import FiveHundredRound
+from .utils.action_event import ActionEvent
+from .utils.five_hundred_card import FiveHundredCard
+
+
+class FiveHundredTree(GameTree):
+    ''' One hand of five hundred as a game tree for tabular solvers
+
+    The deal is 43 chance nodes, one per card: ten cards for every player
+    in turn and then the three cards of the kitty. The hand is over after
+    the ten tricks and the payoff of a player is the points of its team.
+    The engine has no step_back, so `undo` restores a snapshot of the game.
+    The tree is meant for sampling solvers such as `MCCFRAgent`.
+    '''
+
+    def __init__(self, dealer_id=0):
+        ''' Initialize the tree at the root, before the deal
+
+        Args:
+            dealer_id (int): The dealer, the player on the left bids first
+        '''
+        self.num_players = 4
+        self.num_actions = ActionEvent.get_num_actions()
+        self.dealer_id = dealer_id
+        self.game = FiveHundredGame()
+        self.game.init_game()
+        self.dealt_cards = []
+        # (player, action id, True for the discards that only the declarer sees)
+        self.action_history = []
+        self._snapshots = []
+
+    @property
+    def dealt(self):
+        return len(self.dealt_cards) == 43
+
+    def current_player(self):
+        if not self.dealt:
+            return CHANCE
+        return self.game.round.current_player_id
+
+    def is_over(self):
+        # The game starts the next hand when the ten tricks are played
+        return self.dealt and self.game.num_rounds > 1
+
+    def legal_action_ids(self):
+        return [action.action_id for action in self.game.judger.get_legal_actions()]
+
+    def chance_outcomes(self):
+        remaining = [card_id for card_id in range(43) if card_id not in self.dealt_cards]
+        return [(card_id, 1.0 / len(remaining)) for card_id in remaining]
+
+    def infoset_key(self, player):
+        ''' Get the information set of a player
+
+        The key has the cards dealt to the player, the kitty for the
+        declarer and the moves, with the discards of the declarer hidden
+        from the other players.
+        '''
+        hand = sorted(self.dealt_cards[10 * player:10 * player + 10])
+        kitty = []
+        round = self.game.round
+        if round.is_bidding_over() and round.get_declarer().player_id == player:
+            kitty = sorted(self.dealt_cards[40:])
+        moves = ['x' if hidden and p != player else str(action_id)
+                 for p, action_id, hidden in self.action_history]
+        return '{}|{}|{}|{}'.format(player, ','.join(map(str, hand)), ','.join(map(str, kitty)), ','.join(moves))
+
+    def apply(self, action):
+        if not self.dealt:
+            self.dealt_cards.append(action)
+            if self.dealt:
+                self._deal()
+            return
+        game = self.game
+        self._snapshots.append(game.snapshot())
+        player = game.round.current_player_id
+        self.action_history.append((player, action, game.round.round_phase == 'discard'))
+        game.step(ActionEvent.from_action_id(action))
+
+    def undo(self):
+        if not self._snapshots:
+            self.dealt_cards.pop()
+            return
+        self.game.restore(self._snapshots.pop())
+        self.action_history.pop()
+
+    def payoffs(self):
+        return [self.game.scores[player % 2] for player in range(self.num_players)]
+
+    def _deal(self):
+        ''' Start the hand with the chosen cards
+        '''
+        game = self.game
+        game.board_id = self.dealer_id
+        game.round = FiveHundredRound(board_id=self.dealer_id, np_random=game.np_random)
+        game.num_rounds = 1
+        game.scores = (0, 0)
+        game.actions = []
+        game.judger.reset()
+        # Also forgets the suit that the joker was played as
+        FiveHundredCard.get_deck()
+        cards = [FiveHundredCard.card(card_id) for card_id in self.dealt_cards]
+        round = game.round
+        for i, player in enumerate(round.players):
+            player.hand = cards[10 * i:10 * i + 10]
+        round.kitty = cards[40:]
+        round.dealer.stock_pile = []
+        round.dealer.shuffled_deck[:] = cards
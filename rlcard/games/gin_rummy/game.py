@@ -12,6 +12,7 @@ from .judge import GinRummyJudge
 from .utils.settings import Settings, DealerForRound
 
 from .utils.action_event import *
+from rlcard.games.base import snapshot_game, restore_game
 
 
 class GinRummyGame:
@@ -78,6 +79,25 @@ class GinRummyGame:
         '''
         raise NotImplementedError
 
+    def snapshot(self, history=False):
+        ''' Take a snapshot of the game
+
+        Args:
+            history (bool): Unused, the game keeps no step back history
+
+        Returns:
+            (bytes): A picklable snapshot. The random generator is not included.
+        '''
+        return snapshot_game(self, history=history)
+
+    def restore(self, snapshot):
+        ''' Restore the game from a snapshot taken with `snapshot`
+
+        Args:
+            snapshot (bytes): The snapshot
+        '''
+        restore_game(self, snapshot)
+
     def get_num_players(self):
         ''' Return the number of players in the game
         '''
@@ -107,16 +107,8 @@ class LeducholdemGame(Game):
                 (int): next plater's id
         '''
         if self.allow_step_back:
-            # First snapshot the current state
-            r = copy(self.round)
-            r_raised = copy(self.round.raised)
-            gp = self.game_pointer
-            r_c = self.round_counter
-            d_deck = copy(self.dealer.deck)
-            p = copy(self.public_card)
-            ps = [copy(self.players[i]) for i in range(self.num_players)]
-            ps_hand = [copy(self.players[i].hand) for i in range(self.num_players)]
-            self.history.append((r, r_raised, gp, r_c, d_deck, p, ps, ps_hand))
+            # First record the values that the step may change
+            self.history.append(self._step_record())
 
         # Then we proceed to the next round
         self.game_pointer = self.round.proceed_round(self.players, action)
@@ -184,10 +176,33 @@ class LeducholdemGame(Game):
             (bool): True if the game steps back successfully
         '''
         if len(self.history) > 0:
-            self.round, r_raised, self.game_pointer, self.round_counter, d_deck, self.public_card, self.players, ps_hand = self.history.pop()
-            self.round.raised = r_raised
-            self.dealer.deck = d_deck
-            for i, hand in enumerate(ps_hand):
-                self.players[i].hand = hand
+            self._undo_step(self.history.pop())
             return True
         return False
+
+    def _step_record(self):
+        ''' Record the values that a step may change
+
+        Returns:
+            (tuple): The record that `_undo_step` applies in reverse
+        '''
+        r = self.round
+        return (self.game_pointer, self.round_counter, self.public_card,
+                (r.game_pointer, copy(r.raised), r.have_raised, r.not_raise_num, r.player_folded, r.raise_amount),
+                [(p.in_chips, p.status) for p in self.players])
+
+    def _undo_step(self, record):
+        ''' Restore the values recorded by `_step_record`
+
+        Args:
+            record (tuple): The record of the step to undo
+        '''
+        self.game_pointer, self.round_counter, public_card, round_values, player_values = record
+        r = self.round
+        r.game_pointer, r.raised, r.have_raised, r.not_raise_num, r.player_folded, r.raise_amount = round_values
+        for p, (in_chips, status) in zip(self.players, player_values):
+            p.in_chips, p.status = in_chips, status
+        # The public card was dealt from the end of the deck
+        if public_card is None and self.public_card is not None:
+            self.dealer.deck.append(self.public_card)
+        self.public_card = public_card
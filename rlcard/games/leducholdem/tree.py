@@ -0,0 +1,146 @@
+''' Leduc Hold'em as an explicit game tree for tabular solvers
+'''
+import itertools
+
+from rlcard.games.base import Card, GameTree, CHANCE
+from rlcard.games.leducholdem import Game
+
+
+class LeducholdemTree(GameTree):
+    ''' Walk the tree of Leduc Hold'em with `apply` and `undo`
+
+    The deal is a chance node at the root, over the small blind and the
+    private cards, and the public card is a chance node after the first
+    betting round. The betting is played by the engine with step/step_back.
+    '''
+
+    actions = ['call', 'raise', 'fold', 'check']
+
+    def __init__(self, num_players=2):
+        ''' Initialize the tree at the root, before the deal
+
+        Args:
+            num_players (int): The number of players
+        '''
+        self.num_players = num_players
+        self.num_actions = len(self.actions)
+        self.game = Game(allow_step_back=True, num_players=num_players)
+        self.game.init_game()
+        self.cards = [Card('S', 'J'), Card('H', 'J'), Card('S', 'Q'), Card('H', 'Q'), Card('S', 'K'), Card('H', 'K')]
+        # Deals are (small blind, the card index of every player)
+        self.deals = [(s,) + hands for s in range(num_players)
+                      for hands in itertools.permutations(range(len(self.cards)), num_players)]
+        self.dealt = False
+        # The betting action that ends the first round, waiting for the public card
+        self.pending = None
+        # The (player, action) pairs taken, as in the action record of the environment
+        self.action_history = []
+        self._undo_stack = []
+
+    def current_player(self):
+        if not self.dealt or self.pending is not None:
+            return CHANCE
+        return self.game.game_pointer
+
+    def is_over(self):
+        return self.dealt and self.pending is None and self.game.is_over()
+
+    def legal_action_ids(self):
+        return [self.actions.index(a) for a in self.game.get_legal_actions()]
+
+    def chance_outcomes(self):
+        if not self.dealt:
+            return [(i, 1.0 / len(self.deals)) for i in range(len(self.deals))]
+        deck = self.game.dealer.deck
+        return [(i, 1.0 / len(deck)) for i in range(len(deck))]
+
+    def infoset_key(self, player):
+        ''' Get the information set of a player, with the suits dropped
+
+        Args:
+            player (int): The player id
+
+        Returns:
+            (str): The key, equal to `key_from_state` of the player's state in the environment
+        '''
+        public_card = self.game.public_card
+        return self._make_key(player, self.game.players[player].hand.rank,
+                              public_card.rank if public_card else '', self.action_history)
+
+    @staticmethod
+    def key_from_state(state):
+        raw_obs = state['raw_obs']
+        public_card = raw_obs['public_card']
+        return LeducholdemTree._make_key(raw_obs['current_player'], raw_obs['hand'][1],
+                                         public_card[1] if public_card else '', state['action_record'])
+
+    @staticmethod
+    def _make_key(player, rank, public_rank, action_history):
+        return '{}|{}|{}|{}'.format(player, rank, public_rank,
+                                    ','.join('{}{}'.format(p, a) for p, a in action_history))
+
+    def apply(self, action):
+        game = self.game
+        if not self.dealt:
+            self._deal(self.deals[action])
+            self.dealt = True
+            self._undo_stack.append(('deal',))
+        elif self.pending is not None:
+            # Put the public card at the end of the deck, where the dealer deals from
+            deck = game.dealer.deck
+            deck.append(deck.pop(action))
+            game.step(self.pending)
+            self._undo_stack.append(('public', action, self.pending))
+            self.pending = None
+        else:
+            raw_action = self.actions[action]
+            self.action_history.append((game.game_pointer, raw_action))
+            public_card = game.public_card
+            game.step(raw_action)
+            if public_card is None and game.public_card is not None:
+                # The public card is chosen by the next chance node
+                game.step_back()
+                self.pending = raw_action
+                self._undo_stack.append(('pending',))
+            else:
+                self._undo_stack.append(('step',))
+
+    def undo(self):
+        game = self.game
+        record = self._undo_stack.pop()
+        if record[0] == 'deal':
+            self.dealt = False
+        elif record[0] == 'public':
+            game.step_back()
+            deck = game.dealer.deck
+            deck.insert(record[1], deck.pop())
+            self.pending = record[2]
+        elif record[0] == 'pending':
+            self.pending = None
+            self.action_history.pop()
+        else:
+            game.step_back()
+            self.action_history.pop()
+
+    def payoffs(self):
+        return list(self.game.get_payoffs())
+
+    def _deal(self, deal):
+        ''' Start the game with a chosen small blind and private cards
+        '''
+        game = self.game
+        s, hands = deal[0], deal[1:]
+        for player, card in zip(game.players, hands):
+            player.hand = self.cards[card]
+            player.in_chips = 0
+            player.status = 'alive'
+        game.dealer.deck = [card for i, card in enumerate(self.cards) if i not in hands]
+        game.players[(s + 1) % self.num_players].in_chips = game.big_blind
+        game.players[s].in_chips = game.small_blind
+        game.public_card = None
+        game.game_pointer = s
+        game.round.raise_amount = game.raise_amount
+        game.round.player_folded = None
+        game.round.start_new_round(game_pointer=s, raised=[p.in_chips for p in game.players])
+        game.round_counter = 0
+        game.history = []
@@ -1,10 +1,11 @@
-from copy import deepcopy, copy
+from copy import copy
 import numpy as np
 
 from rlcard.games.limitholdem import Dealer
 from rlcard.games.limitholdem import Player, PlayerStatus
 from rlcard.games.limitholdem import Judger
 from rlcard.games.limitholdem import Round
+from rlcard.games.base import snapshot_game, restore_game
 
 
 class LimitHoldemGame:
@@ -116,15 +117,8 @@ class LimitHoldemGame:
                 (int): next player id
         """
         if self.allow_step_back:
-            # First snapshot the current state
-            r = deepcopy(self.round)
-            b = self.game_pointer
-            r_c = self.round_counter
-            d = deepcopy(self.dealer)
-            p = deepcopy(self.public_cards)
-            ps = deepcopy(self.players)
-            rn = copy(self.history_raise_nums)
-            self.history.append((r, b, r_c, d, p, ps, rn))
+            # First record the values that the step may change
+            self.history.append(self._step_record())
 
         # Then we proceed to the next round
         self.game_pointer = self.round.proceed_round(self.players, action)
@@ -163,11 +157,62 @@ class LimitHoldemGame:
             (bool): True if the game steps back successfully
         """
         if len(self.history) > 0:
-            self.round, self.game_pointer, self.round_counter, self.dealer, self.public_cards, \
-                self.players, self.history_raises_nums = self.history.pop()
+            self._undo_step(self.history.pop())
             return True
         return False
 
+    def _step_record(self):
+        """
+        Record the values that a step may change. Only the scalars and the
+        short lists are copied, the cards are put back from the public cards.
+
+        Returns:
+            (tuple): The record that `_undo_step` applies in reverse
+        """
+        r = self.round
+        return (self.game_pointer, self.round_counter, len(self.public_cards), copy(self.history_raise_nums),
+                (r.game_pointer, copy(r.raised), r.have_raised, r.not_raise_num, r.player_folded, r.raise_amount),
+                [(p.in_chips, p.status) for p in self.players])
+
+    def _undo_step(self, record):
+        """
+        Restore the values recorded by `_step_record`
+
+        Args:
+            record (tuple): The record of the step to undo
+        """
+        self.game_pointer, self.round_counter, num_public_cards, self.history_raise_nums, round_values, \
+            player_values = record
+        r = self.round
+        r.game_pointer, r.raised, r.have_raised, r.not_raise_num, r.player_folded, r.raise_amount = round_values
+        for p, (in_chips, status) in zip(self.players, player_values):
+            p.in_chips, p.status = in_chips, status
+        # The public cards were dealt from the end of the deck
+        while len(self.public_cards) > num_public_cards:
+            self.dealer.deck.append(self.public_cards.pop())
+
+    def snapshot(self, history=False):
+        """
+        Take a snapshot of the game
+
+        Args:
+            history (bool): Include the step back history, for `step_back` after
+                `restore`. The history makes the snapshot large and slow.
+
+        Returns:
+            (bytes): A picklable snapshot. The random generator is not included.
+        """
+        return snapshot_game(self, history=history)
+
+    def restore(self, snapshot):
+        """
+        Restore the game from a snapshot taken with `snapshot`
+
+        Args:
+            snapshot (bytes): The snapshot
+        """
+        restore_game(self, snapshot)
+
     def get_num_players(self):
         """
         Return the number of players in limit texas holdem
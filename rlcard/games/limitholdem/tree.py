@@ -0,0 +1,167 @@
+''' Limit Texas Hold'em as a game tree for tabular solvers
+'''
+from rlcard.games.base import GameTree, CHANCE
+from rlcard.games.limitholdem import Game, PlayerStatus
+from rlcard.utils.utils import init_standard_deck
+
+
+class LimitholdemTree(GameTree):
+    ''' Walk the tree of Limit Texas Hold'em with `apply` and `undo`
+
+    The small blind and every card are chance nodes: the small blind first,
+    then the private cards one by one, and the public cards one by one
+    after the betting round that reveals them. The betting is played by
+    the engine with step/step_back. The tree is far too large to enumerate,
+    it is meant for sampling solvers such as `MCCFRAgent`.
+    '''
+
+    actions = ['call', 'raise', 'fold', 'check']
+
+    def __init__(self, num_players=2):
+        ''' Initialize the tree at the root, before the deal
+
+        Args:
+            num_players (int): The number of players
+        '''
+        self.num_players = num_players
+        self.num_actions = len(self.actions)
+        self.game = Game(allow_step_back=True, num_players=num_players)
+        self.game.init_game()
+        self.cards = init_standard_deck()
+        self.small_blind = None
+        # The indices of the private cards dealt so far, two per player in turn
+        self.private_cards = []
+        # The betting action that ends a round, waiting for the public cards
+        self.pending = None
+        self.num_pending = 0
+        self.pending_cards = []
+        self.action_history = []
+        self._undo_stack = []
+
+    @property
+    def dealt(self):
+        return len(self.private_cards) == 2 * self.num_players
+
+    def current_player(self):
+        if not self.dealt or self.pending is not None:
+            return CHANCE
+        return self.game.game_pointer
+
+    def is_over(self):
+        return self.dealt and self.pending is None and self.game.is_over()
+
+    def legal_action_ids(self):
+        return [self.actions.index(a) for a in self.game.get_legal_actions()]
+
+    def chance_outcomes(self):
+        if self.small_blind is None:
+            return [(s, 1.0 / self.num_players) for s in range(self.num_players)]
+        if not self.dealt:
+            remaining = [i for i in range(len(self.cards)) if i not in self.private_cards]
+            return [(i, 1.0 / len(remaining)) for i in remaining]
+        deck = self.game.dealer.deck
+        return [(i, 1.0 / len(deck)) for i in range(len(deck))]
+
+    def infoset_key(self, player):
+        ''' Get the information set of a player
+
+        The seat is left out: the order of the betting tells the position.
+        '''
+        hand = [card.get_index() for card in self.game.players[player].hand]
+        public_cards = [card.get_index() for card in self.game.public_cards]
+        return self._make_key(hand, public_cards, [action for _, action in self.action_history])
+
+    @staticmethod
+    def key_from_state(state):
+        raw_obs = state['raw_obs']
+        return LimitholdemTree._make_key(raw_obs['hand'], raw_obs['public_cards'],
+                                         [action for _, action in state['action_record']])
+
+    @staticmethod
+    def _make_key(hand, public_cards, actions):
+        # The order of the private cards and of the flop is not information
+        return '{}|{}{}|{}'.format(''.join(sorted(hand)), ''.join(sorted(public_cards[:3])),
+                                   ''.join(public_cards[3:]), ','.join(actions))
+
+    def apply(self, action):
+        game = self.game
+        if self.small_blind is None:
+            self.small_blind = action
+            self._undo_stack.append(('small_blind',))
+        elif not self.dealt:
+            self.private_cards.append(action)
+            if self.dealt:
+                self._deal()
+            self._undo_stack.append(('private',))
+        elif self.pending is not None:
+            deck = game.dealer.deck
+            self.pending_cards.append(deck.pop(action))
+            if len(self.pending_cards) < self.num_pending:
+                self._undo_stack.append(('public', action, None))
+                return
+            # The dealer deals from the end of the deck
+            deck.extend(reversed(self.pending_cards))
+            game.step(self.pending)
+            self._undo_stack.append(('public', action, (self.pending, self.pending_cards)))
+            self.pending = None
+            self.pending_cards = []
+        else:
+            raw_action = self.actions[action]
+            self.action_history.append((game.game_pointer, raw_action))
+            num_public_cards = len(game.public_cards)
+            game.step(raw_action)
+            if len(game.public_cards) > num_public_cards:
+                # The public cards are chosen by the next chance nodes
+                self.num_pending = len(game.public_cards) - num_public_cards
+                game.step_back()
+                self.pending = raw_action
+                self._undo_stack.append(('pending',))
+            else:
+                self._undo_stack.append(('step',))
+
+    def undo(self):
+        game = self.game
+        record = self._undo_stack.pop()
+        if record[0] == 'small_blind':
+            self.small_blind = None
+        elif record[0] == 'private':
+            self.private_cards.pop()
+        elif record[0] == 'public':
+            deck = game.dealer.deck
+            if record[2] is not None:
+                self.pending, self.pending_cards = record[2]
+                self.num_pending = len(self.pending_cards)
+                game.step_back()
+                del deck[-self.num_pending:]
+            deck.insert(record[1], self.pending_cards.pop())
+        elif record[0] == 'pending':
+            self.pending = None
+            self.action_history.pop()
+        else:
+            game.step_back()
+            self.action_history.pop()
+
+    def payoffs(self):
+        return list(self.game.get_payoffs())
+
+    def _deal(self):
+        ''' Start the game with the chosen small blind and private cards
+        '''
+        game = self.game
+        for i, player in enumerate(game.players):
+            player.hand = [self.cards[self.private_cards[2 * i]], self.cards[self.private_cards[2 * i + 1]]]
+            player.in_chips = 0
+            player.status = PlayerStatus.ALIVE
+        game.dealer.deck = [card for i, card in enumerate(self.cards) if i not in self.private_cards]
+        s = self.small_blind
+        b = (s + 1) % self.num_players
+        game.players[b].in_chips = game.big_blind
+        game.players[s].in_chips = game.small_blind
+        game.public_cards = []
+        game.game_pointer = (b + 1) % self.num_players
+        game.round.raise_amount = game.raise_amount
+        game.round.player_folded = None
+        game.round.start_new_round(game_pointer=game.game_pointer, raised=[p.in_chips for p in game.players])
+        game.round_counter = 0
+        game.history = []
+        game.history_raise_nums = [0 for _ in range(4)]
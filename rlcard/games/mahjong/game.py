@@ -5,6 +5,7 @@ from rlcard.games.mahjong import Dealer
 from rlcard.games.mahjong import Player
 from rlcard.games.mahjong import Round
 from rlcard.games.mahjong import Judger
+from rlcard.games.base import snapshot_game, restore_game
 
 class MahjongGame:
 
@@ -115,6 +116,26 @@ class MahjongGame:
         '''
         return 38
 
+    def snapshot(self, history=False):
+        ''' Take a snapshot of the game
+
+        Args:
+            history (bool): Include the step back history, for `step_back` after
+                `restore`. The history makes the snapshot large and slow.
+
+        Returns:
+            (bytes): A picklable snapshot. The random generator is not included.
+        '''
+        return snapshot_game(self, history=history)
+
+    def restore(self, snapshot):
+        ''' Restore the game from a snapshot taken with `snapshot`
+
+        Args:
+            snapshot (bytes): The snapshot
+        '''
+        restore_game(self, snapshot)
+
     def get_num_players(self):
         ''' return the number of players in Mahjong
 
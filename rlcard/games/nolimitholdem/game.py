@@ -1,7 +1,7 @@
 from enum import Enum
 
 import numpy as np
-from copy import deepcopy
+from copy import copy
 from rlcard.games.limitholdem import Game
 from rlcard.games.limitholdem import PlayerStatus
 
@@ -133,14 +133,8 @@ class NolimitholdemGame(Game):
             raise Exception('Action not allowed')
 
         if self.allow_step_back:
-            # First snapshot the current state
-            r = deepcopy(self.round)
-            b = self.game_pointer
-            r_c = self.round_counter
-            d = deepcopy(self.dealer)
-            p = deepcopy(self.public_cards)
-            ps = deepcopy(self.players)
-            self.history.append((r, b, r_c, d, p, ps))
+            # First record the values that the step may change
+            self.history.append(self._step_record())
 
         # Then we proceed to the next round
         self.game_pointer = self.round.proceed_round(self.players, action)
@@ -216,11 +210,39 @@ class NolimitholdemGame(Game):
             (bool): True if the game steps back successfully
         """
         if len(self.history) > 0:
-            self.round, self.game_pointer, self.round_counter, self.dealer, self.public_cards, self.players = self.history.pop()
-            self.stage = Stage(self.round_counter)
+            self._undo_step(self.history.pop())
             return True
         return False
 
+    def _step_record(self):
+        """
+        Record the values that a step may change
+
+        Returns:
+            (tuple): The record that `_undo_step` applies in reverse
+        """
+        r = self.round
+        return (self.game_pointer, self.round_counter, self.stage, len(self.public_cards), self.dealer.pot,
+                (r.game_pointer, copy(r.raised), r.not_raise_num, r.not_playing_num),
+                [(p.in_chips, p.remained_chips, p.status) for p in self.players])
+
+    def _undo_step(self, record):
+        """
+        Restore the values recorded by `_step_record`
+
+        Args:
+            record (tuple): The record of the step to undo
+        """
+        self.game_pointer, self.round_counter, self.stage, num_public_cards, self.dealer.pot, round_values, \
+            player_values = record
+        r = self.round
+        r.game_pointer, r.raised, r.not_raise_num, r.not_playing_num = round_values
+        for p, (in_chips, remained_chips, status) in zip(self.players, player_values):
+            p.in_chips, p.remained_chips, p.status = in_chips, remained_chips, status
+        # The public cards were dealt from the end of the deck
+        while len(self.public_cards) > num_public_cards:
+            self.dealer.deck.append(self.public_cards.pop())
+
     def get_num_players(self):
         """
         Return the number of players in no limit texas holdem
@@ -4,6 +4,7 @@ import numpy as np
 from rlcard.games.uno import Dealer
 from rlcard.games.uno import Player
 from rlcard.games.uno import Round
+from rlcard.games.base import snapshot_game, restore_game
 
 
 class UnoGame:
@@ -126,6 +127,26 @@ class UnoGame:
 
         return self.round.get_legal_actions(self.players, self.round.current_player)
 
+    def snapshot(self, history=False):
+        ''' Take a snapshot of the game
+
+        Args:
+            history (bool): Include the step back history, for `step_back` after
+                `restore`. The history makes the snapshot large and slow.
+
+        Returns:
+            (bytes): A picklable snapshot. The random generator is not included.
+        '''
+        return snapshot_game(self, history=history)
+
+    def restore(self, snapshot):
+        ''' Restore the game from a snapshot taken with `snapshot`
+
+        Args:
+            snapshot (bytes): The snapshot
+        '''
+        restore_game(self, snapshot)
+
     def get_num_players(self):
         ''' Return the number of players in Limit Texas Hold'em
 
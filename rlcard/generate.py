@@ -0,0 +1,309 @@
+''' Generate offline datasets of trajectories with a pool of processes
+
+    python -m rlcard.generate --env leduc-holdem \
+        --agents leduc-holdem-cfr random \
+        --num_episodes 1000000 --output_dir data/leduc --num_workers 8
+
+Every seat gets an agent: `random`, a model id of `rlcard.models`, a
+checkpoint file saved with `torch.save` (a whole agent or the dict of
+`checkpoint_attributes`), or a directory of a CFR model.
+
+The episodes are split into parts of `--part_size` episodes. Part k is
+played with the k-th seed derived from `--seed`, so the data does not
+depend on the number of workers. It is written to `<output_dir>/part_<k>`
+as a dataset readable by `rlcard.utils.dataset.TrajectoryDataset`. The
+manifest `<output_dir>/manifest.json` records the settings, the agent
+versions and the seed and size of every finished part. Running the same
+command again skips the finished parts, so a crashed run can be resumed.
+'''
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import multiprocessing as mp
+
+import rlcard
+from rlcard.utils.dataset import TrajectoryWriter
+from rlcard.utils.parallel_utils import derive_seeds, seed_worker
+
+MANIFEST_FILE = 'manifest.json'
+
+# The environment of a worker process, built once by `_init_worker`
+_worker = {}
+
+
+def load_agent(spec, env, position, device='cpu'):
+    ''' Load the agent of one seat
+
+    Args:
+        spec (str): `random`, a model id, a checkpoint file or a CFR model directory
+        env (Env): The environment
+        position (int): The seat, used to pick the agent of a model
+        device (str): The torch device of the checkpoints
+
+    Returns:
+        (object): The agent
+    '''
+    if spec == 'random':
+        from rlcard.agents import RandomAgent
+        return RandomAgent(num_actions=env.num_actions)
+    if os.path.isfile(spec):
+        from rlcard.utils.checkpoint import read_checkpoint
+        agent = read_checkpoint(spec, map_location=device)
+        if isinstance(agent, dict):
+            if agent.get('agent_type') == 'NFSPAgent':
+                from rlcard.agents import NFSPAgent
+                agent = NFSPAgent.from_checkpoint(checkpoint=agent)
+            else:
+                from rlcard.agents import DQNAgent
+                agent = DQNAgent.from_checkpoint(checkpoint=agent)
+        if hasattr(agent, 'set_device'):
+            agent.set_device(device)
+        return agent
+    if os.path.isdir(spec):
+        from rlcard.agents import CFRAgent
+        from rlcard.utils.policy_table import TABLE_FILE
+        agent = CFRAgent(env, spec)
+        if os.path.exists(os.path.join(spec, TABLE_FILE)):
+            agent.load_table()
+        else:
+            agent.load()
+        return agent
+    from rlcard import models
+    return models.load(spec).agents[position]
+
+def agent_version(spec):
+    ''' Identify the version of an agent
+
+    Args:
+        spec (str): The agent, as given to `load_agent`
+
+    Returns:
+        (str): The sha256 of the checkpoint files, or the rlcard version for
+            `random` and the models of `rlcard.models`
+    '''
+    if os.path.isfile(spec):
+        paths = [spec]
+    elif os.path.isdir(spec):
+        paths = [os.path.join(spec, name) for name in sorted(os.listdir(spec))]
+        paths = [path for path in paths if os.path.isfile(path)]
+    else:
+        return 'rlcard-' + rlcard.__version__
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return 'sha256:' + digest.hexdigest()
+
+def part_path(output_dir, part):
+    return os.path.join(output_dir, 'part_{:05d}'.format(part))
+
+def _write_manifest(output_dir, manifest):
+    tmp_path = os.path.join(output_dir, MANIFEST_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(output_dir, MANIFEST_FILE))
+
+def _init_worker(env_id, config, agent_specs, device):
+    env = rlcard.make(env_id, config=config)
+    env.set_agents([load_agent(spec, env, position, device) for position, spec in enumerate(agent_specs)])
+    _worker['env'] = env
+
+def _generate_part(output_dir, part, num_episodes, seed, player_ids, is_training, obs_dtype):
+    ''' Play the games of one part and write them to a fresh dataset
+
+    Returns:
+        (tuple): The part and the number of rows written
+    '''
+    env = _worker['env']
+    seed_worker(seed)
+    env.seed(seed)
+    path = part_path(output_dir, part)
+    # Remove what a crashed run left behind
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    with TrajectoryWriter(path, env.num_actions, obs_dtype=obs_dtype) as writer:
+        for _ in range(num_episodes):
+            trajectories, payoffs = env.run(is_training=is_training)
+            writer.add_trajectories(trajectories, payoffs, player_ids)
+    return part, writer.index['num_rows']
+
+def generate(env_id,
+             agent_specs,
+             num_episodes,
+             output_dir,
+             num_workers=None,
+             part_size=10000,
+             seed=0,
+             player_ids=None,
+             is_training=False,
+             obs_dtype=None,
+             config=None,
+             device='cpu',
+             start_method=None,
+             verbose=True):
+    ''' Generate a dataset, or finish the parts missing from a previous run
+
+    Args:
+        env_id (str): The environment id
+        agent_specs (list): The agent of every seat, see `load_agent`
+        num_episodes (int): The number of games to play
+        output_dir (str): The directory of the manifest and the parts
+        num_workers (int): The number of worker processes. Defaults to the CPU count.
+        part_size (int): The number of games of a part
+        seed (int): The master seed
+        player_ids (list): The seats to store. All the seats by default.
+        is_training (bool): Let the agents explore with `step` instead of `eval_step`
+        obs_dtype (str): The dtype of the stored observations, e.g., 'int8'
+        config (dict): The configuration of the environment
+        device (str): The torch device of the checkpoints
+        start_method (str): The multiprocessing start method, e.g., 'fork' or 'spawn'
+        verbose (bool): Print the progress
+
+    Returns:
+        (dict): The manifest
+    '''
+    num_parts = (num_episodes + part_size - 1) // part_size
+    settings = {
+        'env': env_id,
+        'config': config or {},
+        'agents': list(agent_specs),
+        'num_episodes': num_episodes,
+        'part_size': part_size,
+        'seed': seed,
+        'player_ids': None if player_ids is None else list(player_ids),
+        'is_training': is_training,
+        'obs_dtype': obs_dtype,
+    }
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest['settings'] != settings:
+            raise ValueError('{} was generated with different settings: {}'.format(output_dir, manifest['settings']))
+    else:
+        manifest = {
+            'settings': settings,
+            'agent_versions': [agent_version(spec) for spec in agent_specs],
+            'rlcard_version': rlcard.__version__,
+            'parts': {},
+        }
+        _write_manifest(output_dir, manifest)
+
+    seeds = derive_seeds(seed, num_parts)
+    todo = []
+    for part in range(num_parts):
+        if str(part) in manifest['parts']:
+            continue
+        _num = min(part_size, num_episodes - part * part_size)
+        todo.append((output_dir, part, _num, seeds[part], player_ids, is_training, obs_dtype))
+    if verbose:
+        print('{} of {} parts already done, generating {}'.format(num_parts - len(todo), num_parts, len(todo)))
+    if not todo:
+        return manifest
+
+    if num_workers is None:
+        num_workers = mp.cpu_count()
+    num_workers = max(1, min(num_workers, len(todo)))
+    ctx = mp.get_context(start_method)
+    initargs = (env_id, config or {}, list(agent_specs), device)
+    with ctx.Pool(num_workers, initializer=_init_worker, initargs=initargs) as pool:
+        results = pool.imap_unordered(_star_generate_part, todo)
+        for part, num_rows in results:
+            manifest['parts'][str(part)] = {
+                'path': os.path.basename(part_path(output_dir, part)),
+                'seed': seeds[part],
+                'num_episodes': min(part_size, num_episodes - part * part_size),
+                'num_rows': num_rows,
+            }
+            _write_manifest(output_dir, manifest)
+            if verbose:
+                print('part {} done, {} rows ({}/{})'.format(part, num_rows, len(manifest['parts']), num_parts))
+    return manifest
+
+def _star_generate_part(args):
+    return _generate_part(*args)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Offline data generation in RLCard")
+    parser.add_argument(
+        '--env',
+        type=str,
+        default='leduc-holdem',
+    )
+    parser.add_argument(
+        '--agents',
+        nargs='*',
+        default=[
+            'random',
+            'random',
+        ],
+        help='One agent per seat: random, a model id, a checkpoint file or a CFR model directory',
+    )
+    parser.add_argument(
+        '--num_episodes',
+        type=int,
+        default=100000,
+    )
+    parser.add_argument(
+        '--output_dir',
+        type=str,
+        default='experiments/leduc_holdem_data/',
+    )
+    parser.add_argument(
+        '--num_workers',
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        '--part_size',
+        type=int,
+        default=10000,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+    parser.add_argument(
+        '--player_ids',
+        type=int,
+        nargs='*',
+        default=None,
+        help='The seats to store. All the seats by default.',
+    )
+    parser.add_argument(
+        '--is_training',
+        action='store_true',
+        help='Let the agents explore with step instead of eval_step',
+    )
+    parser.add_argument(
+        '--obs_dtype',
+        type=str,
+        default=None,
+    )
+    parser.add_argument(
+        '--device',
+        type=str,
+        default='cpu',
+    )
+
+    args = parser.parse_args()
+
+    generate(
+        args.env,
+        args.agents,
+        args.num_episodes,
+        args.output_dir,
+        num_workers=args.num_workers,
+        part_size=args.part_size,
+        seed=args.seed,
+        player_ids=args.player_ids,
+        is_training=args.is_training,
+        obs_dtype=args.obs_dtype,
+        device=args.device,
+    )
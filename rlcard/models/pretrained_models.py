@@ -17,7 +17,9 @@ class LeducHoldemCFRModel(Model):
         '''
         env = rlcard.make('leduc-holdem')
         self.agent = CFRAgent(env, model_path=os.path.join(ROOT_PATH, 'leduc_holdem_cfr'))
-        self.agent.load()
+        # The average policy is memory-mapped, so loading is instant and the
+        # processes that load the model share its pages
+        self.agent.load_table()
     @property
     def agents(self):
         ''' Get a list of agents for each position in a the game
@@ -2,3 +2,9 @@ from rlcard.utils.logger import Logger
 from rlcard.utils import seeding
 from rlcard.utils.utils import *
 from rlcard.utils.pettingzoo_utils import *
+from rlcard.utils.batch_utils import *
+from rlcard.utils.parallel_utils import *
+from rlcard.utils.sequential_utils import *
+from rlcard.utils.collector import *
+from rlcard.utils.dataset import *
+from rlcard.utils.game_record import *
@@ -0,0 +1,146 @@
+''' Run many games of one environment in lockstep so that the agents
+    can make their decisions in batches
+'''
+from collections import OrderedDict
+
+
+def _act_batch(agent, states, is_training):
+    ''' Ask an agent for the actions of a batch of states. Agents that
+        do not implement the batched API are called once per state.
+
+    Args:
+        agent (object): The agent that makes the decisions
+        states (list): A list of state dicts
+        is_training (boolean): True if for training purpose
+
+    Returns:
+        (list): A list of actions, one per state
+    '''
+    if is_training:
+        if hasattr(agent, 'step_batch'):
+            return agent.step_batch(states)
+        return [agent.step(state) for state in states]
+
+    if hasattr(agent, 'eval_step_batch'):
+        actions, _ = agent.eval_step_batch(states)
+        return actions
+    return [agent.eval_step(state)[0] for state in states]
+
+def run_lockstep(envs, num_games=None, is_training=False):
+    ''' Play games in all the environments in lockstep. At every tick, the
+        pending decisions are grouped by agent and each agent is queried
+        once with all of its states. An environment starts a new game as soon
+        as its current game is over until `num_games` games have been started.
+
+    Args:
+        envs (list): A list of environments of the same game. The agents
+            should be set with `set_agents` in every environment. Sharing the
+            same agent objects across the environments makes the batches larger.
+        num_games (int): The total number of games to play. Defaults to one
+            game per environment.
+        is_training (boolean): True if for training purpose.
+
+    Yields:
+        (tuple) Tuple containing:
+
+            (int): The index of the environment that finished the game
+            (list): The trajectories of the game, same as in `Env.run`
+            (list): The payoffs of the game
+    '''
+    if num_games is None:
+        num_games = len(envs)
+
+    started = 0
+    # Environment index -> (trajectories, state, player_id)
+    active = OrderedDict()
+
+    def start(index):
+        nonlocal started
+        env = envs[index]
+        trajectories = [[] for _ in range(env.num_players)]
+        state, player_id = env.reset()
+        trajectories[player_id].append(state)
+        active[index] = (trajectories, state, player_id)
+        started += 1
+
+    for index in range(min(len(envs), num_games)):
+        start(index)
+
+    while active:
+        # Collect the finished games and restart the environments
+        for index in list(active.keys()):
+            env = envs[index]
+            while index in active and env.is_over():
+                trajectories = active.pop(index)[0]
+                # Add a final state to all the players
+                for player_id in range(env.num_players):
+                    trajectories[player_id].append(env.get_state(player_id))
+                yield index, trajectories, env.get_payoffs()
+                if started < num_games:
+                    start(index)
+
+        # Group the pending decisions by agent
+        groups = OrderedDict()
+        for index, (_, _, player_id) in active.items():
+            agent = envs[index].agents[player_id]
+            if id(agent) not in groups:
+                groups[id(agent)] = (agent, [])
+            groups[id(agent)][1].append(index)
+
+        # One batched query per agent
+        for agent, indices in groups.values():
+            actions = _act_batch(agent, [active[index][1] for index in indices], is_training)
+            for index, action in zip(indices, actions):
+                env = envs[index]
+                trajectories, _, player_id = active[index]
+
+                # Environment steps
+                next_state, next_player_id = env.step(action, agent.use_raw)
+                # Save action
+                trajectories[player_id].append(action)
+
+                # Save state.
+                if not env.game.is_over():
+                    trajectories[next_player_id].append(next_state)
+                active[index] = (trajectories, next_state, next_player_id)
+
+def run_batch(envs, is_training=False):
+    ''' Run one complete game in each of the environments in lockstep
+
+    Args:
+        envs (list): A list of environments of the same game
+        is_training (boolean): True if for training purpose.
+
+    Returns:
+        (tuple) Tuple containing:
+
+            (list): The trajectories of each environment, same as in `Env.run`
+            (list): The payoffs of each environment
+    '''
+    trajectories = [None for _ in envs]
+    payoffs = [None for _ in envs]
+    for index, _trajectories, _payoffs in run_lockstep(envs, len(envs), is_training):
+        trajectories[index] = _trajectories
+        payoffs[index] = _payoffs
+    return trajectories, payoffs
+
+def tournament_batch(envs, num):
+    ''' Evaluate the performance of the agents by playing the games
+        of several environments in lockstep
+
+    Args:
+        envs (list): A list of environments of the same game
+        num (int): The number of games to play.
+
+    Returns:
+        A list of avrage payoffs for each player
+    '''
+    payoffs = [0 for _ in range(envs[0].num_players)]
+    counter = 0
+    for _, _, _payoffs in run_lockstep(envs, num, is_training=False):
+        for i, _ in enumerate(payoffs):
+            payoffs[i] += _payoffs[i]
+        counter += 1
+    for i, _ in enumerate(payoffs):
+        payoffs[i] /= counter
+    return payoffs
@@ -0,0 +1,158 @@
+''' Checkpoints with their arrays in raw .npy files
+
+`torch.save` of the checkpoint attributes of an agent pickles its replay
+or reservoir buffer, which takes minutes for buffers of several GB and
+blocks training. `write_checkpoint` takes the NumPy arrays out of the
+attributes and writes each of them in chunks to a .npy file, in a
+directory next to a small torch file that refers to them. With
+`background=True` the arrays and the rest of the attributes are copied
+when it is called, which is a memory copy, and written by a thread while
+training goes on. `read_checkpoint` maps the arrays back copy-on-write
+instead of reading them.
+
+A checkpoint is never partial: the arrays go to a new directory and the
+torch file that points to it replaces the previous one last.
+'''
+import copy
+import glob
+import inspect
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+
+ARRAY_KEY = '__npy__'
+CHUNK_BYTES = 64 << 20
+
+# torch 2.6 loads only weights by default, and torch before 1.13 has no
+# `weights_only` argument
+_LOAD_KWARGS = {'weights_only': False} if 'weights_only' in inspect.signature(torch.load).parameters else {}
+
+_executor = None
+_pending = None
+
+
+def array_dir_prefix(path):
+    ''' Get the prefix of the array directories of a checkpoint file
+
+    Args:
+        path (str): The checkpoint file, e.g., 'experiments/checkpoint_dqn.pt'
+
+    Returns:
+        (str): e.g., 'experiments/checkpoint_dqn_arrays.'
+    '''
+    return os.path.splitext(path)[0] + '_arrays.'
+
+def write_checkpoint(attributes, path, background=False):
+    ''' Write checkpoint attributes with their arrays in .npy files
+
+    Args:
+        attributes (dict): The attributes, e.g., `DQNAgent.checkpoint_attributes()`.
+            Every non-scalar NumPy array in it or in its nested dicts goes to a file.
+        path (str): The checkpoint file
+        background (bool): Write on a background thread. The checkpoint is what the
+            attributes are now; a previous background write is waited for first.
+
+    Returns:
+        (concurrent.futures.Future): The write if background, else None
+    '''
+    global _executor, _pending
+    if _pending is not None:
+        _pending.result()
+        _pending = None
+    array_dir = array_dir_prefix(path) + str(time.time_ns())
+    arrays = {}
+    skeleton = _split(attributes, arrays, os.path.basename(array_dir))
+    if background:
+        # Snapshot what the training thread goes on changing
+        skeleton = copy.deepcopy(skeleton)
+        arrays = {name: np.array(array) for name, array in arrays.items()}
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoint')
+        _pending = _executor.submit(_write, path, skeleton, array_dir, arrays)
+        return _pending
+    _write(path, skeleton, array_dir, arrays)
+    return None
+
+def wait_for_checkpoint():
+    ''' Wait until the last background write is finished, raising its error if it failed
+    '''
+    global _pending
+    if _pending is not None:
+        pending, _pending = _pending, None
+        pending.result()
+
+def read_checkpoint(path, map_location=None, mmap_mode='c'):
+    ''' Read a checkpoint written by `write_checkpoint` or `torch.save`
+
+    Args:
+        path (str): The checkpoint file
+        map_location: Passed to `torch.load`
+        mmap_mode (str): How to map the arrays, 'c' for copy-on-write arrays that
+            can be changed without changing the files, None to read them
+
+    Returns:
+        (dict): The attributes
+    '''
+    checkpoint = torch.load(path, map_location=map_location, **_LOAD_KWARGS)
+    return _join(checkpoint, os.path.dirname(path), mmap_mode)
+
+def _split(attributes, arrays, array_dir):
+    ''' Replace the arrays of nested dicts with references to their files. The
+        dicts without arrays, e.g., the state dicts of torch, are kept as they are.
+    '''
+    if not isinstance(attributes, dict):
+        return attributes
+    skeleton = {}
+    for key, value in attributes.items():
+        if isinstance(value, np.ndarray) and value.ndim > 0 and value.dtype != object:
+            name = '{}.npy'.format(len(arrays))
+            arrays[name] = value
+            skeleton[key] = {ARRAY_KEY: os.path.join(array_dir, name)}
+        else:
+            skeleton[key] = _split(value, arrays, array_dir)
+    if all(skeleton[key] is value for key, value in attributes.items()):
+        return attributes
+    return skeleton
+
+def _join(skeleton, directory, mmap_mode):
+    if not isinstance(skeleton, dict):
+        return skeleton
+    if ARRAY_KEY in skeleton:
+        path = os.path.join(directory, skeleton[ARRAY_KEY])
+        if mmap_mode is not None and os.path.getsize(path) > 0:
+            array = np.load(path, mmap_mode=mmap_mode)
+            if array.size > 0:
+                return array
+        # Empty arrays cannot be mapped
+        return np.load(path)
+    attributes = {key: _join(value, directory, mmap_mode) for key, value in skeleton.items()}
+    if all(attributes[key] is value for key, value in skeleton.items()):
+        return skeleton
+    return attributes
+
+def _write(path, skeleton, array_dir, arrays):
+    os.makedirs(array_dir)
+    for name, array in arrays.items():
+        _write_npy(os.path.join(array_dir, name), array)
+    tmp_path = path + '.tmp'
+    torch.save(skeleton, tmp_path)
+    os.replace(tmp_path, path)
+    for old_dir in glob.glob(glob.escape(array_dir_prefix(path)) + '*'):
+        if old_dir != array_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+def _write_npy(path, array):
+    ''' Write an array to a .npy file in chunks of rows, without a copy of the whole array
+    '''
+    header = np.lib.format.header_data_from_array_1_0(array)
+    # The chunks are written in C order
+    header['fortran_order'] = False
+    with open(path, 'wb') as f:
+        np.lib.format.write_array_header_2_0(f, header)
+        rows = max(1, CHUNK_BYTES // max(array[:1].nbytes, 1))
+        for start in range(0, len(array), rows):
+            f.write(np.ascontiguousarray(array[start:start + rows]).data)
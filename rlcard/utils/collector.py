@@ -0,0 +1,429 @@
+''' Collect experience in background actor processes for DQN and NFSP
+
+The actors play `Env.run` with a copy of the learning agent, whose weights
+are refreshed from a versioned shared-memory store between episodes, and
+push the reorganized transitions into a bounded ring buffer in shared
+memory. A learner thread drains the ring into `agent.feed`. When the ring
+is full the actors block (backpressure), and transitions generated by
+weights that are more than `max_staleness` versions old are dropped.
+
+Example:
+
+    env.set_agents([agent, RandomAgent(num_actions=env.num_actions)])
+    with ExperienceCollector(env, num_actors=4) as collector:
+        for _ in range(10):
+            collector.wait(10000)
+            with collector.lock:
+                print(tournament(eval_env, 1000), collector.stats())
+'''
+import threading
+import time
+import traceback
+import multiprocessing as mp
+from collections import OrderedDict
+
+import numpy as np
+
+from rlcard.utils.utils import reorganize
+from rlcard.utils.parallel_utils import derive_seeds, seed_worker
+
+
+def _raw_array(ctx, shape, dtype):
+    nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return ctx.RawArray('B', max(nbytes, 1))
+
+def _view(raw, shape, dtype):
+    return np.frombuffer(raw, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+class TransitionRing(object):
+    ''' A bounded multi-producer single-consumer ring of transitions.
+        Every field is a fixed-dtype array in shared memory.
+    '''
+
+    def __init__(self, capacity, state_shape, num_actions, ctx=None):
+        ''' Initialize the ring
+
+        Args:
+            capacity (int): The number of transition slots
+            state_shape (list): The shape of the observations
+            num_actions (int): The number of actions
+            ctx (multiprocessing context): The context used to create the shared objects
+        '''
+        if ctx is None:
+            ctx = mp.get_context()
+        self.capacity = capacity
+        self._specs = OrderedDict(
+            obs=(tuple(state_shape), np.float32),
+            action=((), np.int64),
+            reward=((), np.float32),
+            next_obs=(tuple(state_shape), np.float32),
+            done=((), np.bool_),
+            legal_actions=((num_actions,), np.bool_),
+            version=((), np.int64),
+            best_response=((), np.bool_),
+        )
+        self._raw = {key: _raw_array(ctx, (capacity,)+shape, dtype) for key, (shape, dtype) in self._specs.items()}
+        self._head = ctx.RawValue('q', 0)
+        self._tail = ctx.RawValue('q', 0)
+        self._lock = ctx.Lock()
+        self._free = ctx.Semaphore(capacity)
+        self._filled = ctx.Semaphore(0)
+        self._build_views()
+
+    def _build_views(self):
+        self._arrays = {key: _view(self._raw[key], (self.capacity,)+shape, dtype)
+                        for key, (shape, dtype) in self._specs.items()}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_arrays']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_views()
+
+    def put(self, transition, timeout=None):
+        ''' Write one transition into the ring. Block if the ring is full.
+
+        Args:
+            transition (dict): A dict with a value for every field of the ring
+            timeout (float): The maximum time to wait for a free slot
+
+        Returns:
+            (boolean): False if no slot was freed within the timeout
+        '''
+        if not self._free.acquire(timeout=timeout):
+            return False
+        with self._lock:
+            index = self._head.value % self.capacity
+            for key, array in self._arrays.items():
+                array[index] = transition[key]
+            self._head.value += 1
+        self._filled.release()
+        return True
+
+    def get_many(self, max_num, timeout=None):
+        ''' Read up to `max_num` transitions. Only one consumer is allowed.
+
+        Args:
+            max_num (int): The maximum number of transitions
+            timeout (float): The maximum time to wait for the first transition
+
+        Returns:
+            (dict): Field -> array of the transitions, or None on timeout
+        '''
+        if not self._filled.acquire(timeout=timeout):
+            return None
+        num = 1
+        while num < max_num and self._filled.acquire(block=False):
+            num += 1
+        indices = (self._tail.value + np.arange(num)) % self.capacity
+        batch = {key: array[indices] for key, array in self._arrays.items()}
+        self._tail.value += num
+        for _ in range(num):
+            self._free.release()
+        return batch
+
+    def __len__(self):
+        return self._head.value - self._tail.value
+
+def _policy_modules(agent):
+    ''' The networks that define the acting policy of a DQN or NFSP agent
+    '''
+    if hasattr(agent, '_rl_agent'):
+        return OrderedDict(
+            policy_network=agent.policy_network,
+            q_estimator=agent._rl_agent.q_estimator.qnet,
+        )
+    return OrderedDict(q_estimator=agent.q_estimator.qnet)
+
+def _dqn_agent(agent):
+    return agent._rl_agent if hasattr(agent, '_rl_agent') else agent
+
+class PolicyStore(object):
+    ''' A versioned copy of the policy weights in shared memory
+    '''
+
+    def __init__(self, agent, ctx=None):
+        ''' Allocate the shared weights with the layout of the agent
+
+        Args:
+            agent (object): A DQNAgent or NFSPAgent
+            ctx (multiprocessing context): The context used to create the shared objects
+        '''
+        if ctx is None:
+            ctx = mp.get_context()
+        self._specs = OrderedDict()
+        for name, module in _policy_modules(agent).items():
+            for key, tensor in module.state_dict().items():
+                array = tensor.detach().cpu().numpy()
+                self._specs[(name, key)] = (array.shape, array.dtype)
+        self._raw = {k: _raw_array(ctx, shape, dtype) for k, (shape, dtype) in self._specs.items()}
+        self._version = ctx.RawValue('q', 0)
+        self._total_t = ctx.RawValue('q', 0)
+        self._lock = ctx.Lock()
+        self._build_views()
+
+    def _build_views(self):
+        self._arrays = {k: _view(self._raw[k], shape, dtype) for k, (shape, dtype) in self._specs.items()}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_arrays']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_views()
+
+    @property
+    def version(self):
+        return self._version.value
+
+    def publish(self, agent):
+        ''' Copy the weights of the agent into the store as a new version
+
+        Args:
+            agent (object): The learning agent
+
+        Returns:
+            (int): The new version
+        '''
+        with self._lock:
+            for name, module in _policy_modules(agent).items():
+                for key, tensor in module.state_dict().items():
+                    self._arrays[(name, key)][...] = tensor.detach().cpu().numpy()
+            self._total_t.value = _dqn_agent(agent).total_t
+            self._version.value += 1
+            return self._version.value
+
+    def pull(self, agent, version):
+        ''' Load the latest weights into the agent if they are newer than `version`
+
+        Args:
+            agent (object): The acting copy of the agent
+            version (int): The version currently loaded in the agent
+
+        Returns:
+            (int): The version loaded in the agent
+        '''
+        if self._version.value == version:
+            return version
+        import torch
+        with self._lock:
+            for name, module in _policy_modules(agent).items():
+                module.load_state_dict(OrderedDict(
+                    (key, torch.from_numpy(self._arrays[(name, key)].copy()))
+                    for key in module.state_dict()
+                ))
+            _dqn_agent(agent).total_t = self._total_t.value
+            return self._version.value
+
+def _collector_actor(index, env, player_id, ring, policy_store, counters, stop_event, seed):
+    ''' Play games with the latest published policy and push the transitions
+    '''
+    try:
+        seed_worker(seed)
+        env.seed(seed)
+        agent = env.agents[player_id]
+        version = -1
+        while not stop_event.is_set():
+            version = policy_store.pull(agent, version)
+            if hasattr(agent, 'sample_episode_policy'):
+                agent.sample_episode_policy()
+            best_response = getattr(agent, '_mode', None) == 'best_response'
+
+            trajectories, payoffs = env.run(is_training=True)
+            if hasattr(agent, '_reservoir_buffer'):
+                # The reservoir transitions are rebuilt by the learner
+                agent._reservoir_buffer.clear()
+
+            for state, action, reward, next_state, done in reorganize(trajectories, payoffs)[player_id]:
+                legal_actions = np.zeros(env.num_actions, dtype=np.bool_)
+                legal_actions[list(next_state['legal_actions'].keys())] = True
+                transition = dict(obs=state['obs'], action=action, reward=reward, next_obs=next_state['obs'],
+                                  done=done, legal_actions=legal_actions, version=version,
+                                  best_response=best_response)
+                start = time.time()
+                while not ring.put(transition, timeout=0.1):
+                    if stop_event.is_set():
+                        return
+                with counters['actor_wait_seconds'].get_lock():
+                    counters['actor_wait_seconds'].value += time.time() - start
+                with counters['transitions_produced'].get_lock():
+                    counters['transitions_produced'].value += 1
+            with counters['episodes'].get_lock():
+                counters['episodes'].value += 1
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print('Exception in collector actor {}'.format(index))
+        traceback.print_exc()
+        raise e
+
+class ExperienceCollector(object):
+    ''' Generate experience for a DQNAgent or NFSPAgent in background processes
+        and feed it to the agent in a learner thread
+    '''
+
+    def __init__(self,
+                 env,
+                 player_id=0,
+                 num_actors=2,
+                 ring_capacity=10000,
+                 drain_size=256,
+                 publish_every=100,
+                 max_staleness=10,
+                 seed=None,
+                 start_method='spawn'):
+        ''' Initialize the collector
+
+        Args:
+            env (Env): The environment with the agents set. The agent at
+                `player_id` is the learning agent; the others are copied as is.
+            player_id (int): The position of the learning agent
+            num_actors (int): The number of actor processes
+            ring_capacity (int): The number of transitions the ring can hold
+            drain_size (int): The maximum number of transitions the learner takes at once
+            publish_every (int): Publish the weights every N fed transitions
+            max_staleness (int): Drop transitions from weights older than N versions
+            seed (int): The master seed of the actors
+            start_method (str): The multiprocessing start method
+        '''
+        self.env = env
+        self.player_id = player_id
+        self.agent = env.agents[player_id]
+        self.num_actors = num_actors
+        self.drain_size = drain_size
+        self.publish_every = publish_every
+        self.max_staleness = max_staleness
+        self.seed = seed
+
+        self._ctx = mp.get_context(start_method)
+        self.ring = TransitionRing(ring_capacity, env.state_shape[player_id], env.num_actions, self._ctx)
+        self.policy_store = PolicyStore(self.agent, self._ctx)
+        self.counters = {
+            'episodes': self._ctx.Value('q', 0),
+            'transitions_produced': self._ctx.Value('q', 0),
+            'actor_wait_seconds': self._ctx.Value('d', 0.0),
+        }
+        self.transitions_consumed = 0
+        self.transitions_dropped = 0
+        self._version_lag_sum = 0
+
+        # Hold this lock to use the learning agent while the learner thread runs
+        self.lock = threading.Lock()
+
+        self._stop_event = self._ctx.Event()
+        self._learner_stop = threading.Event()
+        self._consumed = threading.Condition()
+        self._actors = []
+        self._learner = None
+        self._start_time = None
+
+    def start(self):
+        ''' Start the actor processes and the learner thread
+        '''
+        self.policy_store.publish(self.agent)
+        seeds = derive_seeds(self.seed, self.num_actors)
+        for i in range(self.num_actors):
+            actor = self._ctx.Process(
+                target=_collector_actor,
+                args=(i, self.env, self.player_id, self.ring, self.policy_store,
+                      self.counters, self._stop_event, seeds[i]),
+                daemon=True)
+            actor.start()
+            self._actors.append(actor)
+        self._start_time = time.time()
+        self._learner = threading.Thread(target=self._learn, name='collector-learner', daemon=True)
+        self._learner.start()
+
+    def _learn(self):
+        ''' Thread target that drains the ring into the agent
+        '''
+        while not self._learner_stop.is_set():
+            batch = self.ring.get_many(self.drain_size, timeout=0.1)
+            if batch is None:
+                continue
+            with self.lock:
+                for i in range(len(batch['action'])):
+                    lag = self.policy_store.version - int(batch['version'][i])
+                    if lag > self.max_staleness:
+                        self.transitions_dropped += 1
+                        continue
+                    self._feed(batch, i)
+                    self._version_lag_sum += lag
+                    self.transitions_consumed += 1
+                    if self.transitions_consumed % self.publish_every == 0:
+                        self.policy_store.publish(self.agent)
+            with self._consumed:
+                self._consumed.notify_all()
+
+    def _feed(self, batch, i):
+        ''' Rebuild one transition from the ring and feed it to the agent
+        '''
+        action = int(batch['action'][i])
+        if batch['best_response'][i]:
+            self.agent._add_transition(batch['obs'][i], action)
+        state = {'obs': batch['obs'][i], 'legal_actions': OrderedDict()}
+        next_state = {
+            'obs': batch['next_obs'][i],
+            'legal_actions': OrderedDict((int(a), None) for a in np.flatnonzero(batch['legal_actions'][i])),
+        }
+        self.agent.feed([state, action, float(batch['reward'][i]), next_state, bool(batch['done'][i])])
+
+    def wait(self, num_transitions, timeout=None):
+        ''' Block until `num_transitions` more transitions have been fed
+
+        Args:
+            num_transitions (int): The number of transitions to wait for
+            timeout (float): The maximum time to wait
+
+        Returns:
+            (boolean): False on timeout
+        '''
+        target = self.transitions_consumed + num_transitions
+        with self._consumed:
+            return self._consumed.wait_for(lambda: self.transitions_consumed >= target, timeout=timeout)
+
+    def stop(self):
+        ''' Stop the actors and the learner thread
+        '''
+        self._stop_event.set()
+        self._learner_stop.set()
+        if self._learner is not None:
+            self._learner.join()
+        for actor in self._actors:
+            actor.join(timeout=5)
+            if actor.is_alive():
+                actor.terminate()
+        self._actors = []
+
+    def stats(self):
+        ''' Throughput counters of the pipeline
+
+        Returns:
+            (dict): The counters and rates
+        '''
+        elapsed = time.time() - self._start_time if self._start_time else 0.0
+        produced = self.counters['transitions_produced'].value
+        return {
+            'episodes': self.counters['episodes'].value,
+            'transitions_produced': produced,
+            'transitions_consumed': self.transitions_consumed,
+            'transitions_dropped': self.transitions_dropped,
+            'ring_size': len(self.ring),
+            'actor_wait_seconds': self.counters['actor_wait_seconds'].value,
+            'version': self.policy_store.version,
+            'mean_version_lag': self._version_lag_sum / max(self.transitions_consumed, 1),
+            'produced_per_second': produced / elapsed if elapsed > 0 else 0.0,
+            'consumed_per_second': self.transitions_consumed / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
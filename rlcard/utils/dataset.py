@@ -0,0 +1,254 @@
+''' A sharded columnar dataset of transitions
+
+The dataset is a directory with an `index.json` manifest and one
+sub-directory per shard. A shard stores one `.npy` file per column:
+
+    obs (N, *state_shape)       the observation
+    action (N,) int64           the action taken
+    reward (N,) float32         the reward
+    done (N,) bool              True for the last transition of a trajectory
+    legal_actions (N, A) bool   the legal actions of the observation
+    episode (N,) int64          the trajectory id, unique per game and player
+    game (N,) int64             the game id
+    player (N,) int8            the player id
+    step (N,) int32             the index of the transition in the trajectory
+
+The rows of a trajectory are contiguous and never span two shards, so
+the next observation of a transition is the next row. The reader maps
+the shards with `numpy.load(mmap_mode='r')`, so only the pages that are
+touched are read from disk.
+'''
+import json
+import os
+
+import numpy as np
+
+from rlcard.utils.utils import reorganize
+from rlcard.utils.game_record import get_action_id
+
+INDEX_FILE = 'index.json'
+
+
+class TrajectoryWriter(object):
+    ''' Append transitions to a sharded dataset
+    '''
+
+    def __init__(self, path, num_actions, shard_size=100000, obs_dtype=None):
+        ''' Open a dataset for writing. New shards are appended to an existing dataset.
+
+        Args:
+            path (str): The directory of the dataset
+            num_actions (int): The number of actions of the environment
+            shard_size (int): Start a new shard after this many rows. The
+                trajectory that crosses the limit is kept in one shard.
+            obs_dtype (numpy.dtype): The dtype of the observations, e.g.,
+                numpy.int8 for binary observations. Inferred by default.
+        '''
+        self.path = path
+        self.num_actions = num_actions
+        self.shard_size = shard_size
+        self.obs_dtype = obs_dtype
+
+        if os.path.exists(os.path.join(path, INDEX_FILE)):
+            with open(os.path.join(path, INDEX_FILE)) as f:
+                self.index = json.load(f)
+            if self.index['num_actions'] != num_actions:
+                raise ValueError('The dataset has {} actions, got {}'.format(self.index['num_actions'], num_actions))
+            if self.obs_dtype is None and self.index['columns']:
+                self.obs_dtype = np.dtype(self.index['columns']['obs'][1])
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.index = {'num_actions': num_actions, 'columns': {}, 'shards': [],
+                          'num_rows': 0, 'num_episodes': 0, 'num_games': 0}
+        self._reset_buffers()
+
+    def _reset_buffers(self):
+        self._buffers = {key: [] for key in ('obs', 'action', 'reward', 'done', 'legal_actions',
+                                             'episode', 'game', 'player', 'step')}
+
+    def _legal_mask(self, state):
+        mask = np.zeros(self.num_actions, dtype=np.bool_)
+        mask[list(state['legal_actions'].keys())] = True
+        return mask
+
+    def add_transitions(self, transitions, player_id=0, game=None):
+        ''' Add the reorganized transitions of one player in one game
+
+        Args:
+            transitions (list): A list of [state, action, reward, next_state, done]
+                as returned by `reorganize` for one player
+            player_id (int): The player of the transitions
+            game (int): The game id. A new game id is used by default.
+        '''
+        if len(transitions) == 0:
+            return
+        if game is None:
+            game = self.index['num_games']
+            self.index['num_games'] += 1
+        episode = self.index['num_episodes']
+        self.index['num_episodes'] += 1
+        for step, (state, action, reward, _, done) in enumerate(transitions):
+            self._buffers['obs'].append(state['obs'])
+            self._buffers['action'].append(get_action_id(state, action))
+            self._buffers['reward'].append(reward)
+            self._buffers['done'].append(bool(done) or step == len(transitions) - 1)
+            self._buffers['legal_actions'].append(self._legal_mask(state))
+            self._buffers['episode'].append(episode)
+            self._buffers['game'].append(game)
+            self._buffers['player'].append(player_id)
+            self._buffers['step'].append(step)
+
+        if len(self._buffers['action']) >= self.shard_size:
+            self.flush()
+
+    def add_trajectories(self, trajectories, payoffs, player_ids=None):
+        ''' Add a game as returned by `Env.run`
+
+        Args:
+            trajectories (list): The trajectories of the game
+            payoffs (list): The payoffs of the game
+            player_ids (list): The players to store. All the players by default.
+        '''
+        game = self.index['num_games']
+        self.index['num_games'] += 1
+        transitions = reorganize(trajectories, payoffs)
+        if player_ids is None:
+            player_ids = range(len(transitions))
+        for player_id in player_ids:
+            self.add_transitions(transitions[player_id], player_id, game)
+
+    def flush(self):
+        ''' Write the buffered rows as a new shard and update the manifest
+        '''
+        num_rows = len(self._buffers['action'])
+        if num_rows > 0:
+            obs = np.asarray(self._buffers['obs'])
+            if self.obs_dtype is not None:
+                obs = obs.astype(self.obs_dtype)
+            columns = {
+                'obs': obs,
+                'action': np.asarray(self._buffers['action'], dtype=np.int64),
+                'reward': np.asarray(self._buffers['reward'], dtype=np.float32),
+                'done': np.asarray(self._buffers['done'], dtype=np.bool_),
+                'legal_actions': np.asarray(self._buffers['legal_actions'], dtype=np.bool_),
+                'episode': np.asarray(self._buffers['episode'], dtype=np.int64),
+                'game': np.asarray(self._buffers['game'], dtype=np.int64),
+                'player': np.asarray(self._buffers['player'], dtype=np.int8),
+                'step': np.asarray(self._buffers['step'], dtype=np.int32),
+            }
+            name = 'shard_{:05d}'.format(len(self.index['shards']))
+            os.makedirs(os.path.join(self.path, name), exist_ok=True)
+            for key, array in columns.items():
+                np.save(os.path.join(self.path, name, key + '.npy'), array)
+                self.index['columns'][key] = [list(array.shape[1:]), array.dtype.str]
+            self.index['shards'].append({'name': name, 'num_rows': num_rows})
+            self.index['num_rows'] += num_rows
+            self._reset_buffers()
+        self._write_index()
+
+    def _write_index(self):
+        tmp_path = os.path.join(self.path, INDEX_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, os.path.join(self.path, INDEX_FILE))
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+class TrajectoryDataset(object):
+    ''' Read a sharded dataset with memory-mapped shards
+    '''
+
+    def __init__(self, path):
+        ''' Open a dataset
+
+        Args:
+            path (str): The directory of the dataset
+        '''
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        self.num_actions = self.index['num_actions']
+        self._shards = [None for _ in self.index['shards']]
+        self._offsets = np.cumsum([0] + [shard['num_rows'] for shard in self.index['shards']])
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    @property
+    def num_shards(self):
+        return len(self._shards)
+
+    def shard(self, i):
+        ''' Get the memory-mapped columns of a shard
+
+        Args:
+            i (int): The index of the shard
+
+        Returns:
+            (dict): Column name -> read-only memory-mapped array
+        '''
+        if self._shards[i] is None:
+            name = self.index['shards'][i]['name']
+            self._shards[i] = {
+                key: np.load(os.path.join(self.path, name, key + '.npy'), mmap_mode='r')
+                for key in self.index['columns']
+            }
+        return self._shards[i]
+
+    def _gather(self, i, rows):
+        ''' Gather rows of a shard together with the next observation of each row
+        '''
+        columns = self.shard(i)
+        batch = {key: np.asarray(array[rows]) for key, array in columns.items()}
+        # The next row is the next transition unless the trajectory is done
+        next_rows = np.minimum(rows + 1, len(columns['done']) - 1)
+        next_rows = np.where(batch['done'], rows, next_rows)
+        batch['next_obs'] = np.asarray(columns['obs'][next_rows])
+        batch['next_legal_actions'] = np.asarray(columns['legal_actions'][next_rows])
+        batch['next_legal_actions'][batch['done']] = True
+        return batch
+
+    def sample(self, batch_size, np_random=None):
+        ''' Sample a minibatch of transitions uniformly
+
+        Args:
+            batch_size (int): The number of transitions
+            np_random (numpy.random.RandomState): The random generator. Defaults to numpy.random.
+
+        Returns:
+            (dict): Column name -> array of shape (batch_size, ...), with the extra
+                columns `next_obs` and `next_legal_actions`
+        '''
+        if np_random is None:
+            np_random = np.random
+        indices = np.sort(np_random.randint(0, len(self), size=batch_size))
+        shard_ids = np.searchsorted(self._offsets, indices, side='right') - 1
+        parts = []
+        for i in np.unique(shard_ids):
+            rows = indices[shard_ids == i] - self._offsets[i]
+            parts.append(self._gather(i, rows))
+        batch = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+        # Undo the sorting so that the batch is not ordered by shard
+        permutation = np_random.permutation(batch_size)
+        return {key: array[permutation] for key, array in batch.items()}
+
+    def episodes(self):
+        ''' Iterate over the trajectories in the order they were written
+
+        Yields:
+            (dict): Column name -> array of the rows of one trajectory
+        '''
+        for i in range(self.num_shards):
+            columns = self.shard(i)
+            ends = np.flatnonzero(np.asarray(columns['done'])) + 1
+            start = 0
+            for end in ends:
+                yield self._gather(i, np.arange(start, end))
+                start = end
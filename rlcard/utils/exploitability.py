@@ -0,0 +1,239 @@
+''' Exact best responses and exploitability in small games
+
+The game tree is enumerated once into a `FlatTree`. A best response is
+one bottom-up pass over its depths: at every depth the counterfactual
+values of the actions of an infoset are summed over all its nodes, i.e.,
+over all the private cards of the other players, the best action is
+chosen and the values of the parents are summed with NumPy. The policy
+of an agent is queried once per infoset and the environment states of
+the infosets are built once, so reporting the exploitability during
+training is cheap.
+'''
+import numpy as np
+
+from rlcard.agents.vectorized_cfr_agent import FlatTree, DECISION
+from rlcard.games.base import CHANCE
+
+
+class Exploitability(object):
+    ''' Measure how far a policy is from a Nash equilibrium
+    '''
+
+    def __init__(self, env, tree=None):
+        ''' Enumerate the game tree
+
+        Args:
+            env (Env): The environment, used to build the states that the agents see
+            tree (GameTree or FlatTree): The tree of the game, `LeducholdemTree`
+                for leduc-holdem if None
+        '''
+        self.env = env
+        if tree is None:
+            if env.name != 'leduc-holdem':
+                raise ValueError('No game tree for {}, please pass one'.format(env.name))
+            from rlcard.games.leducholdem.tree import LeducholdemTree
+            tree = LeducholdemTree(env.num_players)
+        if isinstance(tree, FlatTree):
+            self.game_tree, self.tree = None, tree
+        else:
+            self.game_tree, self.tree = tree, FlatTree(tree)
+        flat = self.tree
+
+        # A best response chooses the action of an infoset at the depth of its nodes
+        depth = np.searchsorted(flat.levels, np.arange(flat.num_nodes), side='right') - 1
+        decisions = np.flatnonzero(flat.kind == DECISION)
+        self.infoset_depth = np.full(flat.num_infosets, -1, dtype=np.int64)
+        self.infoset_depth[flat.infoset[decisions]] = depth[decisions]
+        if np.any(self.infoset_depth[flat.infoset[decisions]] != depth[decisions]):
+            raise ValueError('The nodes of an infoset must have the same depth')
+        self._states = None
+
+    def infoset_states(self):
+        ''' Get a state of the environment for every infoset, built on the first call
+
+        Returns:
+            (list): The state of the acting player, in the order of the infosets
+        '''
+        if self._states is not None:
+            return self._states
+        if self.game_tree is None:
+            raise ValueError('Querying agents needs the GameTree, not only a FlatTree')
+        tree, env = self.game_tree, self.env
+        states = [None] * self.tree.num_infosets
+
+        def visit():
+            if tree.is_over():
+                return
+            player = tree.current_player()
+            if player == CHANCE:
+                actions = [outcome for outcome, _ in tree.chance_outcomes()]
+            else:
+                infoset = self.tree.infoset_ids[tree.infoset_key(player)]
+                if states[infoset] is None:
+                    states[infoset] = _env_state(env, tree, player)
+                actions = tree.legal_action_ids()
+            for action in actions:
+                tree.apply(action)
+                visit()
+                tree.undo()
+
+        visit()
+        self._states = states
+        return states
+
+    def policy(self, source):
+        ''' Get the policy of every infoset
+
+        Args:
+            source: One of
+                - a (num_infosets, num_actions) array in the order of the infosets
+                - a dict (or `PolicyTable`) infoset key -> action probabilities
+                - `VectorizedCFRAgent` trained on the same tree
+                - an agent with `eval_step` (or `eval_step_batch`) whose info
+                  has the 'probs' of the raw legal actions, e.g., `CFRAgent`, `NFSPAgent`
+                - a function state -> action probabilities
+
+        Returns:
+            (numpy.array): (num_infosets, num_actions), normalized over the legal actions
+        '''
+        flat = self.tree
+        if hasattr(source, 'get_average_policy') and isinstance(getattr(source, 'tree', None), FlatTree):
+            if source.tree.infoset_keys != flat.infoset_keys:
+                raise ValueError('The agent was trained on a different game tree')
+            source = source.get_average_policy()
+        if isinstance(source, np.ndarray):
+            policy = np.array(source, dtype=np.float64)
+        elif hasattr(source, 'keys') and hasattr(source, '__getitem__'):
+            policy = np.zeros((flat.num_infosets, flat.num_actions))
+            for infoset, key in enumerate(flat.infoset_keys):
+                if key in source:
+                    policy[infoset] = source[key]
+        else:
+            policy = self._query(source)
+        return _normalize(policy, flat.legal)
+
+    def _query(self, agent):
+        ''' Ask an agent or a function for the probabilities of every infoset, once per infoset
+        '''
+        states = self.infoset_states()
+        policy = np.zeros((self.tree.num_infosets, self.tree.num_actions))
+        if callable(agent) and not hasattr(agent, 'eval_step'):
+            for infoset, state in enumerate(states):
+                policy[infoset] = agent(state)
+            return policy
+        if hasattr(agent, 'eval_step_batch'):
+            _, infos = agent.eval_step_batch(states)
+        else:
+            infos = [agent.eval_step(state)[1] for state in states]
+        for infoset, (state, info) in enumerate(zip(states, infos)):
+            probs = info['probs']
+            for action_id, raw_action in zip(state['legal_actions'], state['raw_legal_actions']):
+                policy[infoset, action_id] = probs[raw_action]
+        return policy
+
+    def values(self, policy):
+        ''' Get the expected payoff of every player when all follow the policy
+
+        Args:
+            policy (numpy.array): The (num_infosets, num_actions) policy
+
+        Returns:
+            (numpy.array): The value of every player
+        '''
+        return self.tree.values(self.tree.edge_weights(policy))[0]
+
+    def best_response(self, policy, player_id):
+        ''' Compute a best response of a player to the policy of the others
+
+        Args:
+            policy (numpy.array): The (num_infosets, num_actions) policy
+            player_id (int): The responding player
+
+        Returns:
+            (tuple): The value of the best response and its (num_infosets,
+                num_actions) policy, one-hot at the infosets of the player
+        '''
+        flat = self.tree
+        weights = flat.edge_weights(policy)
+        reach = flat.reach(weights)
+        # The reach of the others and of chance
+        others = np.prod(np.delete(reach, player_id, axis=0), axis=0)
+        size = flat.num_infosets * flat.num_actions
+        response = policy.copy()
+        values = flat.utility[:, player_id].copy()
+        for d in range(flat.depth - 2, -1, -1):
+            lo, hi = flat.levels[d + 1], flat.levels[d + 2]
+            mine = flat.is_decision_child[lo:hi] & (flat.parent_player[lo:hi] == player_id)
+            if mine.any():
+                children = lo + np.flatnonzero(mine)
+                counterfactual = np.bincount(flat.edge_index[children],
+                                             weights=others[flat.parent[children]] * values[children],
+                                             minlength=size).reshape(flat.num_infosets, flat.num_actions)
+                infosets = np.unique(flat.infoset[flat.parent[children]])
+                best = np.where(flat.legal[infosets], counterfactual[infosets], -np.inf).argmax(axis=1)
+                response[infosets] = 0
+                response[infosets, best] = 1
+                weights[children] = response.reshape(-1)[flat.edge_index[children]]
+            parents, first = flat.child_starts[d]
+            values[parents] = np.add.reduceat(values[lo:hi] * weights[lo:hi], first)
+        return values[0], response
+
+    def nash_conv(self, source):
+        ''' Get the sum over the players of what a best response gains
+
+        Args:
+            source: A policy, see `policy`
+
+        Returns:
+            (float): NashConv, zero at a Nash equilibrium
+        '''
+        policy = self.policy(source)
+        values = self.values(policy)
+        return float(sum(self.best_response(policy, player_id)[0] - values[player_id]
+                         for player_id in range(self.tree.num_players)))
+
+    def exploitability(self, source):
+        ''' Get NashConv divided by the number of players, in big blinds for
+            the poker games. For two-player zero-sum games this is the mean
+            value of the best responses.
+
+        Args:
+            source: A policy, see `policy`
+
+        Returns:
+            (float): The exploitability
+        '''
+        return self.nash_conv(source) / self.tree.num_players
+
+    __call__ = exploitability
+
+
+def exploitability(env, source, tree=None):
+    ''' Compute the exploitability of a policy once. Build an `Exploitability`
+        to measure it repeatedly, e.g., during training.
+
+    Args:
+        env (Env): The environment
+        source: A policy, see `Exploitability.policy`
+        tree (GameTree or FlatTree): The tree of the game
+
+    Returns:
+        (float): The exploitability
+    '''
+    return Exploitability(env, tree).exploitability(source)
+
+def _normalize(policy, legal):
+    policy = policy * legal
+    total = policy.sum(axis=1, keepdims=True)
+    uniform = legal / legal.sum(axis=1, keepdims=True)
+    return np.where(total > 0, policy / np.where(total > 0, total, 1), uniform)
+
+def _env_state(env, tree, player_id):
+    ''' Get the state that the environment would give a player at the node of the tree
+    '''
+    game, action_recorder = env.game, env.action_recorder
+    env.game, env.action_recorder = tree.game, list(tree.action_history)
+    try:
+        return env.get_state(player_id)
+    finally:
+        env.game, env.action_recorder = game, action_recorder
@@ -0,0 +1,348 @@
+''' A compact record format of games that are rebuilt by replaying them
+
+A game is fully determined by the environment, its config, the seed of
+the environment at `reset` and the ids of the actions taken, so a record
+stores only the seed and the action ids. The observations are rebuilt
+on demand by re-running the engine.
+
+A record file is append-only:
+
+    header:  b'RLCREC1\\n', uint32 n, n bytes of JSON {env_id, config, action_dtype}
+    records: uint32 length, then `length` bytes:
+             uint64 seed, uint32 number of actions, the action ids
+
+and `<path>.idx` holds the uint64 offset of every record, so any game is
+read with one seek. The index is rebuilt from the records if it is lost,
+and a record that was cut by a crash is dropped when the file is opened
+for writing again.
+
+Example: every five-hundred game that reached a 10 no-trump contract
+
+    reader = GameRecordReader('games.rec')
+    games = []
+    for i in range(len(reader)):
+        contract = reader.replay(i).game.round.contract_bid_move
+        if contract and contract.action.bid_amount == 10 and contract.action.bid_suit is None \
+                and not contract.action.misere:
+            games.append(i)
+'''
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'RLCREC1\n'
+_LENGTH = struct.Struct('<I')
+_RECORD_HEAD = struct.Struct('<QI')
+
+
+def get_action_id(state, action):
+    ''' Get the id of an action, which is raw for agents with `use_raw`
+
+    Args:
+        state (dict): The state in which the action is taken
+        action (int or raw action): The action
+
+    Returns:
+        (int): The action id
+    '''
+    if isinstance(action, (int, np.integer)):
+        return int(action)
+    for action_id, raw_action in zip(state['legal_actions'], state['raw_legal_actions']):
+        if raw_action == action:
+            return action_id
+    raise ValueError('{} is not a legal action of the state'.format(action))
+
+def _action_dtype(num_actions):
+    if num_actions <= 1 << 8:
+        return 'u1'
+    if num_actions <= 1 << 16:
+        return '<u2'
+    return '<u4'
+
+def _read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError('{} is not a game record file'.format(f.name))
+    size, = _LENGTH.unpack(f.read(_LENGTH.size))
+    return json.loads(f.read(size).decode('utf-8'))
+
+def _scan_offsets(f, start):
+    ''' Find the offsets of the complete records from `start` onwards
+    '''
+    offsets = []
+    f.seek(0, os.SEEK_END)
+    end = f.tell()
+    offset = start
+    while offset + _LENGTH.size <= end:
+        f.seek(offset)
+        size, = _LENGTH.unpack(f.read(_LENGTH.size))
+        if offset + _LENGTH.size + size > end:
+            break
+        offsets.append(offset)
+        offset += _LENGTH.size + size
+    return offsets
+
+def _load_offsets(path):
+    ''' Load the offset index, rebuilding it if it is missing or stale
+
+    Returns:
+        (tuple): The offsets (numpy.array) and the end of the last complete record
+    '''
+    with open(path, 'rb') as f:
+        _read_header(f)
+        data_start = f.tell()
+        data = b''
+        if os.path.exists(path + '.idx'):
+            with open(path + '.idx', 'rb') as idx:
+                data = idx.read()
+        # Drop a cut index entry and the entries of records that were not fully written
+        offsets = np.frombuffer(data[:len(data) // 8 * 8], dtype='<u8')
+        f.seek(0, os.SEEK_END)
+        file_end = f.tell()
+        stale = len(offsets) * 8 != len(data)
+        num_indexed = len(offsets)
+        start = data_start
+        while len(offsets) > 0:
+            f.seek(int(offsets[-1]))
+            head = f.read(_LENGTH.size)
+            if len(head) == _LENGTH.size:
+                start = int(offsets[-1]) + _LENGTH.size + _LENGTH.unpack(head)[0]
+                if start <= file_end:
+                    break
+            start = data_start
+            offsets = offsets[:-1]
+        # Records appended after the last index entry, e.g., if the index was lost
+        missing = _scan_offsets(f, start)
+        end = start
+        if missing:
+            f.seek(missing[-1])
+            end = missing[-1] + _LENGTH.size + _LENGTH.unpack(f.read(_LENGTH.size))[0]
+            offsets = np.concatenate([offsets, np.asarray(missing, dtype='<u8')])
+        if stale or len(offsets) != num_indexed:
+            with open(path + '.idx', 'wb') as idx:
+                offsets.tofile(idx)
+    return offsets, end
+
+class GameRecordWriter(object):
+    ''' Append game records to a file
+    '''
+
+    def __init__(self, path, env_id, config=None):
+        ''' Open a record file for appending, creating it if needed
+
+        Args:
+            path (str): The path of the record file
+            env_id (str): The environment id
+            config (dict): The config of the environment, without the seed
+        '''
+        import rlcard
+        self.path = path
+        self.env_id = env_id
+        self.config = dict(config or {})
+        self.config.pop('seed', None)
+        num_actions = rlcard.make(env_id, config=self.config).num_actions
+        self.action_dtype = np.dtype(_action_dtype(num_actions))
+
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                header = _read_header(f)
+            if header['env_id'] != env_id or header['config'] != self.config:
+                raise ValueError('{} records {} with config {}'.format(path, header['env_id'], header['config']))
+            self.action_dtype = np.dtype(header['action_dtype'])
+            offsets, end = _load_offsets(path)
+            self.num_games = len(offsets)
+            self._file = open(path, 'r+b')
+            # Drop a record that was cut by a crash
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self.num_games = 0
+            self._file = open(path, 'wb')
+            header = json.dumps({'env_id': env_id, 'config': self.config,
+                                 'action_dtype': self.action_dtype.str}).encode('utf-8')
+            self._file.write(MAGIC + _LENGTH.pack(len(header)) + header)
+            open(path + '.idx', 'wb').close()
+        self._index = open(path + '.idx', 'ab')
+
+    def add(self, seed, actions):
+        ''' Append one game
+
+        Args:
+            seed (int): The seed of the environment before `reset`
+            actions (list): The ids of the actions in the order they were taken
+
+        Returns:
+            (int): The index of the game in the file
+        '''
+        actions = np.asarray(actions, dtype=self.action_dtype)
+        payload = _RECORD_HEAD.pack(seed, len(actions)) + actions.tobytes()
+        offset = self._file.tell()
+        self._file.write(_LENGTH.pack(len(payload)) + payload)
+        self._index.write(struct.pack('<Q', offset))
+        self.num_games += 1
+        return self.num_games - 1
+
+    def flush(self):
+        # Index entries that point past the records are dropped on the next open
+        self._file.flush()
+        self._index.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        self._index.close()
+
+    def __len__(self):
+        return self.num_games
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+class GameRecordReader(object):
+    ''' Random access to the games of a record file
+    '''
+
+    def __init__(self, path):
+        ''' Open a record file
+
+        Args:
+            path (str): The path of the record file
+        '''
+        self.path = path
+        with open(path, 'rb') as f:
+            header = _read_header(f)
+        self.env_id = header['env_id']
+        self.config = header['config']
+        self.action_dtype = np.dtype(header['action_dtype'])
+        self.offsets, _ = _load_offsets(path)
+        self._file = open(path, 'rb')
+        self._env = None
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i):
+        ''' Read one game
+
+        Args:
+            i (int): The index of the game
+
+        Returns:
+            (tuple): The seed (int) and the action ids (numpy.array)
+        '''
+        self._file.seek(int(self.offsets[i]))
+        size, = _LENGTH.unpack(self._file.read(_LENGTH.size))
+        payload = self._file.read(size)
+        seed, num_actions = _RECORD_HEAD.unpack_from(payload)
+        actions = np.frombuffer(payload, dtype=self.action_dtype, count=num_actions, offset=_RECORD_HEAD.size)
+        return seed, actions
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def env(self):
+        ''' The environment used for replaying, made once
+        '''
+        if self._env is None:
+            import rlcard
+            self._env = rlcard.make(self.env_id, config=self.config)
+        return self._env
+
+    def replay(self, i, step=None):
+        ''' Rebuild a game by re-running the engine
+
+        Args:
+            i (int): The index of the game
+            step (int): Stop after this many actions. The whole game by default.
+
+        Returns:
+            (Env): The environment positioned at the step. It is reused by
+                the next replay, so read what is needed before replaying again.
+        '''
+        seed, actions = self[i]
+        if step is not None:
+            actions = actions[:step]
+        env = self.env
+        env.seed(seed)
+        env.reset()
+        for action in actions:
+            env.step(int(action))
+        return env
+
+    def states(self, i):
+        ''' Iterate over the decisions of a game
+
+        Args:
+            i (int): The index of the game
+
+        Yields:
+            (tuple): The state, the id of the acting player and the action id
+        '''
+        seed, actions = self[i]
+        env = self.env
+        env.seed(seed)
+        state, player_id = env.reset()
+        for action in actions:
+            yield state, player_id, int(action)
+            state, player_id = env.step(int(action))
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+def run_recorded(env, seed, is_training=False):
+    ''' Play one game with the agents of the environment and return its record
+
+    Args:
+        env (Env): The environment with agents
+        seed (int): The seed of the environment, set before `reset`
+        is_training (boolean): True to use `step` instead of `eval_step`
+
+    Returns:
+        (tuple): The action ids (list) and the payoffs
+    '''
+    env.seed(seed)
+    state, player_id = env.reset()
+    actions = []
+    while not env.is_over():
+        agent = env.agents[player_id]
+        if is_training:
+            action = agent.step(state)
+        else:
+            action, _ = agent.eval_step(state)
+        action_id = get_action_id(state, action)
+        actions.append(action_id)
+        state, player_id = env.step(action_id)
+    return actions, env.get_payoffs()
+
+def record_games(env, writer, num_games, seed=0, is_training=False):
+    ''' Play games with the agents of the environment and append their records
+
+    Args:
+        env (Env): The environment with agents
+        writer (GameRecordWriter): The record file
+        num_games (int): The number of games to play
+        seed (int): The master seed of the game seeds
+        is_training (boolean): True to use `step` instead of `eval_step`
+
+    Returns:
+        (list): The payoffs of every game
+    '''
+    seeds = np.random.SeedSequence(seed).generate_state(num_games, dtype=np.uint32)
+    game_payoffs = []
+    for game_seed in seeds:
+        actions, payoffs = run_recorded(env, int(game_seed), is_training)
+        writer.add(int(game_seed), actions)
+        game_payoffs.append(payoffs)
+    return game_payoffs
@@ -0,0 +1,143 @@
+''' Evaluate agents with games spread over a pool of processes
+'''
+import math
+import random
+import sys
+import multiprocessing as mp
+from collections import defaultdict
+
+import numpy as np
+
+from rlcard.utils.pettingzoo_utils import run_game_pettingzoo, reorganize_pettingzoo
+
+
+def split_num(num, num_workers):
+    ''' Split a number of games into contiguous slices for the workers
+
+    Args:
+        num (int): The number of games
+        num_workers (int): The number of workers
+
+    Returns:
+        (list): The number of games of each worker
+    '''
+    return [num // num_workers + (1 if k < num % num_workers else 0) for k in range(num_workers)]
+
+def derive_seeds(seed, num_workers):
+    ''' Derive independent worker seeds from one master seed
+
+    Args:
+        seed (int): The master seed
+        num_workers (int): The number of workers
+
+    Returns:
+        (list): A list of integer seeds, one per worker
+    '''
+    children = np.random.SeedSequence(seed).spawn(num_workers)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+def seed_worker(seed):
+    ''' Seed the global random number generators used by the agents
+
+    Args:
+        seed (int): The seed of the worker
+    '''
+    np.random.seed(seed)
+    random.seed(seed)
+    if 'torch' in sys.modules:
+        import torch
+        torch.manual_seed(seed)
+
+def _tournament_worker(env, num, seed):
+    ''' Play a slice of the games in a worker process
+
+    Returns:
+        (list): The payoffs of every game
+    '''
+    seed_worker(seed)
+    env.seed(seed)
+    game_payoffs = []
+    while len(game_payoffs) < num:
+        _, _payoffs = env.run(is_training=False)
+        if isinstance(_payoffs, list):
+            game_payoffs.extend([[float(p) for p in _p] for _p in _payoffs])
+        else:
+            game_payoffs.append([float(p) for p in _payoffs])
+    return game_payoffs
+
+def _tournament_pettingzoo_worker(env, agents, num_episodes, seed):
+    ''' Play a slice of the PettingZoo games in a worker process
+
+    Returns:
+        (list): The rewards of every game, a dict per game
+    '''
+    seed_worker(seed)
+    env.reset(seed=seed)
+    game_rewards = []
+    for _ in range(num_episodes):
+        trajectories = run_game_pettingzoo(env, agents)
+        trajectories = reorganize_pettingzoo(trajectories)
+        game_rewards.append({
+            agent_name: float(sum([t[2] for t in trajectory]))
+            for agent_name, trajectory in trajectories.items()
+        })
+    return game_rewards
+
+def _run_pool(target, args_list, start_method):
+    ctx = mp.get_context(start_method)
+    with ctx.Pool(len(args_list)) as pool:
+        return pool.starmap(target, args_list)
+
+def tournament_parallel(env, num, num_workers=None, seed=0, start_method=None):
+    ''' Evaluate the performance of the agents with a process pool. The
+        environment and its agents are copied into every worker, each of
+        which plays a slice of the games with a seed derived from `seed`.
+        The results are identical for a given seed and number of workers.
+
+    Args:
+        env (Env class): The environment to be evaluated.
+        num (int): The number of games to play.
+        num_workers (int): The number of worker processes. Defaults to the CPU count.
+        seed (int): The master seed
+        start_method (str): The multiprocessing start method, e.g., 'fork' or 'spawn'
+
+    Returns:
+        A list of avrage payoffs for each player
+    '''
+    if num_workers is None:
+        num_workers = mp.cpu_count()
+    num_workers = max(1, min(num_workers, num))
+    seeds = derive_seeds(seed, num_workers)
+    args_list = [(env, _num, _seed) for _num, _seed in zip(split_num(num, num_workers), seeds)]
+    results = _run_pool(_tournament_worker, args_list, start_method)
+
+    game_payoffs = [p for worker_payoffs in results for p in worker_payoffs]
+    return [math.fsum(p[i] for p in game_payoffs) / len(game_payoffs) for i in range(env.num_players)]
+
+def tournament_pettingzoo_parallel(env, agents, num_episodes, num_workers=None, seed=0, start_method=None):
+    ''' Evaluate the PettingZoo agents with a process pool, see `tournament_parallel`
+
+    Args:
+        env (AECEnv): The PettingZoo environment
+        agents (dict): A dict of agent name -> agent
+        num_episodes (int): The number of games to play
+        num_workers (int): The number of worker processes. Defaults to the CPU count.
+        seed (int): The master seed
+        start_method (str): The multiprocessing start method, e.g., 'fork' or 'spawn'
+
+    Returns:
+        A dict of agent name -> average reward
+    '''
+    if num_workers is None:
+        num_workers = mp.cpu_count()
+    num_workers = max(1, min(num_workers, num_episodes))
+    seeds = derive_seeds(seed, num_workers)
+    args_list = [(env, agents, _num, _seed) for _num, _seed in zip(split_num(num_episodes, num_workers), seeds)]
+    results = _run_pool(_tournament_pettingzoo_worker, args_list, start_method)
+
+    total_rewards = defaultdict(list)
+    for worker_rewards in results:
+        for rewards in worker_rewards:
+            for agent_name, reward in rewards.items():
+                total_rewards[agent_name].append(reward)
+    return {k: math.fsum(v) / num_episodes for (k, v) in total_rewards.items()}
@@ -0,0 +1,226 @@
+''' Policy and regret tables in one memory-mapped file
+
+A table file holds float32 matrices over a fixed number of actions that
+share one index of infoset keys:
+
+    header:   b'RLCTBL1\\n', uint32 n, n bytes of JSON
+              {num_keys, num_actions, key_type, tables, offsets, meta}
+    hashes:   (num_keys,) uint64, sorted, the 64-bit blake2b of every key
+    key_ends: (num_keys,) uint64, the end of every key in the key bytes
+    keys:     the bytes of the keys, in the order of the hashes
+    tables:   one (num_keys, num_actions) float32 matrix per table
+
+Every section starts at a multiple of 64 bytes. A reader maps the file
+read-only and finds a key by binary search over the hashes, so opening
+is O(1) and the processes that map the same file share its pages.
+Files are written to a temporary file and renamed, so a checkpoint that
+is written during training never leaves a partial file behind.
+'''
+import hashlib
+import json
+import os
+import pickle
+import struct
+from collections.abc import Mapping
+
+import numpy as np
+
+MAGIC = b'RLCTBL1\n'
+TABLE_FILE = 'tables.tbl'
+_LENGTH = struct.Struct('<I')
+_ALIGN = 64
+
+
+def key_hash(key):
+    ''' Hash an infoset key
+
+    Args:
+        key (bytes): The key
+
+    Returns:
+        (int): The unsigned 64-bit hash, the same in every process
+    '''
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+def _align(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+def write_policy_tables(path, tables, num_actions, meta=None):
+    ''' Write tables of infoset key -> action values to a table file
+
+    Args:
+        path (str): The path of the file
+        tables (dict): Table name -> dict of key -> array of num_actions values.
+            The keys are bytes or str. A key missing from a table gets zeros.
+        num_actions (int): The number of actions
+        meta (dict): JSON metadata, e.g., the iteration
+    '''
+    keys = set()
+    for table in tables.values():
+        keys.update(table.keys())
+    keys = list(keys)
+    key_type = 'str' if keys and isinstance(keys[0], str) else 'bytes'
+    encoded = [key.encode('utf-8') if key_type == 'str' else bytes(key) for key in keys]
+    hashes = np.array([key_hash(key) for key in encoded], dtype='<u8')
+    order = np.argsort(hashes, kind='stable')
+    hashes = hashes[order]
+    encoded = [encoded[i] for i in order]
+    keys = [keys[i] for i in order]
+    key_ends = np.cumsum([len(key) for key in encoded], dtype='<u8')
+
+    sections = [('hashes', hashes.tobytes()), ('key_ends', key_ends.tobytes()), ('keys', b''.join(encoded))]
+    for name, table in tables.items():
+        matrix = np.zeros((len(keys), num_actions), dtype='<f4')
+        for i, key in enumerate(keys):
+            if key in table:
+                matrix[i] = table[key]
+        sections.append((name, matrix.tobytes()))
+
+    # The offsets do not depend on the size of the header, which is padded to its own section
+    offsets = {}
+    offset = 0
+    for name, data in sections:
+        offsets[name] = offset
+        offset = _align(offset + len(data))
+    header = {
+        'num_keys': len(keys),
+        'num_actions': num_actions,
+        'key_type': key_type,
+        'tables': list(tables.keys()),
+        'offsets': offsets,
+        'meta': meta or {},
+    }
+    header = json.dumps(header).encode('utf-8')
+    data_start = _align(len(MAGIC) + _LENGTH.size + len(header))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + _LENGTH.pack(len(header)) + header)
+        for name, data in sections:
+            f.seek(data_start + offsets[name])
+            f.write(data)
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+def read_header(path):
+    ''' Read the header of a table file
+
+    Returns:
+        (tuple): The header (dict) and the offset of the first section
+    '''
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError('{} is not a table file'.format(path))
+        size, = _LENGTH.unpack(f.read(_LENGTH.size))
+        header = json.loads(f.read(size).decode('utf-8'))
+    return header, _align(len(MAGIC) + _LENGTH.size + size)
+
+class PolicyTable(Mapping):
+    ''' A read-only mapping infoset key -> float32 action values of one
+        table of a memory-mapped table file
+    '''
+
+    def __init__(self, path, name='average_policy'):
+        ''' Map a table file
+
+        Args:
+            path (str): The path of the file
+            name (str): The table, e.g., 'average_policy', 'policy' or 'regrets'
+        '''
+        self.path = path
+        self.name = name
+        header, data_start = read_header(path)
+        if name not in header['tables']:
+            raise KeyError('{} has no table {}, only {}'.format(path, name, header['tables']))
+        self.num_actions = header['num_actions']
+        self.key_type = header['key_type']
+        self.meta = header['meta']
+        self._num_keys = header['num_keys']
+        offsets = header['offsets']
+        mm = np.memmap(path, dtype=np.uint8, mode='r')
+        self.hashes = np.frombuffer(mm, dtype='<u8', count=self._num_keys, offset=data_start + offsets['hashes'])
+        self.key_ends = np.frombuffer(mm, dtype='<u8', count=self._num_keys, offset=data_start + offsets['key_ends'])
+        self._keys = mm[data_start + offsets['keys']:]
+        self.values = np.frombuffer(mm, dtype='<f4', count=self._num_keys * self.num_actions,
+                                    offset=data_start + offsets[name]).reshape(self._num_keys, self.num_actions)
+
+    def __reduce__(self):
+        # Other processes map the file instead of receiving a copy
+        return (PolicyTable, (self.path, self.name))
+
+    def _key(self, i):
+        start = int(self.key_ends[i - 1]) if i > 0 else 0
+        return self._keys[start:int(self.key_ends[i])].tobytes()
+
+    def index(self, key):
+        ''' Find the row of a key
+
+        Args:
+            key (bytes or str): The infoset key
+
+        Returns:
+            (int): The row, -1 if the key is not in the table
+        '''
+        if isinstance(key, str):
+            key = key.encode('utf-8')
+        h = np.uint64(key_hash(key))
+        i = int(np.searchsorted(self.hashes, h))
+        # Keys with the same hash are next to each other
+        while i < self._num_keys and self.hashes[i] == h:
+            if self._key(i) == key:
+                return i
+            i += 1
+        return -1
+
+    def __getitem__(self, key):
+        i = self.index(key)
+        if i < 0:
+            raise KeyError(key)
+        return self.values[i]
+
+    def __contains__(self, key):
+        return self.index(key) >= 0
+
+    def __len__(self):
+        return self._num_keys
+
+    def __iter__(self):
+        for i in range(self._num_keys):
+            key = self._key(i)
+            yield key.decode('utf-8') if self.key_type == 'str' else key
+
+def load_policy_tables(path):
+    ''' Load every table of a table file into dictionaries of float64 arrays,
+        e.g., to resume training. Every table has all the keys of the file.
+
+    Returns:
+        (tuple): Table name -> dict of key -> array, and the metadata
+    '''
+    header, _ = read_header(path)
+    tables = {}
+    for name in header['tables']:
+        table = PolicyTable(path, name)
+        tables[name] = {key: np.array(table.values[i], dtype=np.float64) for i, key in enumerate(table)}
+    return tables, header['meta']
+
+def convert_cfr_model(model_path, path=None):
+    ''' Convert the pickled tables saved by `CFRAgent.save` to a table file
+
+    Args:
+        model_path (str): The directory of the pickles
+        path (str): The table file, `<model_path>/tables.tbl` by default
+
+    Returns:
+        (str): The path of the table file
+    '''
+    if path is None:
+        path = os.path.join(model_path, TABLE_FILE)
+    tables = {}
+    for name in ('policy', 'average_policy', 'regrets'):
+        with open(os.path.join(model_path, name + '.pkl'), 'rb') as f:
+            tables[name] = {key: value for key, value in pickle.load(f).items() if len(value) > 0}
+    with open(os.path.join(model_path, 'iteration.pkl'), 'rb') as f:
+        iteration = pickle.load(f)
+    num_actions = max(len(value) for table in tables.values() for value in table.values())
+    write_policy_tables(path, tables, num_actions, meta={'iteration': iteration})
+    return path
@@ -0,0 +1,421 @@
+''' Distributed rollout workers that talk to a learner over sockets
+
+A `RolloutServer` runs in the learner process and listens with
+`multiprocessing.connection.Listener` on a TCP address such as
+('0.0.0.0', 6000) or on a Unix socket path. Rollout workers connect with
+`multiprocessing.connection.Client`, receive the environment and the
+agents once, then loop: pull the latest weights when a newer version is
+published, play games and push zlib-compressed batches of experience.
+No broker is needed, and the workers can run on the same machine or on
+other machines:
+
+    python -m rlcard.utils.rollout --address learner-host:6000 --authkey secret
+
+The payloads are pickled, so anyone who knows the key can run code in the
+learner or the workers. A TCP address that other machines can reach needs
+an explicit secret key. For a Unix socket or a loopback address a random
+key is generated when none is given, see `RolloutServer.authkey`.
+
+Two kinds of experience are produced:
+
+    'transitions': reorganized transitions for DQNAgent and NFSPAgent,
+        fed with `feed_transitions`
+    'dmc': unrolls of length T for every position, as consumed by DMCTrainer
+'''
+import argparse
+import os
+import pickle
+import queue
+import threading
+import traceback
+import zlib
+import multiprocessing as mp
+from collections import OrderedDict
+from multiprocessing.connection import Listener, Client
+
+import numpy as np
+
+from rlcard.utils.utils import reorganize
+from rlcard.utils.parallel_utils import seed_worker
+from rlcard.utils.collector import _policy_modules, _dqn_agent
+
+
+def compress(obj):
+    return zlib.compress(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+def decompress(payload):
+    return pickle.loads(zlib.decompress(payload))
+
+def get_policy_weights(agent):
+    ''' Get the acting weights of an agent as numpy arrays
+
+    Args:
+        agent (object): A DQNAgent, NFSPAgent or DMCAgent
+
+    Returns:
+        (dict): Module name -> state dict of numpy arrays
+    '''
+    if hasattr(agent, 'net'):
+        modules = OrderedDict(net=agent.net)
+    else:
+        modules = _policy_modules(agent)
+    weights = OrderedDict(
+        (name, OrderedDict((k, v.detach().cpu().numpy()) for k, v in module.state_dict().items()))
+        for name, module in modules.items()
+    )
+    if not hasattr(agent, 'net'):
+        weights['total_t'] = _dqn_agent(agent).total_t
+    return weights
+
+def set_policy_weights(agent, weights):
+    ''' Load weights from `get_policy_weights` into an agent
+
+    Args:
+        agent (object): A DQNAgent, NFSPAgent or DMCAgent
+        weights (dict): The weights
+    '''
+    import torch
+    if hasattr(agent, 'net'):
+        modules = OrderedDict(net=agent.net)
+    else:
+        modules = _policy_modules(agent)
+        _dqn_agent(agent).total_t = weights['total_t']
+    for name, module in modules.items():
+        module.load_state_dict(OrderedDict((k, torch.from_numpy(v)) for k, v in weights[name].items()))
+    if getattr(agent, 'inference_backend', None) is not None:
+        # Export the new weights
+        agent.set_inference_backend(agent.inference_backend)
+
+def feed_transitions(agent, transitions):
+    ''' Feed the transitions of a 'transitions' batch to a DQNAgent or NFSPAgent
+
+    Args:
+        agent (object): The learning agent
+        transitions (list): Tuples of (obs, action, reward, next_obs, done, next_legal_actions, best_response)
+    '''
+    for obs, action, reward, next_obs, done, legal_actions, best_response in transitions:
+        if best_response:
+            agent._add_transition(obs, action)
+        state = {'obs': obs, 'legal_actions': OrderedDict()}
+        next_state = {'obs': next_obs, 'legal_actions': OrderedDict((a, None) for a in legal_actions)}
+        agent.feed([state, action, reward, next_state, done])
+
+_LOOPBACK_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+class RolloutServer(object):
+    ''' The learner end of the rollout workers
+    '''
+
+    def __init__(self,
+                 env,
+                 agents=None,
+                 address=('localhost', 0),
+                 authkey=None,
+                 kind='transitions',
+                 player_ids=(0,),
+                 unroll_length=100,
+                 episodes_per_push=8,
+                 queue_size=64,
+                 seed=None):
+        ''' Initialize the server and start listening
+
+        Args:
+            env (Env): The environment. It is sent to every worker.
+            agents (list): The agents sent to every worker. Defaults to the agents of `env`.
+            address (tuple or str): A (host, port) pair for TCP or a path for a Unix socket.
+                Port 0 picks a free port, see `self.address`.
+            authkey (bytes): The key that the workers must present. Required for a TCP address
+                other than a loopback one. None generates a random key, see `self.authkey`.
+            kind (str): 'transitions' for DQN/NFSP or 'dmc' for DMC
+            player_ids (tuple): The positions whose experience is collected and whose
+                weights are published. For 'dmc', all the positions are collected.
+            unroll_length (int): The unroll length T of the 'dmc' batches
+            episodes_per_push (int): The number of games a worker plays per push
+            queue_size (int): The maximum number of batches waiting for the learner.
+                Workers block when the queue is full.
+            seed (int): The master seed of the workers
+        '''
+        if kind not in ('transitions', 'dmc'):
+            raise ValueError("'kind' should be either 'transitions' or 'dmc'.")
+        if authkey is None:
+            if isinstance(address, tuple) and address[0] not in _LOOPBACK_HOSTS:
+                raise ValueError('An authkey is required for the TCP address {}'.format(address))
+            authkey = os.urandom(32)
+        self.authkey = authkey
+        self.listener = Listener(address, authkey=authkey)
+        self.address = self.listener.address
+        self._setup = compress({
+            'env': env,
+            'agents': agents if agents is not None else env.agents,
+            'kind': kind,
+            'player_ids': list(player_ids),
+            'unroll_length': unroll_length,
+            'episodes_per_push': episodes_per_push,
+        })
+        self.seed = seed
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._weights_lock = threading.Lock()
+        self._weights = None
+        self.version = 0
+        self._stopped = threading.Event()
+        self._threads = []
+        self._num_workers = 0
+        self._counters_lock = threading.Lock()
+        self.counters = {'batches': 0, 'episodes': 0, 'bytes_received': 0, 'weights_sent': 0}
+
+    def start(self):
+        ''' Start accepting workers in a background thread
+        '''
+        thread = threading.Thread(target=self._accept, name='rollout-accept', daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _accept(self):
+        while not self._stopped.is_set():
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError, mp.AuthenticationError):
+                continue
+            worker_index = self._num_workers
+            self._num_workers += 1
+            thread = threading.Thread(target=self._serve, args=(conn, worker_index),
+                                      name='rollout-worker-%d' % worker_index, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _serve(self, conn, worker_index):
+        ''' Answer the requests of one worker
+        '''
+        try:
+            while not self._stopped.is_set():
+                message = conn.recv()
+                if message[0] == 'hello':
+                    seed = None
+                    if self.seed is not None:
+                        seed = int(np.random.SeedSequence([self.seed, worker_index]).generate_state(1)[0])
+                    conn.send(('setup', self._setup, worker_index, seed))
+                elif message[0] == 'pull':
+                    with self._weights_lock:
+                        version, weights = self.version, self._weights
+                    if weights is None or version == message[1]:
+                        conn.send(('unchanged', message[1]))
+                    else:
+                        conn.send(('weights', version, weights))
+                        with self._counters_lock:
+                            self.counters['weights_sent'] += 1
+                elif message[0] == 'push':
+                    _, version, num_episodes, payload = message
+                    while not self._stopped.is_set():
+                        try:
+                            self._queue.put((worker_index, version, payload), timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    with self._counters_lock:
+                        self.counters['batches'] += 1
+                        self.counters['episodes'] += num_episodes
+                        self.counters['bytes_received'] += len(payload)
+                    conn.send(('stop',) if self._stopped.is_set() else ('ok',))
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def publish(self, weights):
+        ''' Publish a new version of the weights
+
+        Args:
+            weights (dict): Player id -> weights from `get_policy_weights`
+
+        Returns:
+            (int): The new version
+        '''
+        payload = compress(weights)
+        with self._weights_lock:
+            self.version += 1
+            self._weights = payload
+            return self.version
+
+    def get(self, timeout=None):
+        ''' Get the next batch of experience
+
+        Args:
+            timeout (float): The maximum time to wait
+
+        Returns:
+            (tuple): (worker index, weight version, items), or None on timeout.
+                The items are a list of transitions for 'transitions', or a list
+                of (position, unroll dict) for 'dmc'.
+        '''
+        try:
+            worker_index, version, payload = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        return worker_index, version, decompress(payload)
+
+    def stats(self):
+        with self._counters_lock:
+            stats = dict(self.counters)
+        stats['version'] = self.version
+        stats['num_workers'] = self._num_workers
+        stats['queue_size'] = self._queue.qsize()
+        return stats
+
+    def close(self):
+        ''' Stop serving. Connected workers are told to stop at their next push.
+        '''
+        self._stopped.set()
+        self.listener.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+def _dmc_collect(env, trajectories, payoffs, carry):
+    ''' Append the steps of one game to the per-position carry buffers
+    '''
+    for p in range(env.num_players):
+        steps = (len(trajectories[p]) - 1) // 2
+        if steps == 0:
+            continue
+        for i in range(0, len(trajectories[p]) - 2, 2):
+            carry[p]['state'].append(trajectories[p][i]['obs'])
+            carry[p]['action'].append(env.get_action_feature(trajectories[p][i+1]))
+        carry[p]['done'].extend([False] * (steps - 1) + [True])
+        carry[p]['episode_return'].extend([0.0] * (steps - 1) + [float(payoffs[p])])
+        carry[p]['target'].extend([float(payoffs[p])] * steps)
+
+def _dmc_unrolls(carry, T):
+    ''' Cut complete unrolls of length T from the carry buffers
+    '''
+    dtypes = dict(done=np.bool_, episode_return=np.float32, target=np.float32, state=np.int8, action=np.int8)
+    unrolls = []
+    for p, buf in enumerate(carry):
+        while len(buf['target']) > T:
+            unrolls.append((p, {key: np.asarray(buf[key][:T], dtype=dtypes[key]) for key in dtypes}))
+            for key in dtypes:
+                del buf[key][:T]
+    return unrolls
+
+def rollout_worker(address, authkey, max_episodes=None):
+    ''' Connect to a RolloutServer and produce experience until told to stop
+
+    Args:
+        address (tuple or str): The address of the server
+        authkey (bytes): The key of the server
+        max_episodes (int): Stop after this many games. None to run until the server stops.
+    '''
+    conn = Client(address, authkey=authkey)
+    try:
+        conn.send(('hello',))
+        _, setup, worker_index, seed = conn.recv()
+        setup = decompress(setup)
+        env, kind, player_ids = setup['env'], setup['kind'], setup['player_ids']
+        env.set_agents(setup['agents'])
+        if seed is not None:
+            seed_worker(seed)
+            env.seed(seed)
+        T = setup['unroll_length']
+        carry = [{key: [] for key in ('done', 'episode_return', 'target', 'state', 'action')}
+                 for _ in range(env.num_players)]
+
+        version = -1
+        episodes = 0
+        while max_episodes is None or episodes < max_episodes:
+            conn.send(('pull', version))
+            reply = conn.recv()
+            if reply[0] == 'weights':
+                version = reply[1]
+                for player_id, weights in decompress(reply[2]).items():
+                    set_policy_weights(env.agents[player_id], weights)
+
+            items = []
+            for _ in range(setup['episodes_per_push']):
+                if kind == 'transitions':
+                    best_response = {}
+                    for player_id in player_ids:
+                        agent = env.agents[player_id]
+                        if hasattr(agent, 'sample_episode_policy'):
+                            agent.sample_episode_policy()
+                        best_response[player_id] = getattr(agent, '_mode', None) == 'best_response'
+                    trajectories, payoffs = env.run(is_training=True)
+                    trajectories = reorganize(trajectories, payoffs)
+                    for player_id in player_ids:
+                        agent = env.agents[player_id]
+                        if hasattr(agent, '_reservoir_buffer'):
+                            agent._reservoir_buffer.clear()
+                        for state, action, reward, next_state, done in trajectories[player_id]:
+                            items.append((state['obs'], action, reward, next_state['obs'], done,
+                                          list(next_state['legal_actions'].keys()), best_response[player_id]))
+                else:
+                    trajectories, payoffs = env.run(is_training=True)
+                    _dmc_collect(env, trajectories, payoffs, carry)
+                    items.extend(_dmc_unrolls(carry, T))
+                episodes += 1
+
+            conn.send(('push', version, setup['episodes_per_push'], compress(items)))
+            if conn.recv()[0] == 'stop':
+                break
+    except (EOFError, OSError, KeyboardInterrupt):
+        pass
+    except Exception as e:
+        print('Exception in rollout worker')
+        traceback.print_exc()
+        raise e
+    finally:
+        conn.close()
+
+def start_local_workers(address, num_workers, authkey, start_method='spawn'):
+    ''' Start rollout workers on this machine
+
+    Args:
+        address (tuple or str): The address of the server
+        num_workers (int): The number of worker processes
+        authkey (bytes): The key of the server
+        start_method (str): The multiprocessing start method
+
+    Returns:
+        (list): The worker processes
+    '''
+    ctx = mp.get_context(start_method)
+    workers = []
+    for _ in range(num_workers):
+        worker = ctx.Process(target=rollout_worker, args=(address, authkey), daemon=True)
+        worker.start()
+        workers.append(worker)
+    return workers
+
+def _parse_address(address):
+    if ':' in address:
+        host, port = address.rsplit(':', 1)
+        return (host, int(port))
+    return address
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Rollout worker in RLCard")
+    parser.add_argument(
+        '--address',
+        type=str,
+        required=True,
+        help='host:port of the learner, or the path of a Unix socket',
+    )
+    parser.add_argument(
+        '--authkey',
+        type=str,
+        required=True,
+        help='The key of the learner',
+    )
+    parser.add_argument(
+        '--num_workers',
+        type=int,
+        default=1,
+    )
+
+    args = parser.parse_args()
+
+    workers = start_local_workers(_parse_address(args.address), args.num_workers, args.authkey.encode())
+    for worker in workers:
+        worker.join()
@@ -0,0 +1,187 @@
+''' Sequential evaluation that stops as soon as the result is decided
+'''
+import math
+
+
+class RunningStats(object):
+    ''' Running mean and variance of a stream of values (Welford's algorithm)
+    '''
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, x):
+        ''' Add one value to the statistics
+
+        Args:
+            x (float): The new value
+        '''
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+
+    @property
+    def variance(self):
+        ''' The unbiased sample variance, 0 if there are fewer than two values
+        '''
+        if self.count < 2:
+            return 0.0
+        return self._m2 / (self.count - 1)
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+def empirical_bernstein_radius(n, variance, value_range, delta):
+    ''' The half-width of the empirical Bernstein confidence interval of
+        Maurer and Pontil (2009) for the mean of n values in a bounded range
+
+    Args:
+        n (int): The number of values
+        variance (float): The sample variance
+        value_range (float): The width of the range that contains the values
+        delta (float): The probability that the interval does not cover the mean
+
+    Returns:
+        (float): The half-width of the interval
+    '''
+    if n < 2:
+        return float('inf')
+    log_term = math.log(2 / delta)
+    return math.sqrt(2 * variance * log_term / n) + 7 * value_range * log_term / (3 * (n - 1))
+
+# The coefficients of the rational approximation of the inverse normal CDF
+# of Acklam, with a relative error below 1.2e-9
+_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+      1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+      6.680131188771972e+01, -1.328068155288572e+01)
+_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+      -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+      3.754408661907416e+00)
+
+def normal_quantile(p):
+    ''' The inverse of the CDF of the standard normal distribution
+
+    Args:
+        p (float): The probability, in (0, 1)
+
+    Returns:
+        (float): The value z such that P(Z <= z) = p
+    '''
+    if not 0 < p < 1:
+        raise ValueError('p must be in (0, 1), got {}'.format(p))
+    if p < 0.02425:
+        q = math.sqrt(-2 * math.log(p))
+        return ((((((_C[0] * q + _C[1]) * q + _C[2]) * q + _C[3]) * q + _C[4]) * q + _C[5])
+                / ((((_D[0] * q + _D[1]) * q + _D[2]) * q + _D[3]) * q + 1))
+    if p > 1 - 0.02425:
+        return -normal_quantile(1 - p)
+    q = p - 0.5
+    r = q * q
+    return ((((((_A[0] * r + _A[1]) * r + _A[2]) * r + _A[3]) * r + _A[4]) * r + _A[5]) * q
+            / (((((_B[0] * r + _B[1]) * r + _B[2]) * r + _B[3]) * r + _B[4]) * r + 1))
+
+def normal_radius(n, variance, delta):
+    ''' The half-width of the normal-approximation confidence interval
+
+    Args:
+        n (int): The number of values
+        variance (float): The sample variance
+        delta (float): The probability that the interval does not cover the mean
+
+    Returns:
+        (float): The half-width of the interval
+    '''
+    if n < 2:
+        return float('inf')
+    return normal_quantile(1 - delta / 2) * math.sqrt(variance / n)
+
+def tournament_sequential(env,
+                          max_num,
+                          min_num=100,
+                          check_every=100,
+                          delta=0.05,
+                          half_width=None,
+                          payoff_range=None,
+                          player=0,
+                          threshold=0.0):
+    ''' Evaluate the agents like `tournament`, but stop as soon as the
+        confidence interval of the average payoff of `player` lies entirely
+        above or below `threshold`, or its half-width falls below `half_width`.
+
+        The interval is checked every `check_every` games. The error
+        probability `delta` is split over the checks (delta * 6 / (pi^2 k^2)
+        at the k-th check), so the decision holds with probability at least
+        1 - delta no matter when the evaluation stops. With `payoff_range`
+        the empirical Bernstein bound is used, which is valid for any bounded
+        payoffs. Otherwise a normal approximation is used.
+
+    Args:
+        env (Env class): The environment to be evaluated.
+        max_num (int): The maximum number of games to play.
+        min_num (int): The minimum number of games to play.
+        check_every (int): Check the stopping rules every N games
+        delta (float): The error probability of the decision
+        half_width (float): Stop when the interval is narrower than this. None to disable.
+        payoff_range (float): The width of the range of the payoffs of `player`,
+            e.g., 2 for payoffs in [-1, 1]. None for the normal approximation.
+        player (int): The player whose payoff decides the comparison
+        threshold (float): The payoff that `player` is compared against
+
+    Returns:
+        (tuple) Tuple containing:
+
+            (list): A list of avrage payoffs for each player
+            (dict): The details of the evaluation, with the keys `num_games`,
+                `lower`, `upper`, `decision` (1 if above `threshold`, -1 if
+                below, 0 if undecided) and `stop_reason`
+    '''
+    stats = [RunningStats() for _ in range(env.num_players)]
+    num_checks = 0
+    lower, upper = -float('inf'), float('inf')
+    decision, stop_reason = 0, 'max_num'
+
+    while stats[0].count < max_num:
+        _, _payoffs = env.run(is_training=False)
+        if not isinstance(_payoffs, list) or not hasattr(_payoffs[0], '__len__'):
+            _payoffs = [_payoffs]
+        for _p in _payoffs:
+            for i, s in enumerate(stats):
+                s.update(float(_p[i]))
+
+        n = stats[player].count
+        if n < min_num or (n % check_every != 0 and n < max_num):
+            continue
+
+        num_checks += 1
+        _delta = delta * 6 / (math.pi ** 2 * num_checks ** 2)
+        if payoff_range is not None:
+            radius = empirical_bernstein_radius(n, stats[player].variance, payoff_range, _delta)
+        else:
+            radius = normal_radius(n, stats[player].variance, _delta)
+        lower, upper = stats[player].mean - radius, stats[player].mean + radius
+
+        if lower > threshold:
+            decision, stop_reason = 1, 'decided'
+            break
+        if upper < threshold:
+            decision, stop_reason = -1, 'decided'
+            break
+        if half_width is not None and radius <= half_width:
+            stop_reason = 'half_width'
+            break
+
+    payoffs = [s.mean for s in stats]
+    info = {
+        'num_games': stats[player].count,
+        'lower': lower,
+        'upper': upper,
+        'decision': decision,
+        'stop_reason': stop_reason,
+    }
+    return payoffs, info
@@ -197,6 +197,23 @@ def remove_illegal(action_probs, legal_actions):
         probs /= sum(probs)
     return probs
 
+def legal_actions_mask(states, num_actions):
+    ''' Get the legal actions of a batch of states as a boolean mask
+
+    Args:
+        states (list): A list of state dicts
+        num_actions (int): The number of actions
+
+    Returns:
+        mask (numpy.array): (batch, num_actions), True for the legal actions
+    '''
+    lengths = np.fromiter((len(state['legal_actions']) for state in states), dtype=np.int64, count=len(states))
+    actions = np.fromiter((action for state in states for action in state['legal_actions']), dtype=np.int64,
+                          count=int(lengths.sum()))
+    mask = np.zeros((len(states), num_actions), dtype=np.bool_)
+    mask[np.repeat(np.arange(len(states)), lengths), actions] = True
+    return mask
+
 def tournament(env, num):
     ''' Evaluate he performance of the agents in the environment
 
@@ -0,0 +1,156 @@
+import queue
+import threading
+import unittest
+from collections import deque
+
+import numpy as np
+import torch
+
+from rlcard.agents.dmc_agent.model import DMCAgent, DMCModel, DMCSharedNet
+from rlcard.agents.dmc_agent.param_store import ParameterStore
+from rlcard.agents.dmc_agent.inference_server import InferenceServer
+from rlcard.agents.dmc_agent.trainer import learn
+from rlcard.agents.dmc_agent.utils import create_buffers, UnrollWriter
+
+class TestDMC(unittest.TestCase):
+
+    def test_shared_net(self):
+        torch.manual_seed(0)
+        net = DMCSharedNet([2, 3], [4], mlp_layers=[16, 16], head_layers=[8, 8])
+        obs = torch.randn(3, 2, 3)
+        actions = torch.randn(6, 4)
+        counts = torch.tensor([1, 3, 2])
+        values = net(obs, actions, counts)
+        self.assertEqual(values.shape, (6,))
+        # The same as one observation per pair
+        torch.testing.assert_close(values, net(torch.repeat_interleave(obs, counts, dim=0), actions))
+
+    def test_agent(self):
+        np_random = np.random.RandomState(0)
+        states = [{'obs': np_random.rand(6), 'legal_actions': {0: None, 2: None, 3: None}, 'raw_legal_actions': ['a', 'c', 'd']},
+                  {'obs': np_random.rand(6), 'legal_actions': {1: None}, 'raw_legal_actions': ['b']}]
+        agent = DMCAgent([6], [4], mlp_layers=[16], exp_epsilon=0, device='cpu', shared_trunk=True)
+        batch = agent.predict_batch(states)
+        for state, (keys, values) in zip(states, batch):
+            expected_keys, expected = agent.predict(state)
+            np.testing.assert_array_equal(keys, expected_keys)
+            np.testing.assert_allclose(values, expected, rtol=1e-5, atol=1e-6)
+        self.assertEqual(agent.step_batch(states), [batch[0][0][np.argmax(batch[0][1])], 1])
+
+        # The learner trains the same network on one observation per frame
+        T, B = 5, 2
+        optimizer = torch.optim.RMSprop(agent.parameters(), lr=0.01)
+        batch = {
+            'state': torch.rand(T, B, 6),
+            'action': torch.nn.functional.one_hot(torch.randint(4, (T, B)), 4).float(),
+            'target': torch.rand(T, B),
+            'episode_return': torch.rand(T, B),
+            'done': torch.ones(T, B, dtype=torch.bool),
+        }
+        batch['version'] = torch.zeros(T, B, dtype=torch.int64)
+        store = ParameterStore({'cpu': DMCModel([[6]], [[4]], mlp_layers=[16], device='cpu', shared_trunk=True)},
+                               [0], publish_every=20, publish_interval=1000)
+        stats = [learn(0, store, agent, batch, optimizer, 'cpu', 40, [deque(maxlen=100)], threading.Lock())
+                 for _ in range(20)]
+        self.assertLess(stats[-1]['loss_0'], stats[0]['loss_0'])
+        self.assertEqual(stats[-1]['version_lag_0'], 0)
+        # Published after the 20th step
+        self.assertEqual(store.version(0), 1)
+        for param, actor_param in zip(agent.parameters(), store.models['cpu'].get_agent(0).parameters()):
+            torch.testing.assert_close(param, actor_param)
+
+    def test_parameter_store(self):
+        learner = DMCModel([[3], [3]], [[2], [2]], mlp_layers=[8], device='cpu')
+        store = ParameterStore({'cpu': DMCModel([[3], [3]], [[2], [2]], mlp_layers=[8], device='cpu')},
+                               [0, 0], publish_every=3, publish_interval=1000)
+        actor = DMCModel([[3], [3]], [[2], [2]], mlp_layers=[8], device='cpu')
+        versions = [0, 0]
+        self.assertFalse(store.pull(actor, 'cpu', versions))
+        self.assertEqual([store.maybe_publish(1, learner.get_agent(1)) for _ in range(6)],
+                         [False, False, True, False, False, True])
+        self.assertEqual((store.version(0), store.version(1)), (0, 2))
+        self.assertTrue(store.pull(actor, 'cpu', versions))
+        self.assertEqual(versions, [0, 2])
+        for param, actor_param in zip(learner.parameters(1), actor.parameters(1)):
+            torch.testing.assert_close(param, actor_param)
+
+        # An exported network is exported again after a pull
+        state = {'obs': np.ones(3), 'legal_actions': {0: None, 1: None}, 'raw_legal_actions': ['a', 'b']}
+        actor.get_agent(1).set_inference_backend('numpy')
+        actor.get_agent(1).predict(state)
+        with torch.no_grad():
+            learner.get_agent(1).net.fc_layers[-1].bias.add_(1)
+        store.publish(1, learner.get_agent(1))
+        self.assertTrue(store.pull(actor, 'cpu', versions))
+        np.testing.assert_allclose(actor.get_agent(1).predict(state)[1], learner.get_agent(1).predict(state)[1],
+                                   rtol=1e-5, atol=1e-6)
+
+        # A version being written is not pulled
+        store.versions[0] += 1
+        self.assertFalse(store.pull(actor, 'cpu', versions))
+        # Publishing by time
+        store.publish_interval = 0
+        self.assertTrue(store.maybe_publish(1, learner.get_agent(1)))
+
+    def test_unroll_writer(self):
+        T = 4
+        buffers = create_buffers(T, 3, [[2]], [[3]], ['cpu'])['cpu'][0]
+        free_queue, full_queue = queue.Queue(), queue.Queue()
+        for index in range(3):
+            free_queue.put(index)
+        writer = UnrollWriter(T, free_queue, full_queue, buffers)
+        np_random = np.random.RandomState(0)
+        frames = []
+        for steps in [3, 6, 1]:
+            states = [np_random.randint(2, size=2) for _ in range(steps)]
+            actions = [np_random.randint(2, size=3) for _ in range(steps)]
+            dones = np.arange(steps) == steps - 1
+            episode_returns = dones * float(steps)
+            self.assertTrue(writer.write(states, actions, -steps, episode_returns, dones))
+            frames.extend(zip(states, actions, [-steps] * steps, episode_returns, dones))
+        # Two full unrolls, the frames of the second episode span both
+        self.assertEqual([full_queue.get_nowait() for _ in range(2)], [0, 1])
+        self.assertTrue(full_queue.empty())
+        self.assertEqual((writer.index, writer.cursor), (2, 2))
+        for t, (state, action, target, episode_return, done) in enumerate(frames):
+            index, step = divmod(t, T)
+            np.testing.assert_array_equal(buffers['state'][index][step].numpy(), state)
+            np.testing.assert_array_equal(buffers['action'][index][step].numpy(), action)
+            self.assertEqual(buffers['target'][index][step].item(), target)
+            self.assertEqual(buffers['episode_return'][index][step].item(), episode_return)
+            self.assertEqual(buffers['done'][index][step].item(), done)
+            self.assertEqual(buffers['version'][index][step].item(), 0)
+
+        # None from the free queue stops the actor
+        free_queue.put(None)
+        self.assertFalse(writer.write(states * 3, actions * 3, 0.0, np.zeros(3), np.zeros(3, dtype=bool)))
+
+    def test_inference_server(self):
+        ctx = torch.multiprocessing.get_context('spawn')
+        learner = DMCModel([[3], [5]], [[4], [4]], mlp_layers=[8], device='cpu', shared_trunk=True)
+        store = ParameterStore({'cpu': DMCModel([[3], [5]], [[4], [4]], mlp_layers=[8], device='cpu', shared_trunk=True)},
+                               ctx.RawArray('q', 2))
+        for position in range(2):
+            store.publish(position, learner.get_agent(position))
+        server = InferenceServer(ctx, store, 'cpu', 2, [[3], [5]], [[4], [4]], 4, max_latency=0.01)
+        process = server.start(ctx)
+        try:
+            client = server.client(1)
+            np_random = np.random.RandomState(0)
+            for position in [0, 1, 1]:
+                state = {'obs': np_random.randint(2, size=3 + 2 * position),
+                         'legal_actions': {1: None, 3: None}, 'raw_legal_actions': ['b', 'd']}
+                keys, values = client.get_agent(position).predict(state)
+                expected_keys, expected = learner.get_agent(position).predict(state)
+                np.testing.assert_array_equal(keys, expected_keys)
+                np.testing.assert_allclose(values, expected, rtol=1e-5, atol=1e-6)
+            self.assertEqual(server.stats()['requests'], 3)
+            self.assertEqual(client.versions, [1, 1])
+            with self.assertRaises(ValueError):
+                client.query(0, np.zeros(3), np.zeros((5, 4)))
+        finally:
+            server.close()
+            process.join(10)
+
+if __name__ == '__main__':
+    unittest.main()
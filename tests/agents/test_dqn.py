@@ -2,7 +2,7 @@ import unittest
 import torch
 import numpy as np
 
-from rlcard.agents.dqn_agent import DQNAgent
+from rlcard.agents.dqn_agent import DQNAgent, Estimator, Memory, Transition, SumTree, PrioritizedMemory
 
 class TestDQN(unittest.TestCase):
 
@@ -51,3 +51,138 @@ class TestDQN(unittest.TestCase):
         predicted_action = agent.step({'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}})
         self.assertGreaterEqual(predicted_action, 0)
         self.assertLessEqual(predicted_action, 1)
+
+    def test_step_batch(self):
+        agent = DQNAgent(state_shape=[2],
+                         mlp_layers=[10,10],
+                         device=torch.device('cpu'))
+        states = [{'obs': np.random.random_sample((2,)), 'legal_actions': {1: None}, 'raw_legal_actions': ['raise']},
+                  {'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}, 'raw_legal_actions': ['call', 'raise']}]
+        actions = agent.step_batch(states)
+        self.assertEqual(len(actions), 2)
+        self.assertEqual(actions[0], 1)
+
+        actions, infos = agent.eval_step_batch(states)
+        self.assertEqual(actions[0], 1)
+        self.assertEqual(len(infos[1]['values']), 2)
+        q_values = agent.predict_batch(states)
+        for state, _q_values in zip(states, q_values):
+            np.testing.assert_allclose(_q_values, agent.predict(state), rtol=1e-5)
+
+
+    def test_memory(self):
+        memory = Memory(5, 3, num_actions=10)
+        for i in range(8):
+            memory.save(np.full(2, i, dtype=np.float64), i, float(i), np.full(2, i + 1), [i, 9], i % 2 == 0)
+        self.assertEqual(len(memory), 5)
+        # The oldest transitions are overwritten
+        self.assertEqual(sorted(memory.buffers['action']), [3, 4, 5, 6, 7])
+        state, action, reward, next_state, done, legal = memory.sample()
+        self.assertEqual(state.shape, (3, 2))
+        self.assertEqual(legal.shape, (3, 10))
+        for b in range(3):
+            self.assertEqual(state[b, 0], action[b])
+            self.assertEqual(reward[b], action[b])
+            self.assertEqual(next_state[b, 0], action[b] + 1)
+            self.assertEqual(done[b], action[b] % 2 == 0)
+            self.assertEqual(list(np.flatnonzero(legal[b])), [action[b], 9])
+
+        restored = Memory.from_checkpoint(memory.checkpoint_attributes())
+        for name, buffer in memory.buffers.items():
+            np.testing.assert_array_equal(restored.buffers[name], buffer)
+        self.assertEqual(restored.position, memory.position)
+
+        # Checkpoints that hold a list of transitions
+        transitions = [Transition(np.ones(2), 1, 0.5, np.zeros(2), False, [0, 1])]
+        legacy = Memory.from_checkpoint({'memory_size': 5, 'batch_size': 1, 'memory': transitions})
+        self.assertEqual(len(legacy), 1)
+        self.assertEqual(list(np.flatnonzero(legacy.sample()[5][0])), [0, 1])
+
+    def test_memory_pack_obs(self):
+        np_random = np.random.RandomState(0)
+        memory = Memory(100, 100, pack_obs=True)
+        states = np_random.randint(2, size=(100, 3, 5)).astype(np.float64)
+        for i, state in enumerate(states):
+            memory.save(state, i, 0, 1 - state, [0, 20], False)
+        self.assertEqual(memory.buffers['obs'].shape, (100, 2))
+        state, action, _, next_state, _, legal = memory.sample()
+        np.testing.assert_array_equal(state, states[action])
+        np.testing.assert_array_equal(next_state, 1 - states[action])
+        self.assertEqual(list(np.flatnonzero(legal[0])), [0, 20])
+        with self.assertRaises(ValueError):
+            memory.save(np.full((3, 5), 0.5), 0, 0, states[0], [0], False)
+
+        agent = DQNAgent(replay_memory_size=100,
+                         replay_memory_init_size=10,
+                         batch_size=4,
+                         num_actions=2,
+                         state_shape=[6],
+                         mlp_layers=[10],
+                         device=torch.device('cpu'),
+                         pack_obs=True)
+        for _ in range(20):
+            ts = [{'obs': np_random.randint(2, size=6), 'legal_actions': {0: None, 1: None}}, np_random.randint(2), 0,
+                  {'obs': np_random.randint(2, size=6), 'legal_actions': {1: None}}, False]
+            agent.feed(ts)
+        self.assertEqual(agent.train_t, 11)
+
+    def test_sum_tree(self):
+        np_random = np.random.RandomState(0)
+        tree = SumTree(6)
+        self.assertEqual(tree.capacity, 8)
+        values = np_random.rand(6)
+        tree.update(np.arange(6), values)
+        tree.update([2, 2, 4], [0.5, 0.5, 0.0])
+        values[2], values[4] = 0.5, 0.0
+        self.assertAlmostEqual(tree.total(), values.sum())
+        prefix_sums = np.linspace(0, values.sum(), 50, endpoint=False)
+        np.testing.assert_array_equal(tree.find(prefix_sums), np.searchsorted(np.cumsum(values), prefix_sums, side='right'))
+        # The end of the range stays in the filled leaves
+        self.assertEqual(tree.find([tree.total()])[0], 5)
+
+    def test_prioritized_memory(self):
+        np.random.seed(0)
+        memory = PrioritizedMemory(4, 1000, num_actions=2, alpha=1.0)
+        for i in range(6):
+            memory.save(np.zeros(2), i, 0, np.zeros(2), [0], False)
+        # The slots of actions 4, 5, 2, 3
+        memory.update_priorities(np.arange(4), np.array([1.0, 3.0, 0.0, 0.0]))
+        _, action, _, _, _, _, weights, indices = memory.sample(beta=1.0)
+        self.assertEqual(set(action), {4, 5})
+        self.assertAlmostEqual(np.mean(action == 5), 0.75, delta=0.05)
+        np.testing.assert_allclose(weights[action == 5], 1 / 3, rtol=1e-5)
+        np.testing.assert_allclose(weights[action == 4], 1)
+        restored = PrioritizedMemory.from_checkpoint(memory.checkpoint_attributes())
+        np.testing.assert_allclose(restored.tree.nodes, memory.tree.nodes)
+
+        agent = DQNAgent(replay_memory_size=100,
+                         replay_memory_init_size=10,
+                         batch_size=4,
+                         num_actions=2,
+                         state_shape=[2],
+                         mlp_layers=[10],
+                         device=torch.device('cpu'),
+                         prioritized_replay=True)
+        for _ in range(30):
+            ts = [{'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}}, np.random.randint(2), 1,
+                  {'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}}, True]
+            agent.feed(ts)
+        # The priorities of the sampled transitions are their TD errors
+        self.assertLess(agent.memory.tree.get(np.arange(30)).min(), 1)
+        agent = DQNAgent.from_checkpoint(agent.checkpoint_attributes())
+        self.assertIsInstance(agent.memory, PrioritizedMemory)
+        agent.train()
+
+    def test_next_values(self):
+        agent = DQNAgent(num_actions=5,
+                         state_shape=[3],
+                         mlp_layers=[10],
+                         device=torch.device('cpu'))
+        agent.target_estimator = Estimator(num_actions=5, state_shape=[3], mlp_layers=[10], device=torch.device('cpu'))
+        np_random = np.random.RandomState(0)
+        next_states = np_random.rand(8, 3)
+        legal = np_random.rand(8, 5) > 0.5
+        legal[:, 4] = True
+        q_values = np.where(legal, agent.q_estimator.predict_nograd(next_states), -np.inf)
+        expected = agent.target_estimator.predict_nograd(next_states)[np.arange(8), q_values.argmax(axis=1)]
+        np.testing.assert_allclose(agent.next_values(next_states, legal), expected, rtol=1e-6)
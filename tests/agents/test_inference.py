@@ -0,0 +1,91 @@
+import unittest
+
+import numpy as np
+import torch
+from torch import nn
+
+from rlcard.agents import DQNAgent, NFSPAgent
+from rlcard.agents.dmc_agent.model import DMCAgent
+from rlcard.agents.inference import BACKENDS, NumpyMLP, NumpyDMCNet, NumpyDMCSharedNet, export_model
+
+class TestInference(unittest.TestCase):
+
+    def test_batch_norm_folding(self):
+        torch.manual_seed(0)
+        sequential = nn.Sequential(nn.Flatten(), nn.BatchNorm1d(6), nn.Linear(6, 8), nn.BatchNorm1d(8),
+                                   nn.ReLU(), nn.Linear(8, 8), nn.Tanh(), nn.BatchNorm1d(8), nn.Linear(8, 3))
+        # Running statistics that are not the identity
+        sequential.train()
+        with torch.no_grad():
+            for _ in range(10):
+                sequential(torch.randn(32, 2, 3) * 3 + 1)
+            for layer in sequential:
+                if isinstance(layer, nn.BatchNorm1d):
+                    layer.weight.uniform_(0.5, 2)
+                    layer.bias.uniform_(-1, 1)
+        sequential.eval()
+        mlp = NumpyMLP.from_sequential(sequential)
+        self.assertEqual(len(mlp.weights), 3)
+        x = np.random.RandomState(0).randn(5, 2, 3).astype(np.float32)
+        with torch.no_grad():
+            expected = sequential(torch.from_numpy(x)).numpy()
+        np.testing.assert_allclose(mlp(x), expected, rtol=1e-5, atol=1e-5)
+
+        with self.assertRaises(ValueError):
+            NumpyMLP.from_sequential(nn.Sequential(nn.Linear(2, 2), nn.Dropout()))
+        with self.assertRaises(ValueError):
+            export_model(sequential, 'onnx')
+
+    def test_agents(self):
+        np_random = np.random.RandomState(0)
+        states = [{'obs': np_random.rand(6), 'legal_actions': {0: None, 2: None}, 'raw_legal_actions': ['a', 'c']},
+                  {'obs': np_random.rand(6), 'legal_actions': {1: None}, 'raw_legal_actions': ['b']}]
+        obs = np.stack([state['obs'] for state in states])
+
+        agent = DQNAgent(batch_size=4, num_actions=4, state_shape=[6], mlp_layers=[16, 16], device=torch.device('cpu'))
+        nfsp = NFSPAgent(num_actions=4, state_shape=[6], hidden_layers_sizes=[16], q_mlp_layers=[16],
+                         device=torch.device('cpu'))
+        dmc = DMCAgent([6], [4], mlp_layers=[16, 16], device='cpu')
+        shared = DMCAgent([6], [4], mlp_layers=[16, 16], device='cpu', shared_trunk=True)
+        expected_q = agent.predict_batch(states)
+        expected_probs = nfsp._act_batch(obs)
+        expected_values = {dmc: dmc.predict_batch(states), shared: shared.predict_batch(states)}
+        for backend in BACKENDS:
+            # int8 quantization changes the values a little
+            tolerance = 0.05 if backend == 'int8' else 1e-5
+            agent.set_inference_backend(backend)
+            np.testing.assert_allclose(agent.predict_batch(states), expected_q, atol=tolerance)
+            np.testing.assert_allclose(agent.predict(states[0]), expected_q[0], atol=tolerance)
+            nfsp.set_inference_backend(backend)
+            np.testing.assert_allclose(nfsp._act_batch(obs), expected_probs, atol=tolerance)
+            self.assertEqual(nfsp._rl_agent.inference_backend, backend)
+            for dmc_agent, expected_batch in expected_values.items():
+                dmc_agent.set_inference_backend(backend)
+                for (keys, values), (expected_keys, expected) in zip(dmc_agent.predict_batch(states), expected_batch):
+                    np.testing.assert_array_equal(keys, expected_keys)
+                    np.testing.assert_allclose(values, expected, atol=tolerance)
+                np.testing.assert_allclose(dmc_agent.predict(states[0])[1], expected_batch[0][1], atol=tolerance)
+        dmc.set_inference_backend('numpy')
+        dmc.predict(states[0])
+        self.assertIsInstance(dmc._inference, NumpyDMCNet)
+        shared.set_inference_backend('numpy')
+        shared.predict(states[0])
+        self.assertIsInstance(shared._inference, NumpyDMCSharedNet)
+
+        # New weights are exported again
+        dmc.load_state_dict(DMCAgent([6], [4], mlp_layers=[16, 16], device='cpu').state_dict())
+        values = dmc.predict(states[0])[1]
+        dmc.set_inference_backend(None)
+        np.testing.assert_allclose(values, dmc.predict(states[0])[1], atol=1e-5)
+
+        agent.set_inference_backend('numpy')
+        for _ in range(20):
+            agent.feed([states[0], 0, 1.0, states[1], False])
+        agent.train()
+        self.assertIsNone(agent._inference)
+        expected = agent.predict_batch(states)
+        agent.set_inference_backend(None)
+        np.testing.assert_allclose(expected, agent.predict_batch(states), atol=1e-5)
+
+if __name__ == '__main__':
+    unittest.main()
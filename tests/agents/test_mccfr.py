@@ -0,0 +1,79 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.agents import RandomAgent
+from rlcard.agents.mccfr_agent import MCCFRAgent, EnvTree
+from rlcard.games.leducholdem.tree import LeducholdemTree
+from rlcard.utils import tournament
+
+class TestMCCFR(unittest.TestCase):
+
+    def test_train(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back': True})
+        for sampling in ['external', 'outcome']:
+            agent = MCCFRAgent(env, sampling=sampling, seed=0)
+            for _ in range(100):
+                agent.train()
+            self.assertGreater(len(agent.average_policy), 0)
+
+            state, _ = env.reset()
+            action, info = agent.eval_step(state)
+            self.assertIn(action, state['legal_actions'])
+            self.assertAlmostEqual(sum(info['probs'].values()), 1)
+            self.assertIn(agent.step(state), state['legal_actions'])
+
+    def test_env_tree(self):
+        env = rlcard.make('limit-holdem', config={'allow_step_back': True, 'seed': 0})
+        tree = EnvTree(env)
+        tree.apply(None)
+        state = env.get_state(env.get_player_id())
+        self.assertEqual(tree.legal_action_ids(), list(state['legal_actions'].keys()))
+        self.assertEqual(tree.infoset_key(tree.current_player()), EnvTree.key_from_state(state))
+        tree.apply(tree.legal_action_ids()[0])
+        tree.undo()
+        self.assertEqual(tree.infoset_key(tree.current_player()), EnvTree.key_from_state(state))
+        tree.undo()
+
+        agent = MCCFRAgent(env, sampling='outcome', plus=True, seed=0)
+        for _ in range(10):
+            agent.train()
+        self.assertTrue(all(np.all(regret >= 0) for regret in agent.regrets.values()))
+
+    def test_leduc_tree(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0})
+        agent = MCCFRAgent(env, tree=LeducholdemTree(), seed=0)
+        for _ in range(2000):
+            agent.train()
+        env.set_agents([agent, RandomAgent(num_actions=env.num_actions)])
+        self.assertGreater(tournament(env, 2000)[0], 0)
+
+    def test_train_parallel(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back': True})
+        agent = MCCFRAgent(env, seed=0)
+        agent.train_parallel(40, num_workers=2, sync_interval=10, seed=0)
+        self.assertEqual(agent.iteration, 40)
+        self.assertGreater(len(agent.regrets), 0)
+
+        # The result does not depend on the scheduling of the workers
+        other = MCCFRAgent(env, seed=0)
+        other.train_parallel(40, num_workers=2, sync_interval=10, seed=0)
+        self.assertEqual(set(agent.average_policy), set(other.average_policy))
+        for key in agent.average_policy:
+            self.assertTrue(np.allclose(agent.average_policy[key], other.average_policy[key]))
+
+    def test_save_and_load(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back': True})
+        agent = MCCFRAgent(env, model_path='experiments/mccfr_model', seed=0)
+        for _ in range(50):
+            agent.train()
+        agent.save()
+
+        new_agent = MCCFRAgent(env, model_path='experiments/mccfr_model')
+        new_agent.load()
+        self.assertEqual(agent.iteration, new_agent.iteration)
+        self.assertEqual(len(agent.regrets), len(new_agent.regrets))
+        self.assertEqual(len(agent.average_policy), len(new_agent.average_policy))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,7 @@ import unittest
 import torch
 import numpy as np
 
-from rlcard.agents.nfsp_agent import NFSPAgent
+from rlcard.agents.nfsp_agent import NFSPAgent, ReservoirBuffer, Transition
 
 class TestNFSP(unittest.TestCase):
 
@@ -45,3 +45,44 @@ class TestNFSP(unittest.TestCase):
 
             ts = [{'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}}, np.random.randint(2), 0, {'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}, 'raw_legal_actions': ['call', 'raise']}, True]
             agent.feed(ts)
+
+    def test_step_batch(self):
+        agent = NFSPAgent(num_actions=2,
+                          state_shape=[2],
+                          hidden_layers_sizes=[10,10],
+                          q_mlp_layers=[10,10],
+                          device=torch.device('cpu'))
+        states = [{'obs': np.random.random_sample((2,)), 'legal_actions': {1: None}, 'raw_legal_actions': ['raise']}
+                  for _ in range(3)]
+        for _ in range(10):
+            agent.sample_episode_policy()
+            self.assertEqual(agent.step_batch(states), [1, 1, 1])
+        actions, infos = agent.eval_step_batch(states)
+        self.assertEqual(actions, [1, 1, 1])
+        self.assertEqual(len(infos), 3)
+
+
+    def test_reservoir_buffer(self):
+        np.random.seed(0)
+        counts = np.zeros(100)
+        for _ in range(300):
+            buffer = ReservoirBuffer(10)
+            for i in range(100):
+                buffer.add(np.full(3, i, dtype=np.float64), i % 7)
+            self.assertEqual(len(buffer), 10)
+            info_states, actions = buffer.sample(10)
+            self.assertEqual(info_states.dtype, np.float32)
+            np.testing.assert_array_equal(actions, info_states[:, 0].astype(int) % 7)
+            counts[info_states[:, 0].astype(int)] += 1
+        # Every element is kept with probability 10 / 100
+        self.assertLess(abs(counts[:50].mean() - counts[50:].mean()), 5)
+        self.assertAlmostEqual(counts.mean(), 30)
+        with self.assertRaises(ValueError):
+            buffer.sample(11)
+
+        # Checkpoints with one-hot transitions
+        data = [Transition(info_state=np.full(3, i), action_probs=np.eye(4)[i % 4]) for i in range(5)]
+        restored = ReservoirBuffer.from_checkpoint({'reservoir_buffer_capacity': 5, 'data': data, 'add_calls': 20})
+        self.assertEqual([action for _, action in restored], [0, 1, 2, 3, 0])
+        restored.add(np.zeros(3), 1)
+        self.assertEqual(restored._add_calls, 21)
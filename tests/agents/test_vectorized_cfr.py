@@ -0,0 +1,80 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.agents import RandomAgent
+from rlcard.agents.vectorized_cfr_agent import VectorizedCFRAgent, FlatTree, TERMINAL
+from rlcard.games.leducholdem.tree import LeducholdemTree, CHANCE
+from rlcard.utils import tournament
+
+def expected_payoffs(tree):
+    ''' The payoffs of uniform random play, by recursion over the tree
+    '''
+    if tree.is_over():
+        return np.array(tree.payoffs())
+    if tree.current_player() == CHANCE:
+        outcomes = tree.chance_outcomes()
+    else:
+        legal_actions = tree.legal_action_ids()
+        outcomes = [(action, 1.0 / len(legal_actions)) for action in legal_actions]
+    value = 0
+    for outcome, prob in outcomes:
+        tree.apply(outcome)
+        value = value + prob * expected_payoffs(tree)
+        tree.undo()
+    return value
+
+class TestVectorizedCFR(unittest.TestCase):
+
+    def test_flat_tree(self):
+        tree = LeducholdemTree()
+        flat = FlatTree(tree)
+        # The children of every node are contiguous and come after it
+        self.assertTrue(np.all(np.diff(flat.parent[1:]) >= 0))
+        self.assertTrue(np.all(flat.parent[1:] < np.arange(1, flat.num_nodes)))
+        self.assertEqual(flat.utility[flat.kind != TERMINAL].sum(), 0)
+
+        uniform = flat.legal / flat.legal.sum(axis=1, keepdims=True)
+        values = flat.values(flat.edge_weights(uniform))
+        self.assertTrue(np.allclose(values[0], expected_payoffs(tree)))
+
+        reach = flat.reach(flat.edge_weights(uniform))
+        terminals = flat.kind == TERMINAL
+        self.assertAlmostEqual(reach[:, terminals].prod(axis=0).sum(), 1)
+
+    def test_train(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0})
+        agent = VectorizedCFRAgent(env, model_path='experiments/vectorized_cfr_model')
+        for _ in range(100):
+            agent.train()
+
+        # Every state of the environment is an infoset of the tree
+        for _ in range(20):
+            state, player_id = env.reset()
+            while not env.is_over():
+                self.assertIn(agent.key_from_state(state), agent.tree.infoset_ids)
+                action, info = agent.eval_step(state)
+                self.assertIn(action, state['legal_actions'])
+                self.assertAlmostEqual(sum(info['probs'].values()), 1)
+                state, player_id = env.step(action)
+
+        env.set_agents([agent, RandomAgent(num_actions=env.num_actions)])
+        payoffs = tournament(env, 2000)
+        self.assertGreater(payoffs[0], 0)
+
+    def test_save_and_load(self):
+        env = rlcard.make('leduc-holdem')
+        agent = VectorizedCFRAgent(env, model_path='experiments/vectorized_cfr_model', plus=False)
+        for _ in range(10):
+            agent.train()
+        agent.save()
+
+        new_agent = VectorizedCFRAgent(env, model_path='experiments/vectorized_cfr_model')
+        new_agent.load()
+        self.assertFalse(new_agent.plus)
+        self.assertEqual(agent.iteration, new_agent.iteration)
+        self.assertTrue(np.array_equal(agent.average_policy, new_agent.average_policy))
+        self.assertTrue(np.array_equal(agent.policy, new_agent.policy))
+
+if __name__ == '__main__':
+    unittest.main()
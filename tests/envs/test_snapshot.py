@@ -0,0 +1,87 @@
+import pickle
+import unittest
+
+import numpy as np
+
+import rlcard
+
+ENV_IDS = ['blackjack', 'doudizhu', 'limit-holdem', 'no-limit-holdem', 'leduc-holdem',
+           'uno', 'mahjong', 'gin-rummy', 'bridge', 'five-hundred']
+
+def _legal_actions(env, state):
+    if isinstance(state, dict):
+        return list(state['legal_actions'])
+    # The five-hundred env extracts the observation only
+    return [action.action_id for action in env._get_legal_actions()]
+
+def _play(env, state, np_random):
+    observations, actions = [], []
+    while not env.is_over():
+        actions.append(int(np_random.choice(_legal_actions(env, state))))
+        state, _ = env.step(actions[-1])
+        observations.append(state['obs'] if isinstance(state, dict) else state)
+    return observations, actions, env.get_payoffs()
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_restore_all_envs(self):
+        for env_id in ENV_IDS:
+            env = rlcard.make(env_id, config={'seed': 3})
+            np_random = np.random.RandomState(0)
+            state, _ = env.reset()
+            for _ in range(2):
+                if not env.is_over():
+                    state, _ = env.step(int(np_random.choice(_legal_actions(env, state))))
+            timestep = env.timestep
+            snapshot = env.snapshot()
+            observations, actions, payoffs = _play(env, state, np_random)
+
+            # In the same env and in a fresh env after pickling
+            for target in [env, rlcard.make(env_id)]:
+                state, _ = target.restore(pickle.loads(pickle.dumps(snapshot)))
+                self.assertEqual(target.timestep, timestep, env_id)
+                for action, obs in zip(actions, observations):
+                    state, _ = target.step(action)
+                    np.testing.assert_array_equal(state['obs'] if isinstance(state, dict) else state, obs)
+                self.assertTrue(target.is_over(), env_id)
+                np.testing.assert_array_equal(target.get_payoffs(), payoffs)
+
+    def test_random_generator(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0})
+        env.reset()
+        snapshot = env.snapshot()
+        state, _ = env.reset()
+        env.restore(snapshot)
+        self.assertEqual(env.reset()[0]['raw_obs'], state['raw_obs'])
+
+    def test_step_back_after_restore(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0, 'allow_step_back': True})
+        state, _ = env.reset()
+        env.step(list(state['legal_actions'])[0])
+        snapshot = env.snapshot(history=True)
+        env.reset()
+        env.restore(snapshot)
+        self.assertTrue(env.step_back())
+        self.assertEqual(env.get_state(env.get_player_id())['raw_obs'], state['raw_obs'])
+        self.assertFalse(env.step_back())
+
+        # Without the history the game cannot step back after restore
+        env.step(list(state['legal_actions'])[0])
+        env.restore(env.snapshot())
+        self.assertFalse(env.step_back())
+
+    def test_history_left_out(self):
+        for env_id in ['uno', 'mahjong']:
+            env = rlcard.make(env_id, config={'seed': 0, 'allow_step_back': True})
+            np_random = np.random.RandomState(0)
+            state, _ = env.reset()
+            sizes = []
+            for _ in range(6):
+                sizes.append(len(env.snapshot().game))
+                state, _ = env.step(int(np_random.choice(_legal_actions(env, state))))
+            # The deep copies of the history are not in the snapshot
+            self.assertLess(max(sizes), 2 * min(sizes), env_id)
+            self.assertGreater(len(env.snapshot(history=True).game), 3 * len(env.snapshot().game), env_id)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -49,6 +49,24 @@ class TestBlackjackGame(unittest.TestCase):
             state, _ = game.step(action)
         self.assertEqual(len(state['state'][1]), len(game.dealer.hand))
 
+    def test_step_back_random_walk(self):
+        game = Game(allow_step_back=True)
+        game.configure({'game_num_players': 2, 'game_num_decks': 1})
+        np_random = np.random.RandomState(0)
+        fingerprint = lambda: (repr([game.get_state(p) for p in range(2)]), [str(c) for c in game.dealer.deck],
+                               game.game_pointer, repr(game.winner), game.dealer.status, game.dealer.score,
+                               [(p.status, p.score) for p in game.players])
+        for _ in range(20):
+            game.init_game()
+            fingerprints = []
+            while not game.is_over():
+                fingerprints.append(fingerprint())
+                game.step(np_random.choice(['hit', 'stand']))
+            for expected in reversed(fingerprints):
+                self.assertTrue(game.step_back())
+                self.assertEqual(fingerprint(), expected)
+            self.assertFalse(game.step_back())
+
     def test_step_back(self):
         game = Game(allow_step_back=True)
         game.configure(DEFAULT_GAME_CONFIG)
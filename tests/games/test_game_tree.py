@@ -0,0 +1,127 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.agents import MCCFRAgent
+from rlcard.games.base import CHANCE
+from rlcard.games.leducholdem.tree import LeducholdemTree
+from rlcard.games.limitholdem.tree import LimitholdemTree
+from rlcard.games.five_hundred.tree import FiveHundredTree
+
+def random_walk(test, tree, np_random):
+    ''' Play a random game, checking that undo restores every decision
+
+    Returns:
+        (int): The depth of the game
+    '''
+    depth = 0
+    while not tree.is_over():
+        player = tree.current_player()
+        if player == CHANCE:
+            outcomes = tree.chance_outcomes()
+            test.assertAlmostEqual(sum(prob for _, prob in outcomes), 1)
+            action = outcomes[np_random.randint(len(outcomes))][0]
+        else:
+            key = tree.infoset_key(player)
+            legal_actions = tree.legal_action_ids()
+            tree.apply(legal_actions[np_random.randint(len(legal_actions))])
+            tree.undo()
+            test.assertEqual(tree.infoset_key(player), key)
+            test.assertEqual(tree.legal_action_ids(), legal_actions)
+            action = legal_actions[np_random.randint(len(legal_actions))]
+        tree.apply(action)
+        depth += 1
+    return depth
+
+def card_index(cards, card):
+    return [c.get_index() for c in cards].index(card.get_index())
+
+class TestGameTree(unittest.TestCase):
+
+    def check_random_walks(self, tree, num_games):
+        np_random = np.random.RandomState(0)
+        for _ in range(num_games):
+            depth = random_walk(self, tree, np_random)
+            payoffs = tree.payoffs()
+            for _ in range(depth):
+                tree.undo()
+            self.assertEqual(tree.current_player(), CHANCE)
+        return payoffs
+
+    def test_random_walks(self):
+        self.check_random_walks(LeducholdemTree(), 100)
+        self.check_random_walks(LimitholdemTree(), 100)
+        payoffs = self.check_random_walks(FiveHundredTree(), 5)
+        self.assertEqual(payoffs[0], payoffs[2])
+
+    def test_leduc_matches_env(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0})
+        tree = LeducholdemTree()
+        np_random = np.random.RandomState(0)
+        for _ in range(50):
+            state, player_id = env.reset()
+            game = env.game
+            s = [p.in_chips for p in game.players].index(game.small_blind)
+            hands = tuple(card_index(tree.cards, p.hand) for p in game.players)
+            tree.apply(tree.deals.index((s,) + hands))
+            depth = 1
+            while not env.is_over():
+                self.assertEqual(tree.infoset_key(player_id), LeducholdemTree.key_from_state(state))
+                self.assertEqual(tree.legal_action_ids(), list(state['legal_actions']))
+                action = np_random.choice(list(state['legal_actions']))
+                state, player_id = env.step(action)
+                tree.apply(action)
+                depth += 1
+                if tree.current_player() == CHANCE:
+                    tree.apply(card_index(tree.game.dealer.deck, game.public_card))
+                    depth += 1
+            self.assertTrue(tree.is_over())
+            self.assertEqual(tree.payoffs(), list(env.get_payoffs()))
+            for _ in range(depth):
+                tree.undo()
+
+    def test_limitholdem_matches_env(self):
+        env = rlcard.make('limit-holdem', config={'seed': 0})
+        tree = LimitholdemTree()
+        np_random = np.random.RandomState(0)
+        for _ in range(50):
+            state, player_id = env.reset()
+            game = env.game
+            tree.apply([p.in_chips for p in game.players].index(game.small_blind))
+            for p in game.players:
+                for card in p.hand:
+                    tree.apply(card_index(tree.cards, card))
+            depth = 1 + 2 * len(game.players)
+            while not env.is_over():
+                self.assertEqual(tree.infoset_key(player_id), LimitholdemTree.key_from_state(state))
+                self.assertEqual(tree.legal_action_ids(), list(state['legal_actions']))
+                action = np_random.choice(list(state['legal_actions']))
+                state, player_id = env.step(action)
+                tree.apply(action)
+                depth += 1
+                num_public_cards = len(tree.game.public_cards)
+                while tree.current_player() == CHANCE:
+                    card = game.public_cards[num_public_cards + len(tree.pending_cards)]
+                    tree.apply(card_index(tree.game.dealer.deck, card))
+                    depth += 1
+            self.assertTrue(tree.is_over())
+            self.assertEqual(tree.payoffs(), list(env.get_payoffs()))
+            for _ in range(depth):
+                tree.undo()
+
+    def test_mccfr(self):
+        env = rlcard.make('limit-holdem', config={'seed': 0})
+        agent = MCCFRAgent(env, sampling='outcome', tree=LimitholdemTree(), seed=0)
+        for _ in range(20):
+            agent.train()
+        state, _ = env.reset()
+        action, _ = agent.eval_step(state)
+        self.assertIn(action, state['legal_actions'])
+
+        env = rlcard.make('five-hundred')
+        agent = MCCFRAgent(env, sampling='outcome', tree=FiveHundredTree(), seed=0)
+        agent.train()
+        self.assertGreater(len(agent.regrets), 0)
+
+if __name__ == '__main__':
+    unittest.main()
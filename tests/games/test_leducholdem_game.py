@@ -50,6 +50,22 @@ class TestLeducholdemMethods(unittest.TestCase):
         game.step('check')
         self.assertEqual(game.round_counter, 1)
 
+    def test_step_back_random_walk(self):
+        game = Game(allow_step_back=True)
+        np_random = np.random.RandomState(0)
+        fingerprint = lambda: (repr([game.get_state(p) for p in range(2)]), [str(c) for c in game.dealer.deck],
+                               game.round_counter)
+        for _ in range(20):
+            game.init_game()
+            fingerprints = []
+            while not game.is_over():
+                fingerprints.append(fingerprint())
+                game.step(np_random.choice(game.get_legal_actions()))
+            for expected in reversed(fingerprints):
+                self.assertTrue(game.step_back())
+                self.assertEqual(fingerprint(), expected)
+            self.assertFalse(game.step_back())
+
     def test_step_back(self):
         game = Game(allow_step_back=True)
         state, player_id = game.init_game()
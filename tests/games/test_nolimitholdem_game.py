@@ -104,6 +104,23 @@ class TestNolimitholdemMethods(unittest.TestCase):
 
         self.assertEqual(Stage.RIVER, game.stage)
 
+    def test_step_back_random_walk(self):
+        game = Game(allow_step_back=True, num_players=3)
+        np_random = np.random.RandomState(0)
+        fingerprint = lambda: (repr([game.get_state(p) for p in range(3)]), [str(c) for c in game.dealer.deck],
+                               game.round_counter, game.round.not_playing_num)
+        for _ in range(20):
+            game.init_game()
+            fingerprints = []
+            while not game.is_over():
+                fingerprints.append(fingerprint())
+                legal_actions = game.get_legal_actions()
+                game.step(legal_actions[np_random.randint(len(legal_actions))])
+            for expected in reversed(fingerprints):
+                self.assertTrue(game.step_back())
+                self.assertEqual(fingerprint(), expected)
+            self.assertFalse(game.step_back())
+
     def test_all_in(self):
         game = Game()
 
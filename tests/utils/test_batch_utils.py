@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+import torch
+
+import rlcard
+from rlcard.agents.random_agent import RandomAgent
+from rlcard.agents.dqn_agent import DQNAgent
+from rlcard.utils.batch_utils import run_lockstep, run_batch, tournament_batch
+
+class TestBatchUtils(unittest.TestCase):
+
+    def test_run_batch(self):
+        envs = [rlcard.make('leduc-holdem', config={'seed': i}) for i in range(4)]
+        agents = [RandomAgent(envs[0].num_actions) for _ in range(envs[0].num_players)]
+        for env in envs:
+            env.set_agents(agents)
+        trajectories, payoffs = run_batch(envs, is_training=True)
+        self.assertEqual(len(trajectories), 4)
+        self.assertEqual(len(payoffs), 4)
+        for _trajectories, _payoffs in zip(trajectories, payoffs):
+            self.assertEqual(len(_trajectories), 2)
+            self.assertAlmostEqual(sum(_payoffs), 0)
+            for player_trajectory in _trajectories:
+                self.assertEqual(len(player_trajectory) % 2, 1)
+
+    def test_run_lockstep(self):
+        envs = [rlcard.make('uno', config={'seed': i}) for i in range(3)]
+        agents = [RandomAgent(envs[0].num_actions) for _ in range(envs[0].num_players)]
+        for env in envs:
+            env.set_agents(agents)
+        finished = [index for index, _, _ in run_lockstep(envs, num_games=10)]
+        self.assertEqual(len(finished), 10)
+
+    def test_tournament_batch(self):
+        envs = [rlcard.make('leduc-holdem', config={'seed': i}) for i in range(8)]
+        agent = DQNAgent(num_actions=envs[0].num_actions,
+                         state_shape=envs[0].state_shape[0],
+                         mlp_layers=[16],
+                         device=torch.device('cpu'))
+        for env in envs:
+            env.set_agents([agent, RandomAgent(envs[0].num_actions)])
+        payoffs = tournament_batch(envs, 100)
+        self.assertEqual(len(payoffs), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import torch
+
+from rlcard.agents import DQNAgent, NFSPAgent
+from rlcard.utils.checkpoint import write_checkpoint, read_checkpoint, wait_for_checkpoint, array_dir_prefix
+
+class TestCheckpoint(unittest.TestCase):
+
+    def test_write_and_read(self):
+        path = os.path.join(tempfile.mkdtemp(), 'checkpoint.pt')
+        net = torch.nn.BatchNorm1d(3)
+        attributes = {
+            'buffers': {'obs': np.arange(12, dtype=np.float32).reshape(4, 3), 'empty': np.zeros((0, 2))},
+            'state_dict': net.state_dict(),
+            'size': 4,
+            'dtype': np.dtype(np.uint8),
+        }
+        write_checkpoint(attributes, path)
+        checkpoint = read_checkpoint(path)
+        self.assertIsInstance(checkpoint['buffers']['obs'], np.memmap)
+        np.testing.assert_array_equal(checkpoint['buffers']['obs'], attributes['buffers']['obs'])
+        self.assertEqual(checkpoint['buffers']['empty'].shape, (0, 2))
+        self.assertEqual(checkpoint['size'], 4)
+        self.assertEqual(checkpoint['dtype'], np.uint8)
+        # Copy-on-write
+        checkpoint['buffers']['obs'][0] = -1
+        np.testing.assert_array_equal(read_checkpoint(path)['buffers']['obs'][0], [0, 1, 2])
+        net.load_state_dict(checkpoint['state_dict'])
+
+        # A background write saves the arrays as they were when it was called
+        write_checkpoint(attributes, path, background=True)
+        attributes['buffers']['obs'][:] = 7
+        wait_for_checkpoint()
+        np.testing.assert_array_equal(read_checkpoint(path, mmap_mode=None)['buffers']['obs'][3], [9, 10, 11])
+        self.assertEqual(len([name for name in os.listdir(os.path.dirname(path))
+                              if name.startswith(os.path.basename(array_dir_prefix(path)))]), 1)
+
+    def test_agents(self):
+        path = tempfile.mkdtemp()
+        np_random = np.random.RandomState(0)
+        agent = DQNAgent(replay_memory_size=50,
+                         replay_memory_init_size=10,
+                         batch_size=4,
+                         num_actions=2,
+                         state_shape=[3],
+                         mlp_layers=[8],
+                         device=torch.device('cpu'))
+        for _ in range(60):
+            ts = [{'obs': np_random.rand(3), 'legal_actions': {0: None, 1: None}}, np_random.randint(2), 0,
+                  {'obs': np_random.rand(3), 'legal_actions': {1: None}}, False]
+            agent.feed(ts)
+        agent.save_checkpoint(path)
+        restored = DQNAgent.from_checkpoint(read_checkpoint(os.path.join(path, 'checkpoint_dqn.pt')))
+        self.assertIsInstance(restored.memory.buffers['obs'], np.memmap)
+        for name, buffer in agent.memory.buffers.items():
+            np.testing.assert_array_equal(restored.memory.buffers[name], buffer)
+        restored.train()
+
+        agent = NFSPAgent(num_actions=2,
+                          state_shape=[3],
+                          hidden_layers_sizes=[8],
+                          q_mlp_layers=[8],
+                          anticipatory_param=1.0,
+                          batch_size=4,
+                          min_buffer_size_to_learn=10,
+                          device=torch.device('cpu'))
+        for _ in range(30):
+            agent.sample_episode_policy()
+            agent.step({'obs': np_random.rand(3), 'legal_actions': {0: None, 1: None}})
+        agent.save_checkpoint(path, background=True)
+        wait_for_checkpoint()
+        restored = NFSPAgent.from_checkpoint(read_checkpoint(os.path.join(path, 'checkpoint_nfsp.pt')))
+        self.assertEqual(len(restored._reservoir_buffer), 30)
+        for (saved_state, saved_action), (info_state, action) in zip(restored._reservoir_buffer, agent._reservoir_buffer):
+            np.testing.assert_array_equal(saved_state, info_state)
+            self.assertEqual(saved_action, action)
+        self.assertIsNotNone(restored.train_sl())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import numpy as np
+import torch
+
+import rlcard
+from rlcard.agents.random_agent import RandomAgent
+from rlcard.agents.dqn_agent import DQNAgent
+from rlcard.agents.nfsp_agent import NFSPAgent
+from rlcard.utils.collector import TransitionRing, PolicyStore, ExperienceCollector
+
+class TestCollector(unittest.TestCase):
+
+    def test_transition_ring(self):
+        ring = TransitionRing(4, [3], 2)
+        for i in range(3):
+            transition = dict(obs=np.ones(3) * i, action=i, reward=0.5, next_obs=np.zeros(3), done=False,
+                              legal_actions=np.array([True, False]), version=1, best_response=False)
+            self.assertTrue(ring.put(transition, timeout=0.1))
+        self.assertEqual(len(ring), 3)
+        batch = ring.get_many(2)
+        self.assertEqual(list(batch['action']), [0, 1])
+        batch = ring.get_many(10)
+        self.assertEqual(list(batch['action']), [2])
+        self.assertIsNone(ring.get_many(1, timeout=0.01))
+
+    def test_policy_store(self):
+        agent = DQNAgent(state_shape=[2], mlp_layers=[10], device=torch.device('cpu'))
+        other = DQNAgent(state_shape=[2], mlp_layers=[10], device=torch.device('cpu'))
+        store = PolicyStore(agent)
+        agent.total_t = 7
+        version = store.publish(agent)
+        self.assertEqual(store.pull(other, -1), version)
+        self.assertEqual(other.total_t, 7)
+        obs = np.random.random_sample((3, 2))
+        np.testing.assert_allclose(agent.q_estimator.predict_nograd(obs), other.q_estimator.predict_nograd(obs))
+
+    def test_collector(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0})
+        for agent in [
+            DQNAgent(num_actions=env.num_actions, state_shape=env.state_shape[0], mlp_layers=[16],
+                     replay_memory_init_size=50, device=torch.device('cpu')),
+            NFSPAgent(num_actions=env.num_actions, state_shape=env.state_shape[0], hidden_layers_sizes=[16],
+                      q_mlp_layers=[16], anticipatory_param=0.5, min_buffer_size_to_learn=50,
+                      q_replay_memory_init_size=50, device=torch.device('cpu')),
+        ]:
+            env.set_agents([agent, RandomAgent(env.num_actions)])
+            collector = ExperienceCollector(env, num_actors=1, ring_capacity=64, publish_every=20,
+                                            seed=0, start_method='fork')
+            with collector:
+                self.assertTrue(collector.wait(200, timeout=60))
+            stats = collector.stats()
+            self.assertGreaterEqual(stats['transitions_consumed'], 200)
+            self.assertGreater(stats['version'], 1)
+            self.assertGreaterEqual(agent.total_t, 200)
+
+if __name__ == '__main__':
+    unittest.main()
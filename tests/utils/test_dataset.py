@@ -0,0 +1,70 @@
+import unittest
+import shutil
+import tempfile
+import numpy as np
+
+import rlcard
+from rlcard.agents.random_agent import RandomAgent
+from rlcard.utils.dataset import TrajectoryWriter, TrajectoryDataset
+
+class TestDataset(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_write_and_read(self):
+        # The random agents use the global RNG. With this seed the first
+        # episode of player 0 has three rows.
+        np.random.seed(1)
+        env = rlcard.make('leduc-holdem', config={'seed': 0})
+        env.set_agents([RandomAgent(env.num_actions), RandomAgent(env.num_actions)])
+        games = []
+        with TrajectoryWriter(self.path, env.num_actions, shard_size=50, obs_dtype=np.int8) as writer:
+            for _ in range(40):
+                trajectories, payoffs = env.run(is_training=True)
+                writer.add_trajectories(trajectories, payoffs)
+                games.append((trajectories, payoffs))
+
+        dataset = TrajectoryDataset(self.path)
+        self.assertGreater(dataset.num_shards, 1)
+        num_rows = sum(len(t[p]) // 2 for t, _ in games for p in range(2))
+        self.assertEqual(len(dataset), num_rows)
+
+        episodes = list(dataset.episodes())
+        self.assertEqual(len(episodes), sum(len(t[p]) > 1 for t, _ in games for p in range(2)))
+        trajectories, payoffs = games[0]
+        first = episodes[0]
+        self.assertEqual(list(first['action']), trajectories[0][1::2])
+        self.assertEqual(first['reward'][-1], payoffs[0])
+        self.assertTrue(first['done'][-1])
+        self.assertGreater(len(first['action']), 1)
+        np.testing.assert_array_equal(first['obs'][0], trajectories[0][0]['obs'])
+        np.testing.assert_array_equal(first['next_obs'][0], trajectories[0][2]['obs'])
+        # The last row of an episode is its own successor
+        single = next(episode for episode in episodes if len(episode['action']) == 1)
+        self.assertTrue(single['done'][0])
+        np.testing.assert_array_equal(single['next_obs'], single['obs'])
+
+        batch = dataset.sample(32, np.random.RandomState(0))
+        self.assertEqual(batch['obs'].shape, (32, 36))
+        self.assertEqual(batch['obs'].dtype, np.int8)
+        self.assertEqual(batch['legal_actions'].shape, (32, 4))
+        self.assertTrue(np.all(batch['legal_actions'][np.arange(32), batch['action']]))
+
+    def test_append(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0})
+        env.set_agents([RandomAgent(env.num_actions), RandomAgent(env.num_actions)])
+        for _ in range(2):
+            with TrajectoryWriter(self.path, env.num_actions) as writer:
+                trajectories, payoffs = env.run(is_training=True)
+                writer.add_trajectories(trajectories, payoffs, player_ids=[0])
+        dataset = TrajectoryDataset(self.path)
+        self.assertEqual(dataset.num_shards, 2)
+        self.assertEqual(dataset.index['num_games'], 2)
+        self.assertEqual(len(list(dataset.episodes())), 2)
+
+if __name__ == '__main__':
+    unittest.main()
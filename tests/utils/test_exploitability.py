@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+import torch
+
+import rlcard
+from rlcard.agents import CFRAgent, NFSPAgent, VectorizedCFRAgent
+from rlcard.utils.exploitability import Exploitability, exploitability
+
+class TestExploitability(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.env = rlcard.make('leduc-holdem', config={'allow_step_back': True})
+        cls.exploitability = Exploitability(cls.env)
+
+    def test_best_response(self):
+        tree = self.exploitability.tree
+        np_random = np.random.RandomState(0)
+        policy = self.exploitability.policy(np_random.rand(tree.num_infosets, tree.num_actions))
+        values = self.exploitability.values(policy)
+        self.assertAlmostEqual(values.sum(), 0)
+        for player_id in range(2):
+            value, response = self.exploitability.best_response(policy, player_id)
+            mine = tree.infoset_player == player_id
+            profile = policy.copy()
+            profile[mine] = response[mine]
+            self.assertAlmostEqual(self.exploitability.values(profile)[player_id], value)
+            # No other policy of the player does better
+            for _ in range(20):
+                deviation = policy.copy()
+                deviation[mine] = self.exploitability.policy(np_random.rand(tree.num_infosets, tree.num_actions) ** 8)[mine]
+                self.assertLessEqual(self.exploitability.values(deviation)[player_id], value + 1e-9)
+        self.assertGreater(self.exploitability.nash_conv(policy), 0)
+
+    def test_sources(self):
+        tree = self.exploitability.tree
+        uniform = np.ones((tree.num_infosets, tree.num_actions))
+        expected = self.exploitability(uniform)
+        self.assertAlmostEqual(self.exploitability(lambda state: np.ones(tree.num_actions)), expected)
+        self.assertAlmostEqual(self.exploitability({key: np.ones(tree.num_actions) for key in tree.infoset_keys}), expected)
+        self.assertAlmostEqual(exploitability(self.env, uniform), expected)
+
+        # An untrained CFR agent plays uniformly
+        agent = CFRAgent(self.env)
+        self.assertAlmostEqual(self.exploitability(agent), expected)
+        agent = NFSPAgent(num_actions=self.env.num_actions,
+                          state_shape=self.env.state_shape[0],
+                          hidden_layers_sizes=[16],
+                          q_mlp_layers=[16],
+                          device=torch.device('cpu'))
+        self.assertGreater(self.exploitability(agent), 0)
+
+    def test_cfr(self):
+        agent = VectorizedCFRAgent(self.env, plus=True)
+        before = self.exploitability(agent)
+        for _ in range(50):
+            agent.train()
+        self.assertLess(self.exploitability(agent), min(0.05, before))
+
+if __name__ == '__main__':
+    unittest.main()
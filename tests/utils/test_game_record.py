@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import rlcard
+from rlcard.agents.random_agent import RandomAgent
+from rlcard.models.leducholdem_rule_models import LeducHoldemRuleAgentV1
+from rlcard.utils.game_record import GameRecordWriter, GameRecordReader, record_games, run_recorded
+
+ENV_IDS = ['blackjack', 'doudizhu', 'limit-holdem', 'no-limit-holdem', 'leduc-holdem',
+           'uno', 'mahjong', 'gin-rummy', 'bridge', 'five-hundred']
+
+def _play_random(env, seed, np_random):
+    env.seed(seed)
+    state, _ = env.reset()
+    actions = []
+    while not env.is_over():
+        if isinstance(state, dict):
+            legal_actions = list(state['legal_actions'])
+        else:
+            # The five-hundred env extracts the observation only
+            legal_actions = [action.action_id for action in env._get_legal_actions()]
+        actions.append(int(np_random.choice(legal_actions)))
+        state, _ = env.step(actions[-1])
+    return actions
+
+class TestGameRecord(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'games.rec')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_replay_all_envs(self):
+        for env_id in ENV_IDS:
+            env = rlcard.make(env_id)
+            np_random = np.random.RandomState(0)
+            path = os.path.join(self.dir, env_id + '.rec')
+            games = []
+            with GameRecordWriter(path, env_id) as writer:
+                for seed in range(3):
+                    actions = _play_random(env, seed, np_random)
+                    writer.add(seed, actions)
+                    games.append((actions, env.get_payoffs()))
+            with GameRecordReader(path) as reader:
+                self.assertEqual(len(reader), 3)
+                for i, (actions, payoffs) in enumerate(games):
+                    self.assertEqual(list(reader[i][1]), actions)
+                    replayed = reader.replay(i)
+                    self.assertTrue(replayed.is_over(), env_id)
+                    np.testing.assert_array_equal(replayed.get_payoffs(), payoffs)
+
+    def test_record_games(self):
+        env = rlcard.make('limit-holdem')
+        env.set_agents([RandomAgent(env.num_actions) for _ in range(env.num_players)])
+        with GameRecordWriter(self.path, 'limit-holdem') as writer:
+            payoffs = record_games(env, writer, 5, seed=7)
+        with GameRecordReader(self.path) as reader:
+            for i in range(5):
+                np.testing.assert_array_equal(reader.replay(i).get_payoffs(), payoffs[i])
+
+    def test_replay_step(self):
+        env = rlcard.make('leduc-holdem')
+        env.set_agents([LeducHoldemRuleAgentV1(), RandomAgent(env.num_actions)])
+        actions, _ = run_recorded(env, 11)
+        observations = []
+        env.seed(11)
+        state, _ = env.reset()
+        observations.append(state['obs'])
+        for action in actions:
+            state, _ = env.step(action)
+            observations.append(state['obs'])
+
+        with GameRecordWriter(self.path, 'leduc-holdem') as writer:
+            writer.add(11, actions)
+        with GameRecordReader(self.path) as reader:
+            seed, recorded = reader[0]
+            self.assertEqual(seed, 11)
+            self.assertEqual(list(recorded), actions)
+            for step in range(len(actions)):
+                env = reader.replay(0, step)
+                player_id = env.get_player_id()
+                np.testing.assert_array_equal(env.get_state(player_id)['obs'], observations[step])
+            self.assertEqual([a for _, _, a in reader.states(0)], actions)
+
+    def test_append_and_recover(self):
+        with GameRecordWriter(self.path, 'leduc-holdem') as writer:
+            writer.add(1, [0, 1, 2])
+            writer.add(2, [3, 2])
+        # A crash in the middle of a record, and a lost index
+        with open(self.path, 'ab') as f:
+            f.write(b'\x10\x00\x00\x00\x01')
+        os.remove(self.path + '.idx')
+        with GameRecordWriter(self.path, 'leduc-holdem') as writer:
+            self.assertEqual(len(writer), 2)
+            writer.add(3, [1])
+        with GameRecordReader(self.path) as reader:
+            self.assertEqual([(s, list(a)) for s, a in reader], [(1, [0, 1, 2]), (2, [3, 2]), (3, [1])])
+        with self.assertRaises(ValueError):
+            GameRecordWriter(self.path, 'limit-holdem')
+
+if __name__ == '__main__':
+    unittest.main()
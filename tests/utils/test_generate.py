@@ -0,0 +1,51 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from rlcard.generate import generate, part_path, MANIFEST_FILE
+from rlcard.utils.dataset import TrajectoryDataset
+
+class TestGenerate(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def _generate(self, num_workers):
+        return generate('leduc-holdem', ['leduc-holdem-rule-v1', 'random'], 25, self.path,
+                        num_workers=num_workers, part_size=10, seed=1, obs_dtype='int8',
+                        start_method='fork', verbose=False)
+
+    def test_generate_and_resume(self):
+        manifest = self._generate(2)
+        self.assertEqual(sorted(manifest['parts']), ['0', '1', '2'])
+        self.assertEqual(len(manifest['agent_versions']), 2)
+        self.assertEqual(manifest['parts']['2']['num_episodes'], 5)
+        for part in range(3):
+            dataset = TrajectoryDataset(part_path(self.path, part))
+            self.assertEqual(len(dataset), manifest['parts'][str(part)]['num_rows'])
+            self.assertEqual(dataset.index['num_games'], manifest['parts'][str(part)]['num_episodes'])
+        actions = np.asarray(TrajectoryDataset(part_path(self.path, 1)).shard(0)['action'])
+
+        # Simulate a crash while part 1 was being written
+        del manifest['parts']['1']
+        with open(os.path.join(self.path, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f)
+        shutil.rmtree(os.path.join(part_path(self.path, 1), 'shard_00000'))
+        manifest = self._generate(1)
+        self.assertEqual(sorted(manifest['parts']), ['0', '1', '2'])
+        np.testing.assert_array_equal(TrajectoryDataset(part_path(self.path, 1)).shard(0)['action'], actions)
+
+    def test_settings_mismatch(self):
+        self._generate(1)
+        with self.assertRaises(ValueError):
+            generate('leduc-holdem', ['random', 'random'], 25, self.path, verbose=False)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+
+import rlcard
+from rlcard.agents.random_agent import RandomAgent
+from rlcard.utils.parallel_utils import tournament_parallel, split_num, derive_seeds
+
+class TestParallelUtils(unittest.TestCase):
+
+    def test_split_num(self):
+        self.assertEqual(split_num(10, 3), [4, 3, 3])
+        self.assertEqual(sum(split_num(1000, 7)), 1000)
+
+    def test_derive_seeds(self):
+        self.assertEqual(derive_seeds(42, 4), derive_seeds(42, 4))
+        self.assertEqual(len(set(derive_seeds(42, 4))), 4)
+
+    def test_tournament_parallel(self):
+        env = rlcard.make('leduc-holdem')
+        env.set_agents([RandomAgent(env.num_actions), RandomAgent(env.num_actions)])
+        payoffs = tournament_parallel(env, 200, num_workers=2, seed=7)
+        self.assertEqual(len(payoffs), 2)
+        self.assertEqual(payoffs, tournament_parallel(env, 200, num_workers=2, seed=7))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+import numpy as np
+
+import rlcard
+from rlcard.agents import CFRAgent
+from rlcard.models.pretrained_models import ROOT_PATH
+from rlcard.utils.policy_table import PolicyTable, write_policy_tables, load_policy_tables, convert_cfr_model
+
+class TestPolicyTable(unittest.TestCase):
+
+    def test_write_and_read(self):
+        np_random = np.random.RandomState(0)
+        for keys in [[b'k%d' % i * (i % 7 + 1) for i in range(500)], ['key %d' % i for i in range(500)], []]:
+            average_policy = {key: np_random.rand(4) for key in keys}
+            regrets = {key: np_random.randn(4) for key in keys[::2]}
+            path = os.path.join(tempfile.mkdtemp(), 'tables.tbl')
+            write_policy_tables(path, {'average_policy': average_policy, 'regrets': regrets}, 4, meta={'iteration': 7})
+
+            table = PolicyTable(path)
+            self.assertEqual(len(table), len(keys))
+            self.assertEqual(set(table), set(keys))
+            self.assertEqual(table.meta, {'iteration': 7})
+            for key in keys:
+                self.assertIn(key, table)
+                self.assertTrue(np.allclose(table[key], average_policy[key]))
+            self.assertNotIn(b'missing' if not keys or isinstance(keys[0], bytes) else 'missing', table)
+            self.assertFalse(table.values.flags.writeable)
+
+            regret_table = pickle.loads(pickle.dumps(PolicyTable(path, 'regrets')))
+            for key in keys:
+                expected = regrets.get(key, np.zeros(4))
+                self.assertTrue(np.allclose(regret_table[key], expected, atol=1e-6))
+
+            tables, meta = load_policy_tables(path)
+            self.assertEqual(meta['iteration'], 7)
+            self.assertEqual(set(tables['average_policy']), set(keys))
+
+    def test_pretrained_model(self):
+        env = rlcard.make('leduc-holdem')
+        pickled = CFRAgent(env, model_path=os.path.join(ROOT_PATH, 'leduc_holdem_cfr'))
+        pickled.load()
+        path = convert_cfr_model(pickled.model_path, os.path.join(tempfile.mkdtemp(), 'tables.tbl'))
+        self.assertEqual(open(path, 'rb').read(),
+                         open(os.path.join(ROOT_PATH, 'leduc_holdem_cfr', 'tables.tbl'), 'rb').read())
+
+        mapped = rlcard.models.load('leduc-holdem-cfr').agents[0]
+        self.assertIsInstance(mapped.average_policy, PolicyTable)
+        self.assertEqual(mapped.iteration, pickled.iteration)
+        for _ in range(20):
+            state, _ = env.reset()
+            while not env.is_over():
+                _, info = mapped.eval_step(state)
+                _, expected = pickled.eval_step(state)
+                for action in info['probs']:
+                    self.assertAlmostEqual(info['probs'][action], expected['probs'][action], places=5)
+                state, _ = env.step(list(state['legal_actions'])[0])
+
+    def test_checkpoint(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back': True})
+        agent = CFRAgent(env, model_path=tempfile.mkdtemp())
+        for _ in range(10):
+            agent.train()
+        agent.save_table()
+
+        resumed = CFRAgent(env, model_path=agent.model_path)
+        resumed.load_table(resume=True)
+        self.assertEqual(resumed.iteration, 10)
+        # The keys of the other tables come back as zeros, which are uniform policies
+        for key, regret in agent.regrets.items():
+            self.assertTrue(np.allclose(resumed.regrets[key], regret, rtol=1e-6, atol=1e-6))
+        resumed.train()
+        self.assertEqual(resumed.iteration, 11)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import torch
+
+import rlcard
+from rlcard.agents.random_agent import RandomAgent
+from rlcard.agents.dqn_agent import DQNAgent
+from rlcard.utils.rollout import (
+    RolloutServer,
+    start_local_workers,
+    get_policy_weights,
+    set_policy_weights,
+    feed_transitions,
+)
+
+class TestRollout(unittest.TestCase):
+
+    def test_policy_weights(self):
+        agent = DQNAgent(state_shape=[2], mlp_layers=[10], device=torch.device('cpu'))
+        other = DQNAgent(state_shape=[2], mlp_layers=[10], device=torch.device('cpu'))
+        agent.total_t = 3
+        set_policy_weights(other, get_policy_weights(agent))
+        self.assertEqual(other.total_t, 3)
+        obs = np.random.random_sample((3, 2))
+        np.testing.assert_allclose(agent.q_estimator.predict_nograd(obs), other.q_estimator.predict_nograd(obs))
+
+    def test_transitions(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0})
+        agent = DQNAgent(num_actions=env.num_actions, state_shape=env.state_shape[0], mlp_layers=[16],
+                         replay_memory_init_size=50, device=torch.device('cpu'))
+        env.set_agents([agent, RandomAgent(env.num_actions)])
+        address = os.path.join(tempfile.mkdtemp(), 'rollout.sock')
+        with RolloutServer(env, address=address, episodes_per_push=4, seed=0) as server:
+            server.publish({0: get_policy_weights(agent)})
+            workers = start_local_workers(server.address, 2, server.authkey, start_method='fork')
+            versions, num_transitions = set(), 0
+            while num_transitions < 200:
+                worker_index, version, transitions = server.get(timeout=30)
+                feed_transitions(agent, transitions)
+                num_transitions += len(transitions)
+                versions.add(version)
+                server.publish({0: get_policy_weights(agent)})
+            self.assertEqual(agent.total_t, num_transitions)
+            self.assertGreaterEqual(server.stats()['batches'], 1)
+        for worker in workers:
+            worker.join(timeout=10)
+            self.assertFalse(worker.is_alive())
+
+    def test_authkey(self):
+        env = rlcard.make('leduc-holdem')
+        env.set_agents([RandomAgent(env.num_actions), RandomAgent(env.num_actions)])
+        with self.assertRaises(ValueError):
+            RolloutServer(env, address=('0.0.0.0', 0))
+        with RolloutServer(env) as server, RolloutServer(env) as other:
+            self.assertEqual(len(server.authkey), 32)
+            self.assertNotEqual(server.authkey, other.authkey)
+        with RolloutServer(env, address=('0.0.0.0', 0), authkey=b'secret') as server:
+            self.assertEqual(server.authkey, b'secret')
+
+    def test_dmc(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0})
+        env.set_agents([RandomAgent(env.num_actions), RandomAgent(env.num_actions)])
+        with RolloutServer(env, kind='dmc', player_ids=(0, 1), unroll_length=5) as server:
+            workers = start_local_workers(server.address, 1, server.authkey, start_method='fork')
+            _, _, unrolls = server.get(timeout=30)
+            while not unrolls:
+                _, _, unrolls = server.get(timeout=30)
+            position, unroll = unrolls[0]
+            self.assertIn(position, [0, 1])
+            self.assertEqual(unroll['state'].shape, (5, 36))
+            self.assertEqual(unroll['action'].shape, (5, 4))
+        for worker in workers:
+            worker.join(timeout=10)
+
+if __name__ == '__main__':
+    unittest.main()
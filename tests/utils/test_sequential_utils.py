@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.agents.random_agent import RandomAgent
+from rlcard.utils.sequential_utils import RunningStats, empirical_bernstein_radius, normal_quantile, tournament_sequential
+
+class FoldAgent(RandomAgent):
+
+    def eval_step(self, state):
+        legal_actions = list(state['legal_actions'].keys())
+        action = 2 if 2 in legal_actions else legal_actions[0]
+        return action, {}
+
+class TestSequentialUtils(unittest.TestCase):
+
+    def test_running_stats(self):
+        values = np.random.random_sample(100)
+        stats = RunningStats()
+        for v in values:
+            stats.update(v)
+        self.assertEqual(stats.count, 100)
+        self.assertAlmostEqual(stats.mean, np.mean(values))
+        self.assertAlmostEqual(stats.variance, np.var(values, ddof=1))
+
+    def test_empirical_bernstein_radius(self):
+        self.assertEqual(empirical_bernstein_radius(1, 0.0, 1.0, 0.05), float('inf'))
+        self.assertGreater(empirical_bernstein_radius(100, 1.0, 2.0, 0.05),
+                           empirical_bernstein_radius(1000, 1.0, 2.0, 0.05))
+
+    def test_normal_quantile(self):
+        self.assertEqual(normal_quantile(0.5), 0.0)
+        self.assertAlmostEqual(normal_quantile(0.975), 1.959963984540054, places=7)
+        self.assertAlmostEqual(normal_quantile(0.01), -2.3263478740408408, places=7)
+        self.assertAlmostEqual(normal_quantile(1 - 1e-6), 4.753424308817088, places=7)
+        with self.assertRaises(ValueError):
+            normal_quantile(1.0)
+
+    def test_tournament_sequential(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0})
+        env.set_agents([RandomAgent(env.num_actions), FoldAgent(env.num_actions)])
+        payoffs, info = tournament_sequential(env, 10000, check_every=50)
+        self.assertEqual(len(payoffs), 2)
+        self.assertEqual(info['decision'], 1)
+        self.assertEqual(info['stop_reason'], 'decided')
+        self.assertLess(info['num_games'], 10000)
+
+        env.set_agents([RandomAgent(env.num_actions), RandomAgent(env.num_actions)])
+        payoffs, info = tournament_sequential(env, 200, check_every=100, delta=1e-9, half_width=0.0)
+        self.assertEqual(info['num_games'], 200)
+        self.assertEqual(info['decision'], 0)
+        self.assertEqual(info['stop_reason'], 'max_num')
+
+if __name__ == '__main__':
+    unittest.main()
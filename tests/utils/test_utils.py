@@ -1,6 +1,6 @@
 import unittest
 import numpy as np
-from rlcard.utils.utils import init_54_deck, init_standard_deck, rank2int, print_card, elegent_form, reorganize, tournament
+from rlcard.utils.utils import init_54_deck, init_standard_deck, rank2int, print_card, elegent_form, reorganize, tournament, legal_actions_mask
 import rlcard
 from rlcard.agents.random_agent import RandomAgent
 
@@ -12,6 +12,12 @@ class TestUtils(unittest.TestCase):
     def test_init_54_deck(self):
         self.assertEqual(len(init_54_deck()), 54)
 
+    def test_legal_actions_mask(self):
+        states = [{'legal_actions': {2: None, 0: None}}, {'legal_actions': {}}, {'legal_actions': {3: None}}]
+        mask = legal_actions_mask(states, 4)
+        np.testing.assert_array_equal(mask, [[True, False, True, False], [False] * 4, [False, False, False, True]])
+        self.assertEqual(legal_actions_mask([], 4).shape, (0, 4))
+
     def test_rank2int(self):
         self.assertEqual(rank2int('A'), 14)
         self.assertEqual(rank2int(''), -1)